@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+bench_import
+----------------------------------
+
+Measures the cold start cost of ``import perforce`` in fresh interpreters, against an empty interpreter.
+
+Exits with 1 when the median import time is over the budget, so it can gate CLI hooks and triggers.
+
+    python benchmarks/bench_import.py [runs] [budget in ms]
+"""
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMER = (
+    'import time; start = time.perf_counter(); {}; '
+    'print(time.perf_counter() - start)'
+)
+STATEMENTS = (
+    ('pass', 'pass'),
+    ('import perforce', 'import perforce'),
+    ('perforce.Connection', 'import perforce; perforce.Connection'),
+)
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure(statement, runs):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='')
+    times = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', TIMER.format(statement)], env=env, cwd=ROOT)
+        times.append(float(output))
+
+    return median(times) * 1000
+
+
+def main(runs=15, budget=25.0):
+    results = [(name, measure(statement, runs)) for name, statement in STATEMENTS]
+    for name, elapsed in results:
+        print('{:<22}{:8.2f}ms'.format(name, elapsed))
+
+    imported = dict(results)['import perforce']
+    print('budget:               {:8.2f}ms'.format(budget))
+
+    return 0 if imported <= budget else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[t(a) for t, a in zip((int, float), sys.argv[1:])]))
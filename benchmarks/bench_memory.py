@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+bench_memory
+----------------------------------
+
+Compares the memory held by a list of `Revision` and of `CompactRevision` objects built from fstat records.
+
+The records are the ones the fake ``p4`` executable in ``tests/p4.py`` serves, built in process so the benchmark
+measures the objects that are kept and not the cost of running fstat.
+
+    python benchmarks/bench_memory.py [files]
+"""
+
+import os
+import sys
+import gc
+import time
+import hashlib
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from perforce.models import Connection, Revision, CompactRevision, _decode
+
+FAKE_P4 = os.path.join(ROOT, 'tests', 'p4.py')
+FILE = '//depot/dir{0:03d}/sub{1:02d}/file{2:07d}.txt'
+
+
+def record(index):
+    """The raw marshalled fstat -Ol record of a file"""
+    depotFile = FILE.format(index % 1000, index % 37, index)
+    head = 1 + index % 5
+    data = {
+        'code': 'stat',
+        'depotFile': depotFile,
+        'clientFile': '/work/root' + depotFile[len('//depot'):],
+        'isMapped': '',
+        'headAction': 'edit' if head > 1 else 'add',
+        'headType': 'binary' if index % 7 == 0 else 'text',
+        'headTime': str(1500000000 + index),
+        'headRev': str(head),
+        'headChange': str(1000 + index),
+        'headModTime': str(1499990000 + index),
+        'haveRev': str(head),
+        'digest': hashlib.md5(depotFile.encode('utf8')).hexdigest().upper(),
+        'fileSize': str(100 + index * 37 % 10000),
+    }
+
+    return _decode({k.encode('utf8'): v.encode('utf8') for k, v in data.items()})
+
+
+def measure(cls, connection, files):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+
+    revs = [cls(record(i), connection) for i in range(files)]
+
+    elapsed = time.time() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # -- Touch the properties so both types are known to work
+    assert str(revs[-1].depotFile) == FILE.format((files - 1) % 1000, (files - 1) % 37, files - 1)
+    assert revs[-1].head.revision == revs[-1].revision
+
+    return size, elapsed
+
+
+def main(files=1000000):
+    os.environ.setdefault('FAKE_P4_FILES', '1')
+    connection = Connection(port='fake:1666', user='fake_user', client='fake_client', executable=FAKE_P4)
+
+    print('{} revisions'.format(files))
+    results = {}
+    for cls in (Revision, CompactRevision):
+        size, elapsed = measure(cls, connection, files)
+        results[cls] = size
+        print('{:<16}{:10.1f}MB  {:6.1f} bytes/file  {:.2f}s'.format(
+            cls.__name__, size / 1024.0 / 1024, size / float(files), elapsed))
+
+    print('ratio:          {:10.1f}x'.format(results[Revision] / float(results[CompactRevision])))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+bench_suite
+----------------------------------
+
+Measures the throughput and peak memory of the main code paths against the fake ``p4`` executable in ``tests/p4.py``
+and compares them to the baselines stored in ``benchmarks/baseline.json``.
+
+``--files`` sets the size of the fake depot and ``--latency`` the handshake paid by every process.  Throughput is the
+best of several runs in items per second, peak memory is what python allocated at most during one run.  Each run also
+measures a reference, ``p4 -G fstat`` read with :func:`marshal.load` without the library, and the baselines store the
+throughput and peak of every benchmark as a ratio to the reference of the same run, so they hold on any machine.
+Baselines are kept per depot size and latency.  The suite reports how every benchmark compares to its baseline, with
+``--check`` it also exits with 1 when a benchmark is slower or uses more memory than its baseline allows.  Timings on a
+busy machine vary more than the default tolerance even as ratios, so only check on a quiet one.
+
+To regenerate the baselines after an intended change, run the suite with ``--save`` on the default depot and commit
+``benchmarks/baseline.json``, add ``--files`` or ``--latency`` to store the baselines of another setup next to them.
+
+    python benchmarks/bench_suite.py [--save|--check] [--files N] [--latency S] [--tolerance T] [benchmark ...]
+"""
+
+import os
+import sys
+import json
+import time
+import marshal
+import subprocess
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from perforce import api
+from perforce.models import Connection, Changelist, Client, Stream
+
+FAKE_P4 = os.path.join(ROOT, 'tests', 'p4.py')
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+FILE = '//depot/dir{0:03d}/file{1:06d}.txt'
+#: Number of times an object is built or an api helper is called by the benchmarks that do not scale with the depot
+CALLS = 10
+
+
+def bench_reference(c, files):
+    """The records of ``fstat`` read straight from the process, what the other benchmarks are measured against"""
+    process = subprocess.Popen([sys.executable, FAKE_P4, '-G', 'fstat', '//depot/...'], stdout=subprocess.PIPE)
+    records = []
+    try:
+        while True:
+            records.append(marshal.load(process.stdout))
+    except EOFError:
+        pass
+    process.stdout.close()
+    process.wait()
+
+    return len(records)
+
+
+def bench_run(c, files):
+    return len(c.run(['fstat', '//depot/...']))
+
+
+def bench_iter_run(c, files):
+    return sum(1 for _ in c.iter_run(['fstat', '//depot/...']))
+
+
+def bench_ls(c, files):
+    return len(c.ls('//depot/...'))
+
+
+def bench_ls_compact(c, files):
+    return len(c.ls('//depot/...', compact=True))
+
+
+def bench_split_ls(c, files):
+    """ls of every file by name, more than fit on a command line are read from an argument file"""
+    return len(c.ls([FILE.format(i % 100, i) for i in range(files)]))
+
+
+def bench_changelist_query(c, files):
+    """A submitted changelist with every file of the depot"""
+    cl = Changelist(1000, c)
+    cl.query()
+
+    return len(cl)
+
+
+def bench_client(c, files):
+    for _ in range(CALLS):
+        client = Client('fake_client', c)
+        client.mapping.translate('//depot/dir000/file000000.txt')
+
+    return CALLS
+
+
+def bench_stream(c, files):
+    for _ in range(CALLS):
+        Stream('//stream/main', c).view
+
+    return CALLS
+
+
+def bench_api(c, files):
+    for i in range(CALLS):
+        api.info(c)
+        api.sync(FILE.format(i % 100, i), c)
+        api.edit(FILE.format(i % 100, i), c)
+
+    c.run(['revert', '//depot/...'])
+
+    return CALLS * 3
+
+
+BENCHMARKS = [
+    ('run', bench_run),
+    ('iter_run', bench_iter_run),
+    ('ls', bench_ls),
+    ('ls_compact', bench_ls_compact),
+    ('split_ls', bench_split_ls),
+    ('changelist_query', bench_changelist_query),
+    ('client', bench_client),
+    ('stream', bench_stream),
+    ('api', bench_api),
+]
+
+
+def measure(func, files, repeat):
+    """The best throughput of a benchmark and its peak memory in bytes"""
+    c = Connection(executable=FAKE_P4)
+    func(c, files)
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = func(c, files)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func(c, files)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    c.close()
+
+    return items / best, peak
+
+
+def compare(name, result, baseline, tolerance):
+    """Problems of a result against its baseline, both relative to the reference of their run"""
+    problems = []
+    if result['throughput_ratio'] < baseline['throughput_ratio'] * (1 - tolerance):
+        problems.append('throughput {:.3g}x the reference, below the baseline of {:.3g}x'.format(
+            result['throughput_ratio'], baseline['throughput_ratio']))
+    if result['peak_ratio'] > baseline['peak_ratio'] * (1 + tolerance):
+        problems.append('peak memory {:.3g}x the reference, above the baseline of {:.3g}x'.format(
+            result['peak_ratio'], baseline['peak_ratio']))
+
+    return ['{}: {}'.format(name, problem) for problem in problems]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('names', nargs='*', help='Benchmarks to run, all of them by default')
+    parser.add_argument('--files', type=int, default=5000, help='Number of files in the fake depot')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the fake p4 takes to start')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of each benchmark')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='Allowed regression, 0.3 is 30%%')
+    parser.add_argument('--baseline', default=BASELINE, help='Json file of the baselines')
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baselines')
+    parser.add_argument('--check', action='store_true', help='Exit with 1 when a benchmark regressed')
+    args = parser.parse_args(argv)
+
+    os.environ['FAKE_P4_FILES'] = str(args.files)
+    os.environ['FAKE_P4_LATENCY'] = str(args.latency)
+    # -- Change 1000 holds every file so Changelist.query scales with the depot
+    os.environ['FAKE_P4_CHANGE_SIZE'] = str(args.files)
+    os.environ['FAKE_P4_STATE'] = os.path.join(tempfile.mkdtemp(), 'state.json')
+
+    try:
+        with open(args.baseline) as fh:
+            baselines = json.load(fh)
+    except (IOError, OSError, ValueError):
+        baselines = {}
+
+    key = '{}files_{}latency'.format(args.files, args.latency)
+    stored = baselines.get(key, {})
+    results = {}
+    problems = []
+    print('{} files, {}s simulated handshake'.format(args.files, args.latency))
+    print('{:<18}{:>14}{:>12}{:>12}'.format('benchmark', 'items/s', 'peak KB', 'baseline'))
+    reference = measure(bench_reference, args.files, args.repeat)
+    print('{:<18}{:>14.1f}{:>12.1f}{:>12}'.format('reference', reference[0], reference[1] / 1024.0, '-'))
+    for name, func in BENCHMARKS:
+        if args.names and name not in args.names:
+            continue
+
+        throughput, peak = measure(func, args.files, args.repeat)
+        results[name] = {'throughput_ratio': throughput / reference[0], 'peak_ratio': float(peak) / reference[1]}
+        baseline = stored.get(name)
+        ratio = '{:.2f}x'.format(results[name]['throughput_ratio'] / baseline['throughput_ratio']) if baseline else '-'
+        print('{:<18}{:>14.1f}{:>12.1f}{:>12}'.format(name, throughput, peak / 1024.0, ratio))
+        if baseline:
+            problems += compare(name, results[name], baseline, args.tolerance)
+
+    if args.save:
+        stored.update(results)
+        baselines[key] = stored
+        with open(args.baseline, 'w') as fh:
+            json.dump(baselines, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        print('saved {}'.format(args.baseline))
+        return 0
+
+    for problem in problems:
+        print(problem)
+
+    return 1 if problems and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
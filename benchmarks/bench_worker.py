@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+bench_worker
+----------------------------------
+
+Compares spawning a p4 process per command with the persistent worker mode of `Connection`.
+
+Runs ``Revision.edit()`` and ``Revision.revert()``, each followed by their automatic ``fstat``, against the fake
+``p4`` executable in ``tests/p4.py``.  ``FAKE_P4_LATENCY`` simulates the server handshake paid by every process.
+
+    python benchmarks/bench_worker.py [iterations] [latency]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from perforce.models import Connection
+
+FAKE_P4 = os.path.join(ROOT, 'tests', 'p4.py')
+FILE = '//depot/dir{0:03d}/file{1:06d}.txt'
+
+
+def bench(persistent, iterations):
+    c = Connection(executable=FAKE_P4, persistent=persistent)
+    revs = c.ls([FILE.format(i % 100, i) for i in range(iterations)])
+
+    start = time.time()
+    for rev in revs:
+        rev.edit()
+        rev.revert()
+    elapsed = time.time() - start
+
+    c.close()
+
+    return elapsed
+
+
+def main(iterations=50, latency=0.01):
+    os.environ['FAKE_P4_LATENCY'] = str(latency)
+    os.environ['FAKE_P4_FILES'] = str(max(iterations, 100))
+    os.environ['FAKE_P4_STATE'] = os.path.join(tempfile.mkdtemp(), 'state.json')
+
+    spawn = bench(False, iterations)
+    persistent = bench(True, iterations)
+    commands = iterations * 4
+
+    print('{} commands, {}s simulated handshake'.format(commands, latency))
+    print('spawn:      {:.3f}s  {:.1f} commands/s'.format(spawn, commands / spawn))
+    print('persistent: {:.3f}s  {:.1f} commands/s'.format(persistent, commands / persistent))
+    print('speedup:    {:.1f}x'.format(spawn / persistent))
+
+
+if __name__ == '__main__':
+    main(*[t(a) for t, a in zip((int, float), sys.argv[1:])])
@@ -4,6 +4,7 @@
 Pythonic Perforce API
 ~~~~~~~~~~~~~~~~~~~~~
 
+Importing the package has no side effects, the models and api are imported the first time they are used.
 
 :copyright: (c) 2015 by Brett Dixon
 :license: MIT, see LICENSE for more details
@@ -15,10 +16,8 @@ __author__ = 'Brett Dixon'
 __license__ = 'MIT'
 __copyright__ = 'Copyright 2015 Brett Dixon'
 
-import logging.config
-
-from .models import Connection, Revision, Changelist, ConnectionStatus, ErrorLevel, Client, Stream
-from .api import connect, edit, sync, info, changelist, open
+import sys
+import importlib
 
 
 CONFIG = {
@@ -45,5 +44,54 @@ CONFIG = {
     }
 }
 
-logging.config.dictConfig(CONFIG)
+#: Name exported by the package to the submodule that defines it
+_EXPORTS = {
+    'Connection': 'models',
+    'Revision': 'models',
+    'CompactRevision': 'models',
+    'Changelist': 'models',
+    'ConnectionStatus': 'models',
+    'ErrorLevel': 'models',
+    'Client': 'models',
+    'Stream': 'models',
+    'connect': 'api',
+    'edit': 'api',
+    'sync': 'api',
+    'info': 'api',
+    'changelist': 'api',
+    'open': 'api',
+}
+_SUBMODULES = ('models', 'api', 'errors', 'aio', 'pool', 'cache', 'table', 'mapping', 'index', 'metrics', 'identity')
+
+
+def configure_logging(config=None):
+    """Logs INFO and above to stderr, this used to happen when the package was imported
+
+    :param config: :func:`logging.config.dictConfig` configuration, defaults to :data:`CONFIG`
+    :type config: dict
+    """
+    import logging.config
+    logging.config.dictConfig(config or CONFIG)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+
+    if name not in _EXPORTS:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+    value = getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
+# -- Module level __getattr__ needs python 3.7
+if sys.version_info < (3, 7):
+    from .models import Connection, Revision, CompactRevision, Changelist, ConnectionStatus, ErrorLevel, Client, Stream
+    from .api import connect, edit, sync, info, changelist, open
@@ -0,0 +1,808 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.aio
+~~~~~~~~~~~~
+
+This module implements an asyncio Connection, models and api.  It requires python 3.6+
+
+    >>> import asyncio
+    >>> from perforce import aio
+    >>> async def main():
+    ...     p4 = aio.connect()
+    ...     revisions = await p4.ls(['//depot/a.txt', '//depot/b.txt'])
+    ...     await asyncio.gather(*[rev.edit() for rev in revisions])
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import io
+import asyncio
+import marshal
+import subprocess
+
+from perforce import errors
+from perforce.models import (Connection, PerforceObject, Revision, Changelist, FileCollection, ErrorLevel, NEW_FORMAT,
+                             LOGGER, PAGE_SIZE, chunk_files, camel_case, _decode, _startupinfo)
+
+
+#: Number of bytes read from a process at a time
+CHUNK_SIZE = 64 * 1024
+
+
+class MarshalDecoder(object):
+    """Incrementally decodes the records written by ``p4 -G`` from chunks of bytes
+
+    The buffer only holds the bytes after the last complete record.  An incomplete record longer than
+    :data:`CHUNK_SIZE` is decoded again once the buffer has doubled, so a record spanning many chunks is not parsed
+    from its start for every chunk, call :meth:`flush` at the end of the output for the last records.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._retry = 0
+
+    @property
+    def pending(self):
+        """Number of bytes of a record that is not complete yet"""
+        return len(self._buffer)
+
+    def feed(self, data):
+        """Adds data and returns every record that is now complete
+
+        :param data: Bytes read from the process
+        :type data: bytes
+        :returns: list, raw records
+        """
+        self._buffer += data
+        if len(self._buffer) < self._retry:
+            return []
+
+        return self._decode()
+
+    def flush(self):
+        """Returns the records still in the buffer, call it once there is no more data
+
+        :returns: list, raw records
+        """
+        return self._decode()
+
+    def _decode(self):
+        stream = io.BytesIO(self._buffer)
+        records = []
+        position = 0
+        while position < len(self._buffer):
+            try:
+                record = marshal.load(stream)
+            except (EOFError, ValueError, TypeError):
+                # -- The rest of the record has not arrived yet
+                break
+            records.append(record)
+            position = stream.tell()
+
+        del self._buffer[:position]
+        # -- Retrying a short record is cheap, a long one waits for twice its bytes so decoding stays linear
+        self._retry = len(self._buffer) * 2 if len(self._buffer) > CHUNK_SIZE else 0
+
+        return records
+
+
+class AsyncConnection(object):
+    """An asyncio version of :class:`.Connection`
+
+    Commands run in processes created with :func:`asyncio.create_subprocess_exec` and their output is decoded as it
+    arrives, so many commands can share one event loop.  A :class:`.Connection` with the same settings is used to find
+    the environment and by anything that does not have an async version.
+
+    :param limit: Maximum number of commands running at once, unlimited if None
+    :type limit: int
+    """
+    def __init__(self, port=None, client=None, user=None, executable='p4', level=ErrorLevel.FAILED, limit=None):
+        self._connection = Connection(port, client, user, executable, level)
+        self._limit = limit
+        self._semaphore = None
+
+    def __repr__(self):
+        return '<AsyncConnection: {0}, {1}, {2}>'.format(
+            self._connection._port, str(self._connection._client), self._connection.user)
+
+    @property
+    def connection(self):
+        """The synchronous :class:`.Connection` with the same settings"""
+        return self._connection
+
+    @property
+    def client(self):
+        """The client used in perforce queries"""
+        return self._connection.client
+
+    @property
+    def user(self):
+        """The user used in perforce queries"""
+        return self._connection.user
+
+    @property
+    def level(self):
+        """The current exception level"""
+        return self._connection.level
+
+    @level.setter
+    def level(self, value):
+        """Set the current exception level"""
+        self._connection.level = value
+
+    async def iter_run(self, cmd, stdin=None):
+        """Runs a p4 command and yields dictionary objects as they are decoded
+
+        If the caller stops iterating before the end of the output, the process is killed.
+
+        :param cmd: Command to run
+        :type cmd: list
+        :param stdin: Standard Input to send to the process
+        :type stdin: str
+        :raises: :class:`.error.CommandError`
+        :returns: async generator<dict>, records of results
+        """
+        if isinstance(cmd, str):
+            raise ValueError('String commands are not supported, please use a list')
+
+        args = self._connection._args() + cmd
+        command = ' '.join(args)
+
+        semaphore = self._getSemaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                startupinfo=_startupinfo()
+            )
+            stderr = asyncio.ensure_future(proc.stderr.read())
+            decoder = MarshalDecoder()
+            try:
+                if stdin:
+                    proc.stdin.write(stdin.encode('utf8'))
+                    await proc.stdin.drain()
+                proc.stdin.close()
+
+                while True:
+                    data = await proc.stdout.read(CHUNK_SIZE)
+                    for record in decoder.feed(data) if data else decoder.flush():
+                        if record.get(b'code', '') == b'error' and record[b'severity'] >= self.level:
+                            raise errors.CommandError(record[b'data'], record, command)
+                        if isinstance(record, dict):
+                            yield _decode(record)
+                    if not data:
+                        break
+
+                await proc.wait()
+                output = await stderr
+            finally:
+                if proc.returncode is None:
+                    try:
+                        proc.kill()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+                if not stderr.done():
+                    stderr.cancel()
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+        if output:
+            raise errors.CommandError(output, command)
+
+        if decoder.pending:
+            raise errors.CommandError('Incomplete output', command)
+
+    async def run(self, cmd, stdin=None, marshal_output=True):
+        """Runs a p4 command and returns a list of dictionary objects
+
+        :param cmd: Command to run
+        :type cmd: list
+        :param stdin: Standard Input to send to the process
+        :type stdin: str
+        :param marshal_output: Whether or not to marshal the output from the command
+        :type marshal_output: bool
+        :raises: :class:`.error.CommandError`
+        :returns: list, records of results
+        """
+        if marshal_output:
+            return [record async for record in self.iter_run(cmd, stdin)]
+
+        if isinstance(cmd, str):
+            raise ValueError('String commands are not supported, please use a list')
+
+        args = self._connection._args(marshal_output) + cmd
+        command = ' '.join(args)
+
+        semaphore = self._getSemaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                startupinfo=_startupinfo()
+            )
+            records, stderr = await proc.communicate(stdin.encode('utf8') if stdin else None)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+        if stderr:
+            raise errors.CommandError(stderr, command)
+
+        return records
+
+    async def ls(self, files, silent=True, exclude_deleted=False):
+        """List files, every chunk of files is queried concurrently
+
+        :param files: Perforce file spec
+        :type files: list
+        :param silent: Will not raise error for invalid files or files not under the client
+        :type silent: bool
+        :param exclude_deleted: Exclude deleted files from the query
+        :type exclude_deleted: bool
+        :raises: :class:`.errors.RevisionError`
+        :returns: list<:class:`.AsyncRevision`>
+        """
+        if not isinstance(files, (tuple, list)):
+            files = [files]
+
+        chunks = await asyncio.gather(*[self._ls(chunk, silent, exclude_deleted) for chunk in chunk_files(files)])
+
+        return [rev for chunk in chunks for rev in chunk]
+
+    async def _ls(self, files, silent, exclude_deleted):
+        try:
+            cmd = ['fstat']
+            if exclude_deleted:
+                cmd += ['-F', '^headAction=delete ^headAction=move/delete']
+
+            cmd += files
+
+            results = await self.run(cmd)
+        except errors.CommandError as err:
+            if silent:
+                results = []
+            elif "is not under client's root" in str(err):
+                raise errors.RevisionError(err.args[0])
+            else:
+                raise
+
+        return [AsyncRevision(r, self) for r in results if r.get('code') != 'error']
+
+    async def findChangelist(self, description=None):
+        """Gets or creates a Changelist object with a description
+
+        :param description: The description to set or lookup
+        :type description: str
+        :raises: :class:`.errors.ChangelistError` if a description is looked up without a client
+        :returns: :class:`.AsyncChangelist`
+        """
+        if description is None:
+            return await AsyncChangelist.load(0, self)
+
+        if isinstance(description, int):
+            return await AsyncChangelist.load(description, self)
+
+        client = _clientName(self)
+        pending = await self.run(['changes', '-l', '-s', 'pending', '-c', client, '-u', self.user])
+        for cl in pending:
+            if cl['desc'].strip() == description.strip():
+                LOGGER.debug('Changelist found: {}'.format(cl['change']))
+                return await AsyncChangelist.load(int(cl['change']), self)
+
+        LOGGER.debug('No changelist found, creating one')
+        return await AsyncChangelist.create(description, self)
+
+    async def add(self, filename, change=None):
+        """Adds a new file to a changelist
+
+        :param filename: File path to add
+        :type filename: str
+        :param change: Changelist to add the file to
+        :type change: int
+        :returns: :class:`.AsyncRevision`
+        """
+        try:
+            if not await self.canAdd(filename):
+                raise errors.RevisionError('File is not under client path')
+
+            if change is None:
+                await self.run(['add', filename])
+            else:
+                await self.run(['add', '-c', str(change.change), filename])
+
+            data = (await self.run(['fstat', filename]))[0]
+        except errors.CommandError as err:
+            LOGGER.debug(err)
+            raise errors.RevisionError('File is not under client path')
+
+        rev = AsyncRevision(data, self)
+
+        if isinstance(change, AsyncChangelist):
+            await change.append(rev)
+        elif isinstance(change, Changelist):
+            change.append(rev)
+
+        return rev
+
+    async def canAdd(self, filename):
+        """Determines if a filename can be added to the depot under the current client
+
+        :param filename: File path to add
+        :type filename: str
+        """
+        try:
+            result = (await self.run(['add', '-n', '-t', 'text', filename]))[0]
+        except errors.CommandError as err:
+            LOGGER.debug(err)
+            return False
+
+        if result.get('code') not in ('error', 'info'):
+            return True
+
+        LOGGER.warning('Unable to add {}: {}'.format(filename, result['data']))
+
+        return False
+
+    def _getSemaphore(self):
+        # -- Created on first use so it belongs to the running loop
+        if self._limit and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._limit)
+
+        return self._semaphore
+
+
+class AsyncRevision(Revision):
+    """A :class:`.Revision` whose operations are coroutines
+
+    Properties that may need to query the server, such as :attr:`hash` and :attr:`changelist`, still use the
+    synchronous connection.  Use :meth:`create` to get the revision of a depot path.
+    """
+    def __init__(self, data, connection):
+        if isinstance(data, str):
+            raise ValueError('{} is a path, please use await AsyncRevision.create()'.format(data))
+
+        super(AsyncRevision, self).__init__(data, connection.connection)
+        self._aconnection = connection
+
+    @classmethod
+    async def create(cls, path, connection):
+        """Creates the revision of a file and queries its data
+
+        :param path: Depot or local path of the file
+        :type path: str
+        :param connection: Connection to use
+        :type connection: :class:`.AsyncConnection`
+        :raises: :class:`.errors.RevisionError` if the file is not in the depot
+        :returns: :class:`.AsyncRevision`
+        """
+        results = await connection.run(['fstat', '-m', '1', path])
+        if not results or results[0].get('code') == 'error':
+            raise errors.RevisionError('{} is not in the depot'.format(path))
+
+        return cls(results[0], connection)
+
+    async def query(self):
+        """Runs an fstat for this file and repopulates the data"""
+        self._update((await self._aconnection.run(['fstat', '-m', '1', self._p4dict['depotFile']]))[0])
+
+    async def queryChangelist(self):
+        """Which :class:`.AsyncChangelist` is this revision in"""
+        if self._changelist:
+            return self._changelist
+
+        change = self._p4dict['change']
+
+        return await AsyncChangelist.load(0 if change == 'default' else int(change), self._aconnection)
+
+    async def edit(self, changelist=0):
+        """Checks out the file
+
+        :param changelist: Optional changelist to checkout the file into
+        :type changelist: :class:`.Changelist`
+        """
+        command = 'reopen' if self.action in ('add', 'edit') else 'edit'
+        if int(changelist):
+            await self._aconnection.run([command, '-c', str(changelist.change), self.depotFile])
+        else:
+            await self._aconnection.run([command, self.depotFile])
+
+        await self.query()
+
+    async def lock(self, lock=True, changelist=0):
+        """Locks or unlocks the file
+
+        :param lock: Lock or unlock the file
+        :type lock: bool
+        :param changelist: Optional changelist to checkout the file into
+        :type changelist: :class:`.Changelist`
+        """
+        cmd = 'lock' if lock else 'unlock'
+        if changelist:
+            await self._aconnection.run([cmd, '-c', str(changelist), self.depotFile])
+        else:
+            await self._aconnection.run([cmd, self.depotFile])
+
+        await self.query()
+
+    async def sync(self, force=False, safe=True, revision=0, changelist=0):
+        """Syncs the file at the current revision
+
+        :param force: Force the file to sync
+        :type force: bool
+        :param safe: Don't sync files that were changed outside perforce
+        :type safe: bool
+        :param revision: Sync to a specific revision
+        :type revision: int
+        :param changelist: Changelist to sync to
+        :type changelist: int
+        """
+        cmd = ['sync']
+        if force:
+            cmd.append('-f')
+
+        if safe:
+            cmd.append('-s')
+
+        if revision:
+            cmd.append('{}#{}'.format(self.depotFile, revision))
+        elif changelist:
+            cmd.append('{}@{}'.format(self.depotFile, changelist))
+        else:
+            cmd.append(self.depotFile)
+
+        await self._aconnection.run(cmd)
+
+        await self.query()
+
+    async def revert(self, unchanged=False):
+        """Reverts any file changes
+
+        :param unchanged: Only revert if the file is unchanged
+        :type unchanged: bool
+        """
+        cmd = ['revert']
+        if unchanged:
+            cmd.append('-a')
+
+        wasadd = self.action == 'add'
+
+        cmd.append(self.depotFile)
+
+        await self._aconnection.run(cmd)
+
+        if 'movedFile' in self._p4dict:
+            self._p4dict['depotFile'] = self._p4dict['movedFile']
+
+        if not wasadd:
+            await self.query()
+
+        if self._changelist:
+            self._changelist.remove(self, permanent=True)
+
+    async def shelve(self, changelist=None):
+        """Shelves the file if it is in a changelist
+
+        :param changelist: Changelist to add the move to
+        :type changelist: :class:`.Changelist`
+        """
+        if changelist is None and self._p4dict.get('change', 'default') == 'default':
+            raise errors.ShelveError('Unabled to shelve files in the default changelist')
+
+        cmd = ['shelve']
+        if changelist:
+            cmd += ['-c', str(changelist)]
+
+        cmd.append(self.depotFile)
+
+        await self._aconnection.run(cmd)
+
+        await self.query()
+
+    async def move(self, dest, changelist=0, force=False):
+        """Renames/moves the file to dest
+
+        :param dest: Destination to move the file to
+        :type dest: str
+        :param changelist: Changelist to add the move to
+        :type changelist: :class:`.Changelist`
+        :param force: Force the move to an existing file
+        :type force: bool
+        """
+        cmd = ['move']
+        if force:
+            cmd.append('-f')
+
+        if changelist:
+            cmd += ['-c', str(changelist)]
+
+        if not self.isEdit:
+            await self.edit(changelist)
+
+        cmd += [self.depotFile, dest]
+        await self._aconnection.run(cmd)
+        self._p4dict['depotFile'] = dest
+
+        await self.query()
+
+    async def delete(self, changelist=0):
+        """Marks the file for delete
+
+        :param changelist: Changelist to add the move to
+        :type changelist: :class:`.Changelist`
+        """
+        cmd = ['delete']
+
+        if changelist:
+            cmd += ['-c', str(changelist)]
+
+        cmd.append(self.depotFile)
+        await self._aconnection.run(cmd)
+
+        await self.query()
+
+
+class AsyncChangelist(Changelist):
+    """A :class:`.Changelist` whose operations are coroutines
+
+    Use :meth:`load` or :meth:`AsyncConnection.findChangelist` to get one.  The files are only available once
+    :meth:`query` has been awaited, a change number of 0 is the default changelist.
+    """
+    def __init__(self, changelist, connection):
+        PerforceObject.__init__(self, connection.connection)
+
+        self._aconnection = connection
+        self._files = None
+        self._count = None
+        self._summary = False
+        self._dirty = False
+        self._reverted = False
+        self._change = changelist
+
+    @classmethod
+    async def load(cls, changelist, connection):
+        """Creates a changelist and queries its files
+
+        :param changelist: Change number, 0 for the default changelist
+        :type changelist: int
+        :param connection: Connection to use
+        :type connection: :class:`.AsyncConnection`
+        :returns: :class:`.AsyncChangelist`
+        """
+        cl = cls(changelist, connection)
+        await cl.query()
+
+        return cl
+
+    def _queryFiles(self):
+        if self._files is None:
+            raise errors.ChangelistError('Files have not been queried, await query() first')
+
+    async def query(self, files=True):
+        """Queries the depot to get the current status of the changelist"""
+        cmd = ['change', '-o']
+        if self._change:
+            cmd.append(str(self._change))
+        data = (await self._aconnection.run(cmd))[0]
+        self._p4dict = {camel_case(k): v for k, v in data.items()}
+        self._summary = False
+
+        if files:
+            if self._p4dict.get('status') == 'pending' or self._change == 0:
+                change = self._change or 'default'
+                data = await self._aconnection.run(['opened', '-c', str(change)])
+                self._files = FileCollection(AsyncRevision(r, self._aconnection) for r in data)
+            else:
+                data = await self._aconnection.run(['files', '//...@={}'.format(self._change)])
+                depotfiles = [r['depotFile'] for r in data if r.get('code') != 'error']
+                self._files = FileCollection()
+                for i in range(0, len(depotfiles), PAGE_SIZE):
+                    self._files.extend(await self._aconnection.ls(depotfiles[i:i + PAGE_SIZE]))
+
+    async def append(self, rev):
+        """Adds a :py:class:Revision to this changelist and adds or checks it out if needed
+
+        :param rev: Revision to add
+        :type rev: :class:`.Revision`
+        """
+        if self._files is None:
+            await self.query()
+
+        if not isinstance(rev, Revision):
+            results = await self._aconnection.ls(rev)
+            if not results:
+                await self._aconnection.add(rev, self)
+                return
+
+            rev = results[0]
+        elif not isinstance(rev, AsyncRevision):
+            rev = AsyncRevision(rev._p4dict, self._aconnection)
+
+        if rev not in self:
+            if rev.isMapped:
+                await rev.edit(self)
+
+            self._files.append(rev)
+            rev.changelist = self
+
+            self._dirty = True
+
+    async def revert(self, unchanged_only=False):
+        """Revert all files in this changelist
+
+        :param unchanged_only: Only revert unchanged files
+        :type unchanged_only: bool
+        :raises: :class:`.ChangelistError`
+        """
+        if self._reverted:
+            raise errors.ChangelistError('This changelist has been reverted')
+
+        if self._files is None:
+            await self.query()
+
+        change = self._change
+        if self._change == 0:
+            change = 'default'
+
+        cmd = ['revert', '-c', str(change)]
+
+        if unchanged_only:
+            cmd.append('-a')
+
+        files = [f.depotFile for f in self._files]
+        if files:
+            cmd += files
+            await self._aconnection.run(cmd)
+
+        self._files = FileCollection()
+        self._reverted = True
+
+    async def save(self):
+        """Saves the state of the changelist"""
+        if self._files is None:
+            await self.query()
+
+        if self._change == 0:
+            files = [f.depotFile for f in self._files]
+            if files:
+                await self._aconnection.run(['reopen', '-c', 'default'] + files)
+        else:
+            await self._aconnection.run(['change', '-i'], stdin=format(self), marshal_output=False)
+
+        self._dirty = False
+
+    async def submit(self):
+        """Submits a chagelist to the depot"""
+        if self._dirty:
+            await self.save()
+
+        await self._aconnection.run(['submit', '-c', str(self._change)], marshal_output=False)
+
+    async def delete(self):
+        """Reverts all files in this changelist then deletes the changelist from perforce"""
+        try:
+            await self.revert()
+        except errors.ChangelistError:
+            pass
+
+        await self._aconnection.run(['change', '-d', str(self._change)])
+
+    @staticmethod
+    async def create(description='<Created by Python>', connection=None):
+        """Creates a new changelist
+
+        :param connection: Connection to use to create the changelist
+        :type connection: :class:`.AsyncConnection`
+        :param description: Description for new changelist
+        :type description: str
+        :raises: :class:`.errors.ChangelistError` if the connection has no client
+        :returns: :class:`.AsyncChangelist`
+        """
+        connection = connection or connect()
+        description = description.replace('\n', '\n\t')
+        form = NEW_FORMAT.format(client=_clientName(connection), description=description)
+        result = await connection.run(['change', '-i'], stdin=form, marshal_output=False)
+
+        return await AsyncChangelist.load(int(result.split()[1]), connection)
+
+
+def _clientName(connection):
+    """The client of an :class:`.AsyncConnection`, pending changelists belong to one"""
+    client = connection.connection._client
+    if client is None:
+        raise errors.ChangelistError('No client could be found, please set P4CLIENT or provide the client')
+
+    return str(client)
+
+
+__CONNECTION = None
+
+
+def connect(*args, **kwargs):
+    """Creates or returns a singleton :class:`.AsyncConnection` object"""
+    global __CONNECTION
+    if __CONNECTION is None:
+        __CONNECTION = AsyncConnection(*args, **kwargs)
+
+    return __CONNECTION
+
+
+async def edit(filename, connection=None):
+    """Checks out a file into the default changelist
+
+    :param filename: File to check out
+    :type filename: str
+    :param connection: Connection object to use
+    :type connection: :py:class:`AsyncConnection`
+    """
+    c = connection or connect()
+    rev = await c.ls(filename)
+    if rev:
+        await rev[0].edit()
+
+
+async def sync(filename, connection=None):
+    """Syncs a file
+
+    :param filename: File to check out
+    :type filename: str
+    :param connection: Connection object to use
+    :type connection: :py:class:`AsyncConnection`
+    """
+    c = connection or connect()
+    rev = await c.ls(filename)
+    if rev:
+        await rev[0].sync()
+
+
+async def info(connection=None):
+    """Returns information about the current :class:`.AsyncConnection`
+
+    :param connection: Connection object to use
+    :type connection: :py:class:`AsyncConnection`
+    :returns: dict
+    """
+    c = connection or connect()
+    return (await c.run(['info']))[0]
+
+
+async def changelist(description=None, connection=None):
+    """Gets or creates a :class:`.AsyncChangelist` object with a description
+
+    :param description: Description of changelist to find or create
+    :type description: str
+    :param connection: Connection object to use
+    :type connection: :py:class:`AsyncConnection`
+    :returns: :class:`.AsyncChangelist`
+    """
+    c = connection or connect()
+
+    return await c.findChangelist(description)
+
+
+async def open(filename, connection=None):
+    """Edits or Adds a filename ensuring the file is in perforce and editable
+
+    :param filename: File to check out
+    :type filename: str
+    :param connection: Connection object to use
+    :type connection: :py:class:`AsyncConnection`
+    """
+    c = connection or connect()
+    res = await c.ls(filename)
+    if res and res[0].revision:
+        await res[0].edit()
+    else:
+        await c.add(filename)
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.cache
+~~~~~~~~~~~~~~
+
+This module implements a cache of ``fstat`` results for a :class:`.Connection`
+
+    >>> c = Connection(cache=FstatCache(ttl=30))
+    >>> c.ls('//depot/file.txt')  # -- runs fstat
+    >>> c.ls('//depot/file.txt')  # -- served from the cache
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+import six
+
+from perforce import errors
+from perforce.models import LOGGER, _decode, _splitCommand
+
+
+#: Commands that do not change the metadata of files
+READ_COMMANDS = ('fstat', 'files', 'have', 'where', 'opened', 'sizes', 'changes', 'describe', 'info', 'print',
+                 'filelog', 'counter', 'counters', 'diff', 'diff2', 'annotate', 'dirs', 'depots', 'users', 'clients',
+                 'streams', 'labels', 'verify', 'login', 'set')
+#: Characters that make a file spec match more than one file
+WILDCARDS = ('...', '*', '%%')
+
+
+def _depotPath(spec):
+    """The depot path of a file spec without its revision, None if it is not a single depot file
+
+    :param spec: File spec
+    :type spec: str
+    :returns: str
+    """
+    spec = six.text_type(spec)
+    if not spec.startswith('//') or any(w in spec for w in WILDCARDS):
+        return None
+
+    return spec.split('#')[0].split('@')[0]
+
+
+def _changes(prefix):
+    """Whether a command can change the metadata of files
+
+    :param prefix: Command and its flags
+    :type prefix: list
+    :returns: bool
+    """
+    # -- Forms are only read with -o and -n previews a command
+    return prefix[0] not in READ_COMMANDS and '-o' not in prefix and '-n' not in prefix
+
+
+class FstatCache(object):
+    """Caches the ``fstat`` records of depot files for a :class:`.Connection`
+
+    Only ``fstat`` commands on depot paths without wildcards or revisions are cached, the records are kept per depot
+    path and per set of flags.  Files that do not exist are cached as well.
+
+    Entries are dropped when:
+
+    * they are older than ttl
+    * more than size depot paths are cached, the least recently used go first
+    * the connection runs a command that changes them, commands on anything other than depot paths clear the cache
+    * the ``change`` counter of the server moved, it is checked at most once every interval seconds
+
+    :param ttl: Seconds an entry is used for, None to keep entries until they are invalidated
+    :type ttl: float
+    :param size: Maximum number of depot paths cached
+    :type size: int
+    :param interval: Seconds between checks of the change counter, None to never check it
+    :type interval: float
+    """
+    def __init__(self, ttl=60, size=10000, interval=5):
+        self._ttl = ttl
+        self._size = size
+        self._interval = interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._counter = None
+        self._checked = None
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<FstatCache: {0}/{1}>'.format(len(self), self._size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, depotFile):
+        return six.text_type(depotFile) in self._entries
+
+    def clear(self):
+        """Drops every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def invalidate(self, files):
+        """Drops the entries of files
+
+        :param files: Depot paths, revisions are ignored
+        :type files: list
+        """
+        with self._lock:
+            for f in files:
+                self._entries.pop(six.text_type(f).split('#')[0].split('@')[0], None)
+            self._generation += 1
+
+    def changed(self, cmd):
+        """Drops the entries a command may have changed
+
+        :param cmd: Command that was run
+        :type cmd: list
+        """
+        prefix, files = _splitCommand(cmd)
+        if not _changes(prefix):
+            return
+
+        paths = [_depotPath(f) for f in files]
+        if paths and None not in paths:
+            self.invalidate(paths)
+        else:
+            self.clear()
+
+    def iter_run(self, connection, cmd, records):
+        """Serves a command from the cache or yields its records and caches them
+
+        :param connection: Connection running the command
+        :type connection: :class:`.Connection`
+        :param cmd: Command being run
+        :type cmd: list
+        :param records: Records of the command, it is not iterated if the command is served from the cache
+        :type records: generator
+        :raises: :class:`.error.CommandError`
+        :returns: generator<dict>
+        """
+        prefix, files = _splitCommand(cmd)
+        if _changes(prefix):
+            try:
+                for record in records:
+                    yield record
+            finally:
+                self.changed(cmd)
+
+            return
+
+        paths = [_depotPath(f) for f in files]
+        if cmd[0] != 'fstat' or not paths or any(p != f for p, f in zip(paths, files)) or \
+                ('-m' in prefix and len(paths) > 1):
+            for record in records:
+                yield record
+
+            return
+
+        self._check(connection)
+        options = tuple(six.text_type(arg) for arg in prefix[1:])
+        cached = self._get(paths, options)
+        if cached is not None:
+            records.close()
+            command = ' '.join(connection._args() + cmd)
+            for record in cached:
+                # -- Cached records are copied as the caller may change them
+                record = _decode(dict(record))
+                if record.get('code') == 'error' and int(record['severity']) >= connection.level:
+                    raise errors.CommandError(record['data'], record, command)
+                yield record
+
+            return
+
+        generation = self._generation
+        results = []
+        for record in records:
+            results.append((record.get('depotFile') or record.get('data', '').split(' - ')[0],
+                            getattr(record, 'raw', record)))
+            yield record
+
+        self._set(paths, options, results, generation)
+
+    def _get(self, paths, options):
+        """The cached records of every path, None if any of them is missing"""
+        now = time.time()
+        records = []
+        with self._lock:
+            for path in paths:
+                entry = self._entries.get(path, {}).get(options)
+                if entry is None or (self._ttl is not None and now - entry[0] > self._ttl):
+                    self.misses += 1
+                    return None
+
+            for path in paths:
+                # -- Move the path to the end as the most recently used
+                entries = self._entries.pop(path)
+                self._entries[path] = entries
+                records += entries[options][1]
+
+            self.hits += 1
+
+        return records
+
+    def _set(self, paths, options, results, generation):
+        """Stores the records of a command by depot path, nothing is stored if a record does not match a path"""
+        records = OrderedDict((path, []) for path in paths)
+        for path, record in results:
+            if path not in records:
+                return
+            records[path].append(record)
+
+        now = time.time()
+        with self._lock:
+            # -- A command changed files while this one was running
+            if generation != self._generation:
+                return
+
+            for path, entry in six.iteritems(records):
+                entries = self._entries.pop(path, {})
+                entries[options] = (now, entry)
+                self._entries[path] = entries
+
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def _check(self, connection):
+        """Clears the cache if the change counter of the server moved since the last check"""
+        if self._interval is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            if self._checked is not None and now - self._checked < self._interval:
+                return
+            self._checked = now
+
+        try:
+            counter = connection.run(['counter', 'change'])[0]['value']
+        except (errors.CommandError, IndexError, KeyError) as err:
+            LOGGER.debug('Unable to read the change counter: {}'.format(err))
+            counter = None
+
+        if counter is None or counter != self._counter:
+            self.clear()
+            self._counter = counter
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.identity
+~~~~~~~~~~~~~~~~~
+
+This module implements an identity map so a :class:`.Connection` returns the same object for the same depot file or
+changelist
+
+    >>> c = Connection(identity=True)
+    >>> rev = c.ls('//depot/file.txt')[0]
+    >>> c.ls('//depot/file.txt')[0] is rev  # -- the known revision is updated from the new fstat record
+    True
+    >>> rev.changelist is rev.changelist  # -- change -o and opened only run once
+    True
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+import six
+
+
+#: Number of objects kept alive after their last use by default
+MAX_OBJECTS = 1024
+
+
+class IdentityMap(object):
+    """Weak references to the revisions and changelists of a connection by depot path and change number
+
+    An object stays in the map while anything else references it.  The map also keeps the last max_objects objects it
+    returned alive, least recently used first out, so navigating back to them does not query the server again.
+    Refreshing an object, eg with :meth:`.Changelist.query` or another :meth:`.Connection.ls`, updates it for every
+    holder.
+
+    :param max_objects: Number of recently used objects kept alive, 0 to only keep weak references
+    :type max_objects: int
+    """
+    def __init__(self, max_objects=MAX_OBJECTS):
+        self._maxObjects = max_objects
+        self._lock = threading.RLock()
+        self._objects = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+
+    def __repr__(self):
+        return '<IdentityMap: {0} objects, {1} retained>'.format(len(self), len(self._recent))
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key):
+        """The object of a key
+
+        :param key: ``('depotFile', path)`` or ``('change', number)``
+        :type key: tuple
+        :returns: object, None if it is not known
+        """
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is not None:
+                self._retain(key, obj)
+
+            return obj
+
+    def add(self, key, obj):
+        """Adds an object, it replaces the object known for the key
+
+        :param key: ``('depotFile', path)`` or ``('change', number)``
+        :type key: tuple
+        :param obj: Object to add
+        :type obj: :class:`.Revision` or :class:`.Changelist`
+        :returns: obj
+        """
+        with self._lock:
+            self._objects[key] = obj
+            self._retain(key, obj)
+
+        return obj
+
+    def discard(self, key):
+        """Forgets the object of a key"""
+        with self._lock:
+            self._objects.pop(key, None)
+            self._recent.pop(key, None)
+
+    def clear(self):
+        """Forgets every object"""
+        with self._lock:
+            self._objects.clear()
+            self._recent.clear()
+
+    def revision(self, data, connection, cls, merge=False):
+        """The revision of an fstat record, the known revision of its depot path is updated with the record
+
+        :param data: fstat record
+        :type data: dict
+        :param connection: Connection of a new revision
+        :type connection: :class:`.Connection`
+        :param cls: Class of the revision, a known revision of another class is replaced
+        :type cls: type
+        :param merge: Whether data only has some of the fields of an fstat record, eg an ``opened`` record, its fields
+            are then added to the known revision of any class instead of replacing its data
+        :type merge: bool
+        :returns: :class:`.Revision`
+        """
+        key = ('depotFile', six.text_type(data['depotFile']))
+        with self._lock:
+            rev = self.get(key)
+            if rev is not None and merge:
+                rev._merge(data)
+                return rev
+            if rev is not None and type(rev) is cls:
+                rev._update(data)
+                return rev
+
+            return self.add(key, cls(data, connection))
+
+    def changelist(self, change, factory):
+        """The changelist of a change number
+
+        :param change: Change number, 0 for the default changelist
+        :type change: int
+        :param factory: Called to create the changelist when it is not known
+        :type factory: callable
+        :returns: :class:`.Changelist`
+        """
+        key = ('change', int(change))
+        cl = self.get(key)
+        if cl is not None and cl.change == key[1]:
+            return cl
+
+        # -- Created without the lock as it queries the server, the first one added wins
+        created = factory()
+        with self._lock:
+            cl = self._objects.get(key)
+            if cl is None or cl.change != key[1]:
+                cl = self.add(key, created)
+
+        return cl
+
+    def _retain(self, key, obj):
+        """Keeps a strong reference to one of the most recently used objects"""
+        if self._maxObjects <= 0:
+            return
+
+        self._recent.pop(key, None)
+        self._recent[key] = obj
+        while len(self._recent) > self._maxObjects:
+            self._recent.popitem(last=False)
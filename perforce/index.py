@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.index
+~~~~~~~~~~~~~~
+
+This module implements an index of the have list of a client in SQLite, kept up to date by the commands of a
+:class:`.Connection`
+
+    >>> c = Connection(index='have.db')
+    >>> c.index.haveRev('//depot/file.txt')  # -- runs p4 have once to seed the index
+    4
+    >>> c.sync('//depot/file.txt#2')
+    >>> c.index.haveRev('//depot/file.txt')  # -- updated from the records of sync
+    2
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import sqlite3
+import threading
+
+import six
+
+from perforce.models import LOGGER, _splitCommand
+
+
+#: Commands whose records change the have list or which files are open
+UPDATE_COMMANDS = ('sync', 'flush', 'edit', 'add', 'delete', 'revert', 'reopen', 'move', 'submit')
+#: Highest character, appended to a prefix to make the upper bound of a range of paths
+LAST = u'\U0010ffff'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS have (
+    depotFile TEXT PRIMARY KEY,
+    clientFile TEXT,
+    haveRev INTEGER,
+    action TEXT
+);
+CREATE INDEX IF NOT EXISTS have_clientFile ON have (clientFile);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+COLUMNS = ('depotFile', 'clientFile', 'haveRev', 'action')
+
+
+class HaveIndex(object):
+    """The have list of the client of a connection, stored in SQLite
+
+    The index is seeded from ``p4 have`` the first time it is used, then the records of the commands the connection
+    runs keep it up to date: ``sync`` and ``flush`` change the have revisions, ``edit``, ``add``, ``delete``, ``move``
+    and ``revert`` which files are open.  Commands run without marshalled output, such as ``submit``, can not be
+    followed so the index is seeded again the next time it is used.  Changes made outside of this library are not
+    seen, call :meth:`seed` to read the have list again.
+
+    :param connection: Connection whose client is indexed
+    :type connection: :class:`.Connection`
+    :param filename: SQLite database, the default keeps the index in memory
+    :type filename: str
+    """
+    def __init__(self, connection, filename=':memory:'):
+        self._connection = connection
+        self._filename = filename
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._seeded = False
+
+    def __repr__(self):
+        return '<HaveIndex: {0}, {1}>'.format(self._filename, self._client())
+
+    def __len__(self):
+        self._ensure()
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM have').fetchone()[0]
+
+    def __contains__(self, depotFile):
+        return self.get(depotFile) is not None
+
+    def close(self):
+        """Closes the database"""
+        with self._lock:
+            self._db.close()
+
+    def seed(self):
+        """Replaces the index with the have list of the client"""
+        client = self._client()
+        LOGGER.debug('Seeding the have list index of {}'.format(client))
+        records = self._connection._iterRun(['have'])
+        rows = ((r['depotFile'], r.get('path', r.get('clientFile')), int(r['haveRev']), None)
+                for r in records if r.get('code') != 'error')
+
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM have')
+                self._db.executemany('INSERT OR REPLACE INTO have VALUES (?, ?, ?, ?)', rows)
+                self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('client', client))
+            self._seeded = True
+
+    def get(self, depotFile):
+        """The entry of a depot file
+
+        :param depotFile: Depot path
+        :type depotFile: str
+        :returns: dict with depotFile, clientFile, haveRev and action, None if the file is not synced or open
+        """
+        self._ensure()
+        with self._lock:
+            row = self._db.execute('SELECT * FROM have WHERE depotFile = ?', (six.text_type(depotFile),)).fetchone()
+
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def haveRev(self, depotFile):
+        """The revision of a depot file synced to the client
+
+        :param depotFile: Depot path
+        :type depotFile: str
+        :returns: int, None if the file is not synced
+        """
+        entry = self.get(depotFile)
+
+        return entry['haveRev'] if entry else None
+
+    def prefix(self, path):
+        """The entries of the files under a depot or local path
+
+        :param path: Start of the depot paths or local paths, eg ``//depot/project/``
+        :type path: str
+        :returns: list<dict>, ordered by depot path
+        """
+        self._ensure()
+        path = six.text_type(path)
+        column = 'depotFile' if path.startswith('//') else 'clientFile'
+        query = 'SELECT * FROM have WHERE {0} >= ? AND {0} < ? ORDER BY depotFile'.format(column)
+        with self._lock:
+            rows = self._db.execute(query, (path, path + LAST)).fetchall()
+
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def outdated(self, heads):
+        """The files whose synced revision is older than their head revision
+
+        :param heads: Head revision of each depot path, eg from ``p4 files``
+        :type heads: dict
+        :returns: list, depot paths that are not synced or are older than their head revision
+        """
+        self._ensure()
+        result = []
+        with self._lock:
+            for depotFile, head in six.iteritems(dict(heads)):
+                row = self._db.execute('SELECT haveRev FROM have WHERE depotFile = ?', (depotFile,)).fetchone()
+                if row is None or row[0] is None or row[0] < int(head):
+                    result.append(depotFile)
+
+        return result
+
+    def iter_run(self, cmd, records):
+        """Yields the records of a command and updates the index from them
+
+        :param cmd: Command being run
+        :type cmd: list
+        :param records: Records of the command
+        :type records: generator
+        :returns: generator<dict>
+        """
+        prefix = _splitCommand(cmd)[0]
+        command = prefix[0]
+        # -- -n previews a command without changing anything
+        if command not in UPDATE_COMMANDS or '-n' in prefix:
+            for record in records:
+                yield record
+
+            return
+
+        try:
+            for record in records:
+                if self._seeded and record.get('code') == 'stat':
+                    self.update(command, record)
+                yield record
+        finally:
+            with self._lock:
+                self._db.commit()
+
+    def changed(self, cmd):
+        """Notes that a command was run without marshalled output
+
+        :param cmd: Command that was run
+        :type cmd: list
+        """
+        if _splitCommand(cmd)[0][0] in UPDATE_COMMANDS:
+            with self._lock:
+                with self._db:
+                    self._db.execute("DELETE FROM meta WHERE key = 'client'")
+                self._seeded = False
+
+    def update(self, command, record):
+        """Applies the record of a command to the index, the changes are committed at the end of the command
+
+        :param command: Name of the command
+        :type command: str
+        :param record: Record of the command
+        :type record: dict
+        """
+        depotFile = record.get('depotFile')
+        if depotFile is None:
+            return
+
+        action = record.get('action')
+        with self._lock:
+            if command in ('sync', 'flush'):
+                if action == 'deleted':
+                    self._db.execute('DELETE FROM have WHERE depotFile = ? AND action IS NULL', (depotFile,))
+                else:
+                    self._set(depotFile, record.get('clientFile'), haveRev=int(record['rev']))
+            elif command == 'revert':
+                # -- A reverted add or branch has no revision on the client, its haveRev is 'none' or missing
+                haveRev = record.get('haveRev')
+                if not haveRev or haveRev == 'none':
+                    self._db.execute('DELETE FROM have WHERE depotFile = ?', (depotFile,))
+                else:
+                    self._set(depotFile, record.get('clientFile'), haveRev=int(haveRev), action=None)
+            elif command == 'move':
+                self._set(record['fromFile'], None, action='move/delete')
+                self._set(depotFile, record.get('clientFile'), action='move/add')
+            elif command == 'submit':
+                if 'rev' in record:
+                    self._set(depotFile, None, haveRev=int(record['rev']), action=None)
+            elif action:
+                self._set(depotFile, record.get('clientFile'), action=action)
+
+    def _set(self, depotFile, clientFile, **values):
+        """Creates or updates an entry, a missing clientFile keeps the current one"""
+        self._db.execute('INSERT OR IGNORE INTO have (depotFile, clientFile) VALUES (?, ?)', (depotFile, clientFile))
+        if clientFile is not None:
+            values['clientFile'] = clientFile
+        names = sorted(values)
+        self._db.execute(
+            'UPDATE have SET {} WHERE depotFile = ?'.format(', '.join('{} = ?'.format(n) for n in names)),
+            [values[n] for n in names] + [depotFile]
+        )
+
+    def _client(self):
+        return six.text_type(self._connection._client)
+
+    def _ensure(self):
+        """Seeds the index if it is empty, was seeded for another client or missed a command"""
+        if self._seeded:
+            return
+
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'client'").fetchone()
+        if row is not None and row[0] == self._client():
+            self._seeded = True
+        else:
+            self.seed()
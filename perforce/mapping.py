@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.mapping
+~~~~~~~~~~~~~~~~
+
+This module implements compiled client and stream views that translate paths without running ``p4 where``
+
+    >>> mapping = Mapping(['//depot/... //my_client/...', '-//depot/build/... //my_client/build/...'])
+    >>> mapping.translate('//depot/src/main.c')
+    '//my_client/src/main.c'
+    >>> mapping.translate('//my_client/src/main.c', reverse=True)
+    '//depot/src/main.c'
+    >>> mapping.translate('//depot/build/main.o') is None
+    True
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import re
+from collections import namedtuple
+
+import six
+
+
+#: A line of a view, flag is ``-`` for an exclusion, ``+`` for an overlay, ``&`` for a ditto mapping or empty
+MapLine = namedtuple('MapLine', 'flag, depot, client')
+
+RE_LINE = re.compile(r'^\s*("[^"]*"|\S+)\s+("[^"]*"|\S+)\s*$')
+RE_WILDCARD = re.compile(r'\.\.\.|\*|%%[1-9]')
+#: Flags a view line can start with
+FLAGS = ('-', '+', '&')
+#: Flags of lines that do not hide the lines above them
+OVERLAYS = ('+', '&')
+#: Views of at most this many lines that only end in ``...`` are matched by prefix instead of a regular expression
+PREFIX_LINES = 16
+
+
+def parse_line(line):
+    """Parses a line of a view, either side may be quoted
+
+    :param line: View line such as ``-//depot/build/... //my_client/build/...``
+    :type line: str
+    :raises: ValueError
+    :returns: :class:`MapLine`
+    """
+    match = RE_LINE.match(line)
+    if match is None:
+        raise ValueError('Invalid view line: {}'.format(line))
+
+    depot, client = (side.strip('"') for side in match.groups())
+    flag = ''
+    if depot[:1] in FLAGS:
+        flag, depot = depot[0], depot[1:]
+
+    return MapLine(flag, depot, client)
+
+
+def _pattern(path, prefix):
+    """The regular expression of one side of a line and the wildcard of each group
+
+    Every ``...`` and ``*`` is paired with the one at the same position on the other side, ``%%n`` with the one of the
+    same number.
+
+    :param path: One side of a line
+    :type path: str
+    :param prefix: Prefix of the group names, unique to the line
+    :type prefix: str
+    :returns: tuple, pattern and list of pieces, a piece is a literal string or the key of a wildcard
+    """
+    regex = []
+    pieces = []
+    counts = {'...': 0, '*': 0}
+    seen = set()
+    pos = 0
+    for match in RE_WILDCARD.finditer(path):
+        literal = path[pos:match.start()]
+        regex.append(re.escape(literal))
+        pieces.append(literal)
+
+        token = match.group()
+        if token.startswith('%%'):
+            key = 'p' + token[2:]
+        else:
+            key = '{}{}'.format('e' if token == '...' else 's', counts[token])
+            counts[token] += 1
+
+        if key in seen:
+            # -- A positional wildcard used twice matches the same text both times
+            regex.append('(?P={}{})'.format(prefix, key))
+        else:
+            seen.add(key)
+            regex.append('(?P<{}{}>{})'.format(prefix, key, '.*' if token == '...' else '[^/]*'))
+        pieces.append((key,))
+        pos = match.end()
+
+    regex.append(re.escape(path[pos:]))
+    pieces.append(path[pos:])
+
+    return ''.join(regex), [p for p in pieces if p]
+
+
+class _Direction(object):
+    """The lines of a view compiled to translate from one side to the other
+
+    :param lines: flag, source and target of every line
+    :type lines: list
+    :param flags: :mod:`re` flags
+    :type flags: int
+    """
+    __slots__ = ('_regex', '_lines')
+
+    def __init__(self, lines, flags):
+        alternatives = []
+        self._lines = []
+        for index, (flag, source, target) in enumerate(lines):
+            name = 'l{}'.format(index)
+            regex, sources = _pattern(source, name + '_')
+            # -- Later lines take precedence, so they are tried first
+            alternatives.insert(0, '(?P<{}>{})'.format(name, regex))
+
+            keys = set(p[0] for p in sources if isinstance(p, tuple))
+            template = []
+            for piece in _pattern(target, '')[1]:
+                if isinstance(piece, tuple):
+                    if piece[0] not in keys:
+                        raise ValueError('Wildcards do not match: {} {}'.format(source, target))
+                    template.append((name + '_' + piece[0],))
+                else:
+                    template.append(piece)
+
+            # -- A target is unmapped when a later line maps something else onto it
+            hiders = []
+            for later, (laterFlag, _, laterTarget) in enumerate(lines[index + 1:], index + 1):
+                if laterFlag not in OVERLAYS:
+                    hiders.append(_pattern(laterTarget, 'h{}_'.format(later))[0])
+            hider = re.compile('(?:{})\\Z'.format('|'.join(hiders)), flags) if hiders else None
+
+            self._lines.append((flag == '-', tuple(template), hider))
+
+        self._regex = re.compile('(?:{})\\Z'.format('|'.join(alternatives)), flags) if alternatives else None
+
+    def translate(self, path):
+        if self._regex is None:
+            return None
+
+        match = self._regex.match(path)
+        if match is None:
+            return None
+
+        excluded, template, hider = self._lines[int(match.lastgroup[1:])]
+        if excluded:
+            return None
+
+        result = ''.join(piece if isinstance(piece, six.string_types) else match.group(piece[0])
+                         for piece in template)
+        if hider is not None and hider.match(result):
+            return None
+
+        return result
+
+
+class _PrefixDirection(object):
+    """The lines of a view that only end in ``...`` compiled to translate from one side to the other
+
+    Comparing prefixes is several times faster than a regular expression for the short views most clients have.
+
+    :param lines: flag, source and target of every line
+    :type lines: list
+    :param case_sensitive: Whether paths are compared case sensitively
+    :type case_sensitive: bool
+    """
+    __slots__ = ('_lines', '_caseSensitive')
+
+    def __init__(self, lines, case_sensitive):
+        self._caseSensitive = case_sensitive
+        self._lines = []
+        for index, (flag, source, target) in enumerate(lines):
+            hiders = tuple(self._fold(t[:-3]) for f, _, t in lines[index + 1:] if f not in OVERLAYS)
+            # -- Later lines take precedence, so they are tried first
+            self._lines.insert(0, (self._fold(source[:-3]), target[:-3], flag == '-', hiders))
+
+    @staticmethod
+    def compatible(lines):
+        """Whether every line of a view can be matched by prefix"""
+        return len(lines) <= PREFIX_LINES and all(
+            path.endswith('...') and RE_WILDCARD.search(path[:-3]) is None
+            for _, source, target in lines for path in (source, target)
+        )
+
+    def _fold(self, path):
+        return path if self._caseSensitive else path.lower()
+
+    def translate(self, path):
+        key = path if self._caseSensitive else path.lower()
+        for source, target, excluded, hiders in self._lines:
+            if key.startswith(source):
+                if excluded:
+                    return None
+
+                result = target + path[len(source):]
+                if hiders and (result if self._caseSensitive else result.lower()).startswith(hiders):
+                    return None
+
+                return result
+
+        return None
+
+
+class Mapping(object):
+    """A client or stream view compiled to translate paths between the depot and the client
+
+    Lines follow the rules of p4: later lines take precedence over earlier ones, ``-`` lines exclude files on both
+    sides and a line hides the earlier lines that map onto the same path unless it is a ``+`` overlay.  ``...`` matches
+    any characters, ``*`` and ``%%1`` to ``%%9`` match any characters except ``/``.
+
+    :param lines: View lines as strings, :class:`MapLine` or (depot, client) pairs such as :class:`.FileSpec`
+    :type lines: list
+    :param case_sensitive: Whether paths are compared case sensitively, False for a case insensitive server.  A
+        callable is only called when a path is first translated, eg to ask the server, the lines are then compiled.
+    :type case_sensitive: bool|callable
+    :raises: ValueError if a line is invalid
+    """
+    def __init__(self, lines, case_sensitive=True):
+        self._lines = tuple(_line(line) for line in lines)
+        self._caseSensitive = case_sensitive
+        self._forward = self._reverse = None
+        if not callable(case_sensitive):
+            self._direction(False)
+            self._direction(True)
+
+    def __repr__(self):
+        return '<Mapping: {0} lines>'.format(len(self._lines))
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def __contains__(self, path):
+        return self._direction(False).translate(path) is not None
+
+    @property
+    def lines(self):
+        """The :class:`MapLine` of every line of the view"""
+        return self._lines
+
+    @property
+    def caseSensitive(self):
+        if callable(self._caseSensitive):
+            self._caseSensitive = bool(self._caseSensitive())
+
+        return self._caseSensitive
+
+    def translate(self, path, reverse=False):
+        """Translates a depot path to the client, or a client path to the depot
+
+        :param path: Path without a revision
+        :type path: str
+        :param reverse: Translate a client path to the depot
+        :type reverse: bool
+        :returns: str, None if the path is not mapped
+        """
+        return self._direction(reverse).translate(path)
+
+    def translate_all(self, paths, reverse=False):
+        """Translates many paths, see :meth:`translate`
+
+        :param paths: Paths without revisions
+        :type paths: iterable
+        :param reverse: Translate client paths to the depot
+        :type reverse: bool
+        :returns: generator<str>, None for every path that is not mapped
+        """
+        translate = self._direction(reverse).translate
+        for path in paths:
+            yield translate(path)
+
+    def includes(self, path, reverse=False):
+        """Whether a path is mapped by the view
+
+        :param path: Depot path, or client path if reverse
+        :type path: str
+        :param reverse: path is a client path
+        :type reverse: bool
+        :returns: bool
+        """
+        return self.translate(path, reverse) is not None
+
+    def _direction(self, reverse):
+        """The lines compiled from one side to the other, compiled when first used"""
+        if reverse:
+            if self._reverse is None:
+                self._reverse = _direction([(l.flag, l.client, l.depot) for l in self._lines], self.caseSensitive)
+            return self._reverse
+
+        if self._forward is None:
+            self._forward = _direction([(l.flag, l.depot, l.client) for l in self._lines], self.caseSensitive)
+        return self._forward
+
+
+def _direction(lines, case_sensitive):
+    """Compiles the lines of a view from one side to the other"""
+    if _PrefixDirection.compatible(lines):
+        return _PrefixDirection(lines, case_sensitive)
+
+    return _Direction(lines, 0 if case_sensitive else re.IGNORECASE)
+
+
+def _line(line):
+    """A :class:`MapLine` from a string, a MapLine or a (depot, client) pair"""
+    if isinstance(line, MapLine):
+        return line
+
+    if isinstance(line, six.string_types):
+        return parse_line(line)
+
+    depot, client = line
+    flag = ''
+    if depot[:1] in FLAGS:
+        flag, depot = depot[0], depot[1:]
+
+    return MapLine(flag, depot, client)
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.metrics
+~~~~~~~~~~~~~~~~
+
+This module implements a collector of the :class:`.CommandEvent` of the commands a :class:`.Connection` runs
+
+    >>> metrics = MetricsCollector()
+    >>> connection.add_observer(metrics)
+    >>> connection.ls('//depot/...')
+    >>> metrics.histogram('fstat', 'wall').count
+    1
+    >>> print(metrics.to_prometheus())
+    # HELP p4_command_spawn_seconds Time to start p4 commands
+    # TYPE p4_command_spawn_seconds histogram
+    p4_command_spawn_seconds_bucket{command="fstat",le="0.005"} 0
+    ...
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import bisect
+import json
+import threading
+from collections import OrderedDict
+
+import six
+
+
+#: Upper bounds of the buckets of a :class:`Histogram`, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+#: Times of a :class:`.CommandEvent` kept in histograms and their help text
+TIMINGS = OrderedDict([
+    ('spawn', 'Time to start p4 commands'),
+    ('firstRecord', 'Time to the first record of p4 commands'),
+    ('wall', 'Wall time of p4 commands'),
+])
+#: Counters of a :class:`.CommandEvent` and their help text
+COUNTERS = OrderedDict([
+    ('commands', 'Number of p4 commands run'),
+    ('records', 'Number of records read from p4 commands'),
+    ('bytes', 'Number of bytes read from p4 commands'),
+])
+#: Metric names of the timings and counters in the prometheus export
+PROMETHEUS_NAMES = {
+    'spawn': 'spawn_seconds',
+    'firstRecord': 'first_record_seconds',
+    'wall': 'wall_seconds',
+    'commands': 'total',
+    'records': 'records_total',
+    'bytes': 'bytes_total',
+}
+
+
+class Histogram(object):
+    """Counts values in buckets with upper bounds, like a prometheus histogram
+
+    :param buckets: Sorted upper bounds of the buckets, values above the last bound are only counted in the total
+    :type buckets: tuple
+    """
+    __slots__ = ('_buckets', '_counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def __repr__(self):
+        return '<Histogram: {0} values, mean {1:.6f}>'.format(self.count, self.mean)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def buckets(self):
+        """The upper bound of every bucket and the number of values at or below it, ending with inf"""
+        result = []
+        total = 0
+        for bound, count in zip(self._buckets + (float('inf'),), self._counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+    def observe(self, value):
+        """Adds a value to the histogram
+
+        :param value: Value to count
+        :type value: float
+        """
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'mean': self.mean,
+            'buckets': [[None if b == float('inf') else b, c] for b, c in self.buckets],
+        }
+
+
+class MetricsCollector(object):
+    """An observer of :class:`.Connection` that aggregates the :class:`.CommandEvent` of every command by name
+
+    The spawn, first record and wall times go into a :class:`Histogram` each, the number of commands, records and bytes
+    into counters and the commands that returned an error into a counter per error level.  A collector is thread safe
+    and can observe several connections.
+
+    :param buckets: Upper bounds of the buckets of the histograms
+    :type buckets: tuple
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._commands = OrderedDict()
+
+    def __repr__(self):
+        return '<MetricsCollector: {0} commands>'.format(len(self._commands))
+
+    def __call__(self, event):
+        with self._lock:
+            metrics = self._commands.get(event.name)
+            if metrics is None:
+                metrics = self._commands[event.name] = {
+                    'timings': dict((name, Histogram(self._buckets)) for name in TIMINGS),
+                    'counters': dict((name, 0) for name in COUNTERS),
+                    'errors': {},
+                }
+
+            for name in TIMINGS:
+                value = getattr(event, name)
+                if value is not None:
+                    metrics['timings'][name].observe(value)
+
+            metrics['counters']['commands'] += 1
+            metrics['counters']['records'] += event.records
+            metrics['counters']['bytes'] += event.bytes
+            if event.level:
+                metrics['errors'][event.level] = metrics['errors'].get(event.level, 0) + 1
+
+    @property
+    def commands(self):
+        """Names of the commands seen"""
+        return list(self._commands)
+
+    def histogram(self, command, timing):
+        """The histogram of a timing of a command
+
+        :param command: Name of the command, eg ``fstat``
+        :type command: str
+        :param timing: spawn, firstRecord or wall
+        :type timing: str
+        :returns: :class:`Histogram`, None if the command was not run
+        """
+        metrics = self._commands.get(command)
+
+        return metrics['timings'][timing] if metrics else None
+
+    def counter(self, command, name):
+        """The value of a counter of a command
+
+        :param command: Name of the command, eg ``fstat``
+        :type command: str
+        :param name: commands, records or bytes
+        :type name: str
+        :returns: int
+        """
+        metrics = self._commands.get(command)
+
+        return metrics['counters'][name] if metrics else 0
+
+    def reset(self):
+        """Forgets every command seen"""
+        with self._lock:
+            self._commands.clear()
+
+    def as_dict(self):
+        """The metrics of every command
+
+        :returns: dict, timings, counters and errors by level of each command
+        """
+        with self._lock:
+            return OrderedDict(
+                (command, {
+                    'timings': OrderedDict((name, metrics['timings'][name].as_dict()) for name in TIMINGS),
+                    'counters': OrderedDict((name, metrics['counters'][name]) for name in COUNTERS),
+                    'errors': dict((str(level), count) for level, count in sorted(metrics['errors'].items())),
+                })
+                for command, metrics in six.iteritems(self._commands)
+            )
+
+    def to_json(self, **kwargs):
+        """The metrics of every command as json, see :meth:`as_dict`
+
+        :param kwargs: Passed to :func:`json.dumps`
+        :returns: str
+        """
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def to_prometheus(self, prefix='p4_command'):
+        """The metrics of every command in the prometheus text format, labeled by command
+
+        :param prefix: Start of the name of every metric
+        :type prefix: str
+        :returns: str
+        """
+        data = self.as_dict()
+        lines = []
+        for name, help_text in six.iteritems(TIMINGS):
+            metric = '{}_{}'.format(prefix, PROMETHEUS_NAMES[name])
+            lines += ['# HELP {} {}'.format(metric, help_text), '# TYPE {} histogram'.format(metric)]
+            for command, metrics in six.iteritems(data):
+                histogram = metrics['timings'][name]
+                for bound, count in histogram['buckets']:
+                    le = '+Inf' if bound is None else repr(float(bound))
+                    lines.append('{}_bucket{{command="{}",le="{}"}} {}'.format(metric, _label(command), le, count))
+                lines.append('{}_sum{{command="{}"}} {!r}'.format(metric, _label(command), float(histogram['sum'])))
+                lines.append('{}_count{{command="{}"}} {}'.format(metric, _label(command), histogram['count']))
+
+        for name, help_text in six.iteritems(COUNTERS):
+            metric = '{}_{}'.format(prefix, PROMETHEUS_NAMES[name])
+            lines += ['# HELP {} {}'.format(metric, help_text), '# TYPE {} counter'.format(metric)]
+            for command, metrics in six.iteritems(data):
+                lines.append('{}{{command="{}"}} {}'.format(metric, _label(command), metrics['counters'][name]))
+
+        metric = '{}_errors_total'.format(prefix)
+        lines += ['# HELP {} Number of p4 commands that returned an error, by level'.format(metric),
+                  '# TYPE {} counter'.format(metric)]
+        for command, metrics in six.iteritems(data):
+            for level, count in six.iteritems(metrics['errors']):
+                lines.append('{}{{command="{}",level="{}"}} {}'.format(metric, _label(command), level, count))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    """Escapes a prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -17,13 +17,30 @@ import os
 import marshal
 import logging
 import re
-from collections import namedtuple
+import threading
+import time
+import tempfile
+import hashlib
+import fnmatch
+import json
+import mmap
+import io
+import itertools
+import operator
+from collections import namedtuple, OrderedDict, deque
 from functools import wraps
 
-import path
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
 import six
 
 from perforce import errors
+from perforce.mapping import Mapping
+
+# -- path is imported by the properties that use it, it takes longer to import than the rest of the package
 
 
 LOGGER = logging.getLogger('Perforce')
@@ -62,49 +79,226 @@ ErrorLevel = namedtuple('ErrorLevel', 'EMPTY, INFO, WARN, FAILED, FATAL')(*range
 ConnectionStatus = namedtuple('ConnectionStatus', 'OK, OFFLINE, NO_AUTH, INVALID_CLIENT')(*range(4))
 #: File spec http://www.perforce.com/perforce/doc.current/manuals/cmdref/filespecs.html
 FileSpec = namedtuple('FileSpec', 'depot,client')
+#: Files changed outside of perforce, local paths to add and depot paths to edit and delete, see
+#: :meth:`.Client.scan_changes`
+ScanResult = namedtuple('ScanResult', 'add, edit, delete')
+#: Progress of :meth:`.Connection.sync_parallel`, sent after every synced file
+SyncProgress = namedtuple(
+    'SyncProgress', 'files, totalFiles, bytes, totalBytes, elapsed, filesPerSecond, bytesPerSecond, record'
+)
+#: Timings of a command sent to the observers of a :class:`.Connection`, times are in seconds and firstRecord is None
+#: for a command without records
+CommandEvent = namedtuple('CommandEvent', 'name, command, spawn, firstRecord, wall, records, bytes, level')
+#: A synced file that differs from its have revision, see :meth:`.Connection.verify_local`
+Mismatch = namedtuple('Mismatch', 'depotFile, clientFile, digest, localDigest')
 
 RE_FILESPEC = re.compile('^"?(//[\w\d\_\/\.\s]+)"?\s')
 
+#: Commands that can be fed to a persistent worker, they all echo an invalid file argument back in an error
+WORKER_COMMANDS = ('fstat', 'files', 'have', 'where', 'opened', 'sizes', 'edit', 'add', 'delete', 'revert', 'sync',
+                   'lock', 'unlock', 'reopen')
+#: Flags that take a value for each command, used to find where the file arguments of a command start
+VALUE_FLAGS = {
+    'fstat': ('-A', '-c', '-e', '-F', '-m', '-T'), 'files': ('-m',), 'have': (), 'where': (),
+    'opened': ('-c', '-C', '-m', '-u'), 'sizes': ('-b', '-m'), 'edit': ('-c', '-t'), 'add': ('-c', '-t'),
+    'delete': ('-c',), 'revert': ('-c', '-C'), 'sync': ('-m',), 'lock': ('-c',), 'unlock': ('-c',),
+    'reopen': ('-c', '-t'), 'move': ('-c', '-t'), 'print': ('-o', '-m'), 'changes': ('-c', '-e', '-m', '-s', '-u'),
+}
+#: Flags that take a value for the commands not in :data:`VALUE_FLAGS`
+DEFAULT_VALUE_FLAGS = ('-c', '-m', '-F', '-T', '-t')
+#: Flags that apply to all the file arguments of a command together, eg a maximum number of records, commands with them
+#: are not run one file at a time by a persistent worker
+WHOLE_FLAGS = ('-m',)
+#: Maximum number of persistent workers kept alive per connection
+MAX_WORKERS = 8
+#: Maximum number of characters of file arguments fed to a worker at once
+WORKER_INPUT_LIMIT = 32000
+WORKER_SENTINEL = '//__python_perforce_worker__/{}'
+#: Maximum number of decoded keys shared between records
+MAX_KEYS = 10000
+
+#: Maximum number of ``p4 set`` results cached, one per executable and working directory
+MAX_ENVIRONMENTS = 32
+#: Number of arguments ``p4 -x`` reads from an argument file for each run of a command
+ARGFILE_BATCH = 1000
+#: Number of files of a submitted changelist queried at a time
+PAGE_SIZE = 1000
+#: Number of threads walking and hashing a workspace
+SCAN_WORKERS = 8
+#: Fields read by :meth:`.Connection.prefetch` by default
+PREFETCH_FIELDS = ('digest', 'fileSize')
+#: fstat fields that are only reported with ``-Ol``
+LONG_FIELDS = ('digest', 'fileSize')
+#: Size of the write buffer of every file exported by :meth:`.Connection.print_to`
+PRINT_BUFFER = 1024 * 1024
+#: Number of bytes of a file hashed at a time
+HASH_WINDOW = 16 * 1024 * 1024
+#: Base file types converted when they are synced, their ``fstat -Ol`` digest is not the md5 of the workspace file
+CONVERTED_TYPES = ('unicode', 'xunicode', 'utf16', 'xutf16', 'utf8', 'xutf8', 'ktext', 'kxtext')
+
+_KEYS = {}
+_RAW_KEYS = {}
+#: os.scandir, None before python 3.5
+_scandir = getattr(os, 'scandir', None)
+#: Clock used to time commands, time.perf_counter is not available before python 3.3
+_clock = getattr(time, 'perf_counter', time.time)
+_ENVIRONMENTS = OrderedDict()
+_ENVIRONMENTS_LOCK = threading.Lock()
+
+
+def chunk_files(files, limit=CHAR_LIMIT):
+    """Splits files into lists whose combined length does not exceed limit
+
+    :param files: Files to split
+    :type files: iterable
+    :param limit: Maximum number of characters in a chunk
+    :type limit: int
+    :returns: generator<list>
+    """
+    chunk = []
+    counter = 0
+    for f in files:
+        length = len(str(f))
+        if chunk and length + counter > limit:
+            # -- at our limit
+            yield chunk
+            chunk = []
+            counter = 0
+
+        chunk.append(f)
+        counter += length
+
+    if chunk:
+        yield chunk
+
+
+def split_files(func=None, batch=None):
+    """Decorator to run a method taking a list of files in as few p4 processes as possible
 
-def split_ls(func):
-    """Decorator to split files into manageable chunks as not to exceed the windows cmd limit
+    Files that fit on the command line of the platform are passed as they are.  Longer lists are written to an argument
+    file that ``p4 -x`` reads in batches of :data:`ARGFILE_BATCH`, so any number of files is a single process.  If the
+    argument file can not be written, the method is called for chunks of files that fit on the command line.
 
-    :param func: Function to call for each chunk
+    The method is called with the whole list and runs its commands with the files at the end, eg ``cmd + files``.
+
+    :param func: Function to call with the files
     :type func: :py:class:Function
+    :param batch: Number of arguments each run of the command takes, eg 2 for the source and target of ``move``
+    :type batch: int
     """
-    @wraps(func)
-    def wrapper(self, files, silent=True, exclude_deleted=False):
-        if not isinstance(files, (tuple, list)):
-            files = [files]
+    if func is None:
+        return lambda func: split_files(func, batch)
 
-        counter = 0
-        index = 0
-        results = []
-
-        while files:
-            if index >= len(files):
-                results += func(self, files, silent, exclude_deleted)
-                break
+    @wraps(func)
+    def wrapper(self, files, *args, **kwargs):
+        if not isinstance(files, list):
+            files = list(files) if isinstance(files, tuple) else [files]
 
-            length = len(str(files[index]))
-            if length + counter > CHAR_LIMIT:
-                # -- at our limit
-                runfiles = files[:index]
-                files = files[index:]
-                counter = 0
-                index = 0
-                results += func(self, runfiles, silent, exclude_deleted)
-                runfiles = None
-                del runfiles
+        limit = argument_limit()
+        if len(files) > (batch or 1) and (batch or sum(len(str(f)) + 1 for f in files) > limit):
+            try:
+                argfile = _writeArgfile(files)
+            except (IOError, OSError) as err:
+                LOGGER.debug('Unable to write an argument file: {}'.format(err))
             else:
-                index += 1
-                counter += length
+                self._argfile.files = files
+                self._argfile.path = argfile
+                self._argfile.batch = batch or ARGFILE_BATCH
+                try:
+                    return func(self, files, *args, **kwargs)
+                finally:
+                    self._argfile.files = None
+                    os.remove(argfile)
+
+        if batch:
+            chunks = (files[i:i + batch] for i in range(0, len(files), batch))
+        else:
+            chunks = chunk_files(files, limit)
+
+        results = []
+        for chunk in chunks:
+            results += func(self, chunk, *args, **kwargs)
 
         return results
 
     return wrapper
 
 
+#: Kept for compatibility, :func:`split_files` works with any method taking files
+split_ls = split_files
+
+
+def argument_limit():
+    """The number of characters of file arguments that fit on the command line of the platform
+
+    :returns: int
+    """
+    if os.name == 'nt':
+        return CHAR_LIMIT
+
+    try:
+        limit = os.sysconf('SC_ARG_MAX')
+    except (AttributeError, ValueError, OSError):
+        return CHAR_LIMIT
+
+    # -- The environment shares the space, keep half of what is left for the command and the global arguments
+    limit -= sum(len(k) + len(v) + 2 for k, v in os.environ.items())
+
+    return max(CHAR_LIMIT, limit // 2)
+
+
+def _writeArgfile(files):
+    """Writes files to a temporary argument file for ``p4 -x``, one per line
+
+    :param files: Files to write
+    :type files: list
+    :returns: str, path to the file
+    """
+    fd, argfile = tempfile.mkstemp(prefix='p4args', suffix='.txt')
+    with os.fdopen(fd, 'wb') as fh:
+        for f in files:
+            fh.write(six.text_type(f).encode('utf-8') + b'\n')
+
+    return argfile
+
+
+def _depotFiles(revs):
+    """The depot paths of revisions, strings are kept as they are
+
+    :param revs: Revisions or file specs
+    :type revs: iterable
+    :returns: list<str>
+    """
+    return [six.text_type(rev.depotFile) if isinstance(rev, Revision) else six.text_type(rev) for rev in revs]
+
+
+def _splitCommand(cmd):
+    """Splits a command into the command with its flags and the trailing arguments
+
+    :param cmd: Command to split
+    :type cmd: list
+    :returns: tuple, list of the command and its flags and list of the arguments
+    """
+    index = 1
+    values = VALUE_FLAGS.get(cmd[0], DEFAULT_VALUE_FLAGS) if cmd else ()
+    while index < len(cmd) and str(cmd[index]).startswith('-'):
+        index += 2 if cmd[index] in values else 1
+
+    return cmd[:index], cmd[index:]
+
+
+def _flagNames(cmd):
+    """The flags of a command and its flags, without their values, eg ``-m`` for ``-m 1`` or ``-m1``"""
+    values = VALUE_FLAGS.get(cmd[0], DEFAULT_VALUE_FLAGS)
+    names = []
+    index = 1
+    while index < len(cmd):
+        names.append(str(cmd[index])[:2])
+        index += 2 if cmd[index] in values else 1
+
+    return names
+
+
 def camel_case(string):
     """Makes a string camelCase
 
@@ -113,11 +307,405 @@ def camel_case(string):
     return ''.join((string[0].lower(), string[1:]))
 
 
+def _startupinfo():
+    """Keeps a console window from showing on windows"""
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+    return startupinfo
+
+
+def _terminate(proc):
+    """Stops a process that may still be writing output and reaps it"""
+    for pipe in (proc.stdin, proc.stdout):
+        try:
+            pipe.close()
+        except (IOError, OSError):
+            pass
+
+    if proc.poll() is None:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+    proc.wait()
+
+
+def environment(executable='p4'):
+    """Parses the P4 variables reported by ``p4 set``
+
+    The result is cached for the process.  It is discarded when a P4 environment variable or the working directory
+    changes, or when the P4ENVIRO, P4TICKETS or P4CONFIG files are modified.  Settings stored in the windows registry
+    are not watched, see :func:`clear_environment_cache`.
+
+    :param executable: p4 executable to run
+    :type executable: str
+    :returns: dict, None if p4 set failed
+    """
+    cwd = os.getcwd()
+    key = (executable, cwd, tuple(sorted((k, v) for k, v in six.iteritems(os.environ) if k.upper().startswith('P4'))))
+
+    with _ENVIRONMENTS_LOCK:
+        cached = _ENVIRONMENTS.get(key)
+
+    if cached is not None:
+        stamp, p4vars = cached
+        if stamp == _environmentStamp(cwd, p4vars.get('P4CONFIG')):
+            return dict(p4vars)
+
+    try:
+        output = subprocess.check_output([executable, 'set'], startupinfo=_startupinfo())
+        if six.PY3:
+            output = str(output, 'utf8')
+    except subprocess.CalledProcessError as err:
+        LOGGER.error(err)
+        return None
+
+    p4vars = {}
+    for line in output.splitlines():
+        if not line:
+            continue
+        try:
+            k, v = line.split('=', 1)
+        except ValueError:
+            continue
+        p4vars[k.strip()] = v.strip().split(' (')[0]
+        if p4vars[k.strip()].startswith('(config'):
+            del p4vars[k.strip()]
+
+    with _ENVIRONMENTS_LOCK:
+        _ENVIRONMENTS[key] = (_environmentStamp(cwd, p4vars.get('P4CONFIG')), p4vars)
+        while len(_ENVIRONMENTS) > MAX_ENVIRONMENTS:
+            _ENVIRONMENTS.popitem(last=False)
+
+    return dict(p4vars)
+
+
+def clear_environment_cache():
+    """Forgets every cached ``p4 set`` result"""
+    with _ENVIRONMENTS_LOCK:
+        _ENVIRONMENTS.clear()
+
+
+def _environmentStamp(cwd, config=None):
+    """Modification times of the files p4 reads its settings from"""
+    home = os.path.expanduser('~')
+    if os.name == 'nt':
+        enviro = os.path.join(os.getenv('LOCALAPPDATA', home), 'Perforce', 'p4enviro')
+        tickets = os.path.join(os.getenv('USERPROFILE', home), 'p4tickets.txt')
+    else:
+        enviro = os.path.join(home, '.p4enviro')
+        tickets = os.path.join(home, '.p4tickets')
+
+    files = [os.getenv('P4ENVIRO', enviro), os.getenv('P4TICKETS', tickets)]
+
+    # -- P4CONFIG names a file that is searched for in every parent of the working directory
+    config = os.getenv('P4CONFIG', config)
+    if config:
+        directory = cwd
+        while True:
+            files.append(os.path.join(directory, config))
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+
+    stamp = []
+    for f in files:
+        try:
+            st = os.stat(f)
+            stamp.append((st.st_mtime, st.st_size))
+        except OSError:
+            stamp.append(None)
+
+    return tuple(stamp)
+
+
+def _decode(record):
+    """Wraps a marshalled record in a :class:`.Record` on python 3"""
+    if six.PY2:
+        return record
+
+    return Record(record)
+
+
+def _key(raw):
+    """Decodes a record key, every record shares the same str for a key"""
+    try:
+        return _KEYS[raw]
+    except KeyError:
+        key = six.moves.intern(raw if six.PY2 else str(raw, 'utf8'))
+        if len(_KEYS) < MAX_KEYS:
+            _KEYS[raw] = key
+            _RAW_KEYS[key] = raw
+
+        return key
+
+
+def _decodeValue(value):
+    """Decodes a record value, integers are returned as str like every other value"""
+    if isinstance(value, six.integer_types):
+        return str(value)
+    if six.PY2:
+        return value
+
+    return str(value, 'utf8', errors='ignore')
+
+
+def _isError(record):
+    """Whether a record is an error, the values of a :class:`.Record` are not decoded"""
+    raw = getattr(record, '_raw', None)
+    if raw is not None:
+        return raw.get(b'code') == b'error'
+
+    return record.get('code') == 'error'
+
+
+def _rawKey(key):
+    try:
+        return _RAW_KEYS[key]
+    except (KeyError, TypeError):
+        return key.encode('utf8') if isinstance(key, six.text_type) else key
+
+
+class Record(MutableMapping):
+    """A record from a p4 command that decodes its values as they are accessed
+
+    The raw bytes from the command are kept and a value is only decoded the first time it is read, integers are
+    returned as str like every other value.  Keys are decoded once and shared between all records.
+
+    Setting or deleting a value decodes the whole record.
+    """
+    __slots__ = ('_raw', '_values')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._values = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if self._raw is None:
+                raise
+
+        try:
+            value = self._raw[_rawKey(key)]
+        except KeyError:
+            raise KeyError(key)
+
+        value = _decodeValue(value)
+        self._values[key] = value
+
+        return value
+
+    def __setitem__(self, key, value):
+        self._decodeAll()
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        self._decodeAll()
+        del self._values[key]
+
+    def __contains__(self, key):
+        if key in self._values:
+            return True
+
+        return self._raw is not None and _rawKey(key) in self._raw
+
+    def __iter__(self):
+        if self._raw is None:
+            return iter(self._values)
+
+        return (_key(k) for k in self._raw)
+
+    def __len__(self):
+        if self._raw is None:
+            return len(self._values)
+
+        return len(self._raw)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __getstate__(self):
+        return dict(self)
+
+    def __setstate__(self, state):
+        self._raw = None
+        self._values = state
+
+    @property
+    def raw(self):
+        """The undecoded record, keys and values are bytes"""
+        if self._raw is None:
+            return {_rawKey(k): v.encode('utf8') for k, v in six.iteritems(self._values)}
+
+        return self._raw
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self):
+        """A decoded copy of the record"""
+        return dict(self)
+
+    def _decodeAll(self):
+        if self._raw is not None:
+            self._values = {k: self[k] for k in self}
+            self._raw = None
+
+
+class _CommandStats(object):
+    """Times a command and counts its records and bytes for a :class:`.CommandEvent`"""
+    __slots__ = ('name', 'command', 'start', 'spawn', 'first', 'records', 'bytes', 'level')
+
+    def __init__(self, cmd, command):
+        self.name = six.text_type(cmd[0])
+        self.command = command
+        self.start = _clock()
+        self.spawn = None
+        self.first = None
+        self.records = 0
+        self.bytes = 0
+        self.level = ErrorLevel.EMPTY
+
+    def spawned(self):
+        self.spawn = _clock() - self.start
+
+    def record(self, record):
+        if self.first is None:
+            self.first = _clock() - self.start
+            if self.spawn is None:
+                # -- A persistent worker was already running
+                self.spawn = 0.0
+        self.records += 1
+        self.bytes += sum(len(v) for v in six.itervalues(record) if isinstance(v, bytes))
+        if record.get(b'code') == b'error':
+            self.level = max(self.level, int(record.get(b'severity', 0)))
+
+    def output(self, data):
+        """Counts the output of a command run without marshalled records"""
+        self.bytes += len(data or b'')
+
+    def event(self):
+        return CommandEvent(self.name, self.command, self.spawn or 0.0, self.first, _clock() - self.start,
+                            self.records, self.bytes, self.level)
+
+
+class _Worker(object):
+    """A long lived ``p4 -x -`` process
+
+    p4 reads the arguments for a command from stdin and runs the command for every argument over the same server
+    connection.  The arguments are followed by a sentinel file that does not exist, the error for the sentinel marks
+    the end of the output for that command.
+
+    A worker runs one command at a time, the connection takes it out of its pool while a command is running.
+
+    :param args: Arguments to start the process with
+    :type args: list
+    :param key: Command and flags the worker runs, the key of the worker in the pool of the connection
+    :type key: tuple
+    """
+    def __init__(self, args, key=None):
+        self.key = key
+        self._proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            startupinfo=_startupinfo(),
+        )
+        self._count = 0
+        self._stderr = []
+
+        # -- Keep stderr from filling up and blocking the process
+        thread = threading.Thread(target=self._drain)
+        thread.daemon = True
+        thread.start()
+
+    def _drain(self):
+        for line in iter(self._proc.stderr.readline, b''):
+            self._stderr.append(line)
+
+    @property
+    def alive(self):
+        """Is the process still running"""
+        return self._proc.poll() is None
+
+    def iter_run(self, files, command=''):
+        """Runs the command for each file and yields the raw records as they are read
+
+        If the caller stops before the end of the output the process is killed, the connection will start a new one
+        the next time it is needed.
+
+        :param files: Arguments to feed to the worker
+        :type files: list
+        :param command: Full command, used in errors
+        :type command: str
+        :raises: :class:`.error.CommandError`
+        :returns: generator<dict>, raw records of results
+        """
+        self._count += 1
+        sentinel = WORKER_SENTINEL.format(self._count)
+        token = sentinel.encode('utf8')
+        finished = False
+        try:
+            lines = [six.text_type(f) for f in files] + [sentinel, u'']
+            self._proc.stdin.write(u'\n'.join(lines).encode('utf8'))
+            self._proc.stdin.flush()
+            while True:
+                record = marshal.load(self._proc.stdout)
+                if any(token in v for v in six.itervalues(record) if isinstance(v, bytes)):
+                    finished = True
+                    return
+                yield record
+        except (EOFError, IOError, OSError):
+            raise errors.CommandError(b''.join(self._stderr) or 'Worker exited unexpectedly', command)
+        finally:
+            if not finished:
+                self.close()
+
+    def close(self):
+        """Stops the process"""
+        _terminate(self._proc)
+
+
 class Connection(object):
-    """This is the connection to perforce and does all of the communication with the perforce server"""
-    def __init__(self, port=None, client=None, user=None, executable='p4', level=ErrorLevel.FAILED):
+    """This is the connection to perforce and does all of the communication with the perforce server
+
+    :param cache: :class:`.FstatCache` for the fstat results of this connection, True for one with the default settings
+    :type cache: :class:`.FstatCache`
+    :param index: SQLite file of a :class:`.HaveIndex` of the client kept up to date by this connection, True to keep
+        it in memory
+    :type index: str
+    :param identity: :class:`.IdentityMap` that makes this connection return the same revision or changelist object for
+        the same depot path or change number, True for one with the default settings
+    :type identity: :class:`.IdentityMap`
+    """
+    def __init__(self, port=None, client=None, user=None, executable='p4', level=ErrorLevel.FAILED,
+                 persistent=False, cache=None, index=None, identity=None):
         self._executable = executable
         self._level = level
+        self._persistent = persistent
+        if cache is True:
+            from perforce.cache import FstatCache
+            cache = FstatCache()
+        self._cache = cache
+        if identity is True:
+            from perforce.identity import IdentityMap
+            identity = IdentityMap()
+        self._identity = identity
+        self._workers = OrderedDict()
+        self._workersLock = threading.Lock()
+        self._argfile = threading.local()
+        self._observers = ()
 
         self._port = port
         self._client = client
@@ -132,35 +720,20 @@ and port')
         if self._user is None:
             raise errors.ConnectionError('No user could be found, please set P4USER or provide the user')
 
+        self._index = None
+        if index:
+            from perforce.index import HaveIndex
+            self._index = HaveIndex(self, ':memory:' if index is True else index)
+
     def __repr__(self):
         return '<Connection: {0}, {1}, {2}>'.format(self._port, str(self._client), self._user)
 
     def __getVariables(self):
         """Parses the P4 env vars using 'set p4'"""
-        try:
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            output = subprocess.check_output(['p4', 'set'], startupinfo=startupinfo)
-            if six.PY3:
-                output = str(output, 'utf8')
-        except subprocess.CalledProcessError as err:
-            LOGGER.error(err)
+        p4vars = environment(self._executable)
+        if p4vars is None:
             return
 
-        p4vars = {}
-        for line in output.splitlines():
-            if not line:
-                continue
-            try:
-                k, v = line.split('=', 1)
-            except ValueError:
-                continue
-            p4vars[k.strip()] = v.strip().split(' (')[0]
-            if p4vars[k.strip()].startswith('(config'):
-                del p4vars[k.strip()]
-
         self._port = self._port or os.getenv('P4PORT', p4vars.get('P4PORT'))
         self._user = self._user or os.getenv('P4USER', p4vars.get('P4USER'))
         self._client = self._client or os.getenv('P4CLIENT', p4vars.get('P4CLIENT'))
@@ -197,6 +770,21 @@ and port')
         """Set the current exception level"""
         self._level = value
 
+    @property
+    def cache(self):
+        """The :class:`.FstatCache` of this connection, None if fstat results are not cached"""
+        return self._cache
+
+    @property
+    def index(self):
+        """The :class:`.HaveIndex` of the client of this connection, None if it is not indexed"""
+        return self._index
+
+    @property
+    def identity(self):
+        """The :class:`.IdentityMap` of this connection, None if objects are not shared"""
+        return self._identity
+
     @property
     def status(self):
         """The status of the connection to perforce"""
@@ -228,66 +816,270 @@ and port')
         :raises: :class:`.error.CommandError`
         :returns: list, records of results
         """
-        records = []
-        args = [self._executable, "-u", self._user, "-p", self._port]
-
-        if self._client:
-            args += ["-c", str(self._client)]
-
         if marshal_output:
-            args.append('-G')
+            return list(self.iter_run(cmd, stdin, **kwargs))
 
         if isinstance(cmd, six.string_types):
             raise ValueError('String commands are not supported, please use a list')
 
-        args += cmd
-
+        args = self._command(cmd, marshal_output)
         command = ' '.join(args)
-
-        startupinfo = None
-        if os.name == 'nt':
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        stats = _CommandStats(cmd, command) if self._observers else None
 
         proc = subprocess.Popen(
             args,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            startupinfo=startupinfo,
+            startupinfo=_startupinfo(),
             **kwargs
         )
+        if stats is not None:
+            stats.spawned()
 
         if stdin:
             proc.stdin.write(six.b(stdin))
 
-        if marshal_output:
+        records, stderr = proc.communicate()
+
+        if self._cache is not None:
+            self._cache.changed(cmd)
+
+        if self._index is not None:
+            self._index.changed(cmd)
+
+        if stats is not None:
+            stats.output(records)
+            if stderr:
+                stats.level = ErrorLevel.FAILED
+            self._notify(stats.event())
+
+        if stderr:
+            raise errors.CommandError(stderr, command)
+
+        return records
+
+    def iter_run(self, cmd, stdin=None, **kwargs):
+        """Runs a p4 command and yields dictionary objects as they are read from the process
+
+        Only one record is held in memory at a time.  If the caller stops iterating before the end of the output, the
+        process is killed.
+
+        :param cmd: Command to run
+        :type cmd: list
+        :param stdin: Standard Input to send to the process
+        :type stdin: str
+        :param kwargs: Passes any other keyword arguments to subprocess
+        :raises: :class:`.error.CommandError`
+        :returns: generator<dict>, records of results
+        """
+        if isinstance(cmd, six.string_types):
+            raise ValueError('String commands are not supported, please use a list')
+
+        records = self._iterRun(cmd, stdin, **kwargs)
+        if self._index is not None:
+            records = self._index.iter_run(cmd, records)
+
+        if self._cache is not None:
+            records = self._cache.iter_run(self, cmd, records)
+
+        return records
+
+    def _iterRun(self, cmd, stdin=None, **kwargs):
+        """Runs a p4 command and yields its records, see :meth:`iter_run`"""
+        args = self._command(cmd)
+        command = ' '.join(args)
+        # -- Commands are only timed while someone is listening
+        stats = _CommandStats(cmd, command) if self._observers else None
+
+        try:
+            if self._persistent and stdin is None and not kwargs:
+                worker, files = self._worker(cmd)
+                if worker is not None:
+                    error = None
+                    try:
+                        for record in worker.iter_run(files, command):
+                            if stats is not None:
+                                stats.record(record)
+                            # -- Read the rest of the output after an error so the worker can be used again
+                            if error is not None:
+                                continue
+                            if record.get(b'code', '') == b'error' and record[b'severity'] >= self._level:
+                                error = errors.CommandError(record[b'data'], record, command)
+                                continue
+                            yield _decode(record)
+                    finally:
+                        self._releaseWorker(worker)
+
+                    if error is not None:
+                        raise error
+
+                    return
+
+            proc = subprocess.Popen(
+                args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                startupinfo=_startupinfo(),
+                **kwargs
+            )
+            if stats is not None:
+                stats.spawned()
+
             try:
+                if stdin:
+                    proc.stdin.write(six.b(stdin))
+                proc.stdin.close()
+
                 while True:
-                    record = marshal.load(proc.stdout)
+                    try:
+                        record = marshal.load(proc.stdout)
+                    except EOFError:
+                        break
+                    if stats is not None:
+                        stats.record(record)
                     if record.get(b'code', '') == b'error' and record[b'severity'] >= self._level:
-                        proc.stdin.close()
-                        proc.stdout.close()
                         raise errors.CommandError(record[b'data'], record, command)
                     if isinstance(record, dict):
-                        if six.PY2:
-                            records.append(record)
-                        else:
-                            records.append({str(k, 'utf8'): str(v) if isinstance(v, int) else str(v, 'utf8', errors='ignore') for k, v in record.items()})
-            except EOFError:
-                pass
-
-            stdout, stderr = proc.communicate()
-        else:
-            records, stderr = proc.communicate()
+                        yield _decode(record)
 
-        if stderr:
-            raise errors.CommandError(stderr, command)
+                stderr = proc.stderr.read()
+            finally:
+                _terminate(proc)
+                proc.stderr.close()
 
-        return records
+            if stderr:
+                if stats is not None:
+                    stats.level = max(stats.level, ErrorLevel.FAILED)
+                raise errors.CommandError(stderr, command)
+        finally:
+            if stats is not None:
+                self._notify(stats.event())
+
+    def add_observer(self, observer):
+        """Calls observer with a :class:`.CommandEvent` after every command this connection runs
+
+        Commands are only timed while an observer is attached.  Observers are called from the thread that ran the
+        command, see :class:`.metrics.MetricsCollector` for one that aggregates the events.
+
+        :param observer: Callable taking a :class:`.CommandEvent`
+        :type observer: callable
+        """
+        self._observers = self._observers + (observer,)
+
+    def remove_observer(self, observer):
+        """Stops calling an observer added with :meth:`add_observer`
+
+        :param observer: Observer to remove
+        :type observer: callable
+        """
+        self._observers = tuple(o for o in self._observers if o != observer)
+
+    def _notify(self, event):
+        for observer in self._observers:
+            try:
+                observer(event)
+            except Exception:
+                # -- A broken observer must not break the command
+                LOGGER.exception('Observer {} failed'.format(observer))
+
+    def close(self):
+        """Stops any persistent workers started by this connection"""
+        with self._workersLock:
+            while self._workers:
+                self._workers.popitem()[1].close()
+
+    def _args(self, marshal_output=True):
+        """The global arguments passed to every p4 command"""
+        args = [self._executable, "-u", self._user, "-p", self._port]
+
+        if self._client:
+            args += ["-c", str(self._client)]
+
+        if marshal_output:
+            args.append('-G')
 
-    @split_ls
-    def ls(self, files, silent=True, exclude_deleted=False):
+        return args
+
+    def _command(self, cmd, marshal_output=True):
+        """The arguments to run a command with
+
+        Inside a method decorated with :func:`split_files`, the files at the end of the command are read from the
+        argument file instead of the command line.
+
+        :param cmd: Command to run
+        :type cmd: list
+        :returns: list
+        """
+        files = getattr(self._argfile, 'files', None)
+        if files and cmd[-len(files):] == files:
+            return self._args(marshal_output) + ['-x', self._argfile.path, '-b', str(self._argfile.batch)] + \
+                cmd[:-len(files)]
+
+        return self._args(marshal_output) + cmd
+
+    def _worker(self, cmd):
+        """Takes the persistent worker for a command out of the pool, or starts one
+
+        The file arguments of the command are fed to a ``p4 -x -`` process started with the command and its flags, so
+        only commands ending in file arguments can be run this way.  A worker is out of the pool until
+        :meth:`_releaseWorker`, so a command run while another one with the same flags is still being read gets a
+        worker of its own.
+
+        :param cmd: Command to run
+        :type cmd: list
+        :returns: tuple, :class:`._Worker` and the files to feed it or None if the command can not be run by a worker
+        """
+        if cmd[0] not in WORKER_COMMANDS:
+            return None, None
+
+        prefix, files = _splitCommand(cmd)
+        key = tuple(str(arg) for arg in prefix)
+        if not files or any(str(f).startswith('-') for f in files):
+            return None, None
+
+        # -- A worker runs the command once per file, so a flag such as -m would apply to every file
+        if any(name in WHOLE_FLAGS for name in _flagNames(prefix)):
+            return None, None
+
+        # -- The files are written before any output is read, keep them within the pipe buffer
+        if sum(len(str(f)) + 1 for f in files) > WORKER_INPUT_LIMIT:
+            return None, None
+
+        with self._workersLock:
+            worker = self._workers.pop(key, None)
+
+        if worker is not None and not worker.alive:
+            worker.close()
+            worker = None
+        if worker is None:
+            worker = _Worker(self._args() + ['-x', '-', '-b', '1'] + list(key), key)
+
+        return worker, files
+
+    def _releaseWorker(self, worker):
+        """Puts a worker back in the pool once its command is over, a stopped worker or a second one for the same
+        command is closed
+        """
+        if not worker.alive:
+            worker.close()
+            return
+
+        closed = []
+        with self._workersLock:
+            if worker.key in self._workers:
+                closed.append(worker)
+            else:
+                self._workers[worker.key] = worker
+                while len(self._workers) > MAX_WORKERS:
+                    closed.append(self._workers.popitem(last=False)[1])
+
+        for extra in closed:
+            extra.close()
+
+    @split_files
+    def ls(self, files, silent=True, exclude_deleted=False, compact=False):
         """List files
 
         :param files: Perforce file spec
@@ -296,9 +1088,12 @@ and port')
         :type silent: bool
         :param exclude_deleted: Exclude deleted files from the query
         :type exclude_deleted: bool
+        :param compact: Return :class:`.CompactRevision` objects
+        :type compact: bool
         :raises: :class:`.errors.RevisionError`
         :returns: list<:class:`.Revision`>
         """
+        cls = CompactRevision if compact else Revision
         try:
             cmd = ['fstat']
             if exclude_deleted:
@@ -306,6 +1101,10 @@ and port')
 
             cmd += files
 
+            if compact:
+                # -- Compact each record as it is read rather than holding or decoding every full record first
+                return [self._revision(r, cls) for r in self.iter_run(cmd) if not _isError(r)]
+
             results = self.run(cmd)
         except errors.CommandError as err:
             if silent:
@@ -315,7 +1114,119 @@ and port')
             else:
                 raise
 
-        return [Revision(r, self) for r in results if r.get('code') != 'error']
+        return [self._revision(r, cls) for r in results if r.get('code') != 'error']
+
+    def iter_ls(self, files, silent=True, exclude_deleted=False, compact=False):
+        """List files as they are read from the server
+
+        Unlike :meth:`ls`, files can be any iterable and only one chunk of it is held in memory at a time
+
+        :param files: Perforce file spec
+        :type files: iterable
+        :param silent: Will not raise error for invalid files or files not under the client
+        :type silent: bool
+        :param exclude_deleted: Exclude deleted files from the query
+        :type exclude_deleted: bool
+        :param compact: Return :class:`.CompactRevision` objects
+        :type compact: bool
+        :raises: :class:`.errors.RevisionError`
+        :returns: generator<:class:`.Revision`>
+        """
+        if isinstance(files, six.string_types):
+            files = [files]
+
+        cls = CompactRevision if compact else Revision
+        for chunk in chunk_files(files, argument_limit()):
+            cmd = ['fstat']
+            if exclude_deleted:
+                cmd += ['-F', '^headAction=delete ^headAction=move/delete']
+
+            cmd += chunk
+
+            try:
+                for r in self.iter_run(cmd):
+                    if not (_isError(r) if compact else r.get('code') == 'error'):
+                        yield self._revision(r, cls)
+            except errors.CommandError as err:
+                if silent:
+                    continue
+                elif "is not under client's root" in str(err):
+                    raise errors.RevisionError(err.args[0])
+                else:
+                    raise
+
+    def prefetch(self, revs, fields=PREFETCH_FIELDS):
+        """Reads fields of many revisions with one ``fstat`` instead of one per revision
+
+        Properties such as :attr:`.Revision.hash` and ``len()`` run an ``fstat -Ol`` for their revision when the field
+        is missing, prefetching them first makes reading them for a whole collection free.  Only the requested fields
+        are read with ``-T`` and merged into each revision, revisions that already have every field are left out.
+
+            >>> revs = c.ls('//depot/project/...')
+            >>> c.prefetch(revs)
+            >>> total = sum(len(rev) for rev in revs)
+
+        :param revs: Revisions to fill
+        :type revs: list<:class:`.Revision`>
+        :param fields: fstat fields to read, digest and fileSize need ``-Ol`` which is added for them
+        :type fields: tuple
+        :returns: list<:class:`.Revision`>, the revisions
+        """
+        revs = self._revisions(revs)
+        fields = [six.text_type(f) for f in fields]
+        missing = OrderedDict()
+        for rev in revs:
+            if not all(f in rev._p4dict for f in fields):
+                missing.setdefault(_depotKey(rev), []).append(rev)
+
+        if not missing:
+            return revs
+
+        cmd = ['fstat']
+        if any(f in LONG_FIELDS for f in fields):
+            cmd.append('-Ol')
+        cmd += ['-T', ','.join(['depotFile'] + [f for f in fields if f != 'depotFile'])]
+
+        def merge(record):
+            if record.get('code') == 'error':
+                return
+
+            for rev in missing.get(six.text_type(record.get('depotFile')), ()):
+                for field in fields:
+                    if field in record and field not in rev._p4dict:
+                        rev._p4dict[field] = record[field]
+
+        self._runInto(list(missing), cmd, merge)
+
+        return revs
+
+    def fstat_table(self, files, fields=None, exclude_deleted=False):
+        """Reads the fstat fields of files into a :class:`.FstatTable` of typed and dictionary encoded columns
+
+        Records are added to the columns as they are read, no :class:`.Revision` is created.
+
+        :param files: Perforce file spec
+        :type files: list
+        :param fields: fstat fields to keep, defaults to :data:`perforce.table.DEFAULT_FIELDS`
+        :type fields: list
+        :param exclude_deleted: Exclude deleted files from the query
+        :type exclude_deleted: bool
+        :returns: :class:`.FstatTable`
+        """
+        from perforce.table import TableBuilder, DEFAULT_FIELDS
+
+        fields = tuple(fields or DEFAULT_FIELDS)
+        cmd = ['fstat', '-T', ','.join(fields)]
+        if 'fileSize' in fields or 'digest' in fields:
+            cmd.append('-Ol')
+
+        if exclude_deleted:
+            cmd += ['-F', '^headAction=delete ^headAction=move/delete']
+
+        builder = TableBuilder(fields)
+        self._runInto(files, cmd, builder.append)
+
+        return builder.table()
 
     def findChangelist(self, description=None):
         """Gets or creates a Changelist object with a description
@@ -325,25 +1236,104 @@ and port')
         :returns: :class:`.Changelist`
         """
         if description is None:
-            change = Default(self)
+            change = self._changelist(0)
         else:
             if isinstance(description, six.integer_types):
-                change = Changelist(description, self)
+                change = self._changelist(description)
             else:
-                pending = self.run(['changes', '-l', '-s', 'pending', '-c', str(self._client), '-u', self._user])
+                # -- Pending changes of a client are few and those without files are only listed by a single page
+                pending = self.changes(None, self._user, self._client, 'pending', page=0, descriptions=True)
                 for cl in pending:
-                    if cl['desc'].strip() == description.strip():
-                        LOGGER.debug('Changelist found: {}'.format(cl['change']))
-                        change = Changelist(int(cl['change']), self)
+                    if cl.description == description.strip():
+                        LOGGER.debug('Changelist found: {}'.format(cl.change))
+                        change = cl
+                        pending.close()
                         break
                 else:
                     LOGGER.debug('No changelist found, creating one')
                     change = Changelist.create(description, self)
                     change.client = self._client
                     change.save()
+                    if self._identity is not None:
+                        self._identity.add(('change', change.change), change)
 
         return change
 
+    def changes(self, files='//...', user=None, client=None, status=None, cursor=None, low=None, page=PAGE_SIZE,
+                descriptions=False):
+        """Yields changelists newest first, reading them from the server one page at a time
+
+        Each page is a ``changes -m page`` of the changes older than the last one yielded, so any number of changes is
+        walked with bounded memory and bounded work for the server.  To resume a walk, pass the change number of the
+        last changelist seen as cursor.
+
+        p4 can only limit a change range through a file spec, so with files set to None the first page is read without
+        one and the following pages are read for ``//...@<cursor>``.  Pending changes without files are only yielded on
+        a page read without a file spec, pass a page of 0 to read every change in a single command instead.
+
+        :param files: Perforce file spec, only changes to these files are yielded, None for every change
+        :type files: str|list
+        :param user: Only yield changes of this user
+        :type user: str
+        :param client: Only yield changes of this client
+        :type client: str
+        :param status: Only yield changes with this status, one of ``pending``, ``shelved`` or ``submitted``
+        :type status: str
+        :param cursor: Only yield changes older than this change number
+        :type cursor: int
+        :param low: Only yield changes at or newer than this change number
+        :type low: int
+        :param page: Number of changes read at a time, 0 to read them all at once
+        :type page: int
+        :param descriptions: Read full descriptions with each page, otherwise p4 truncates them and a changelist reads
+            its full description the first time it is used
+        :type descriptions: bool
+        :returns: generator<:class:`.Changelist`>
+        """
+        if files is None:
+            files = []
+        elif not isinstance(files, (tuple, list)):
+            files = [files]
+
+        cmd = ['changes', '-m', str(page)] if page else ['changes']
+        if descriptions:
+            cmd.append('-l')
+
+        if user:
+            cmd += ['-u', str(user)]
+
+        if client:
+            cmd += ['-c', str(client)]
+
+        if status:
+            cmd += ['-s', status]
+
+        paths = [six.text_type(f).split('@')[0] for f in files] or ['//...']
+        while True:
+            if cursor is not None:
+                if int(cursor) <= max(low or 1, 1):
+                    break
+
+                # -- Change ranges are inclusive, so the page ends just before the cursor
+                revision = '@{}'.format(int(cursor) - 1)
+                if low is not None:
+                    revision = '@{},{}'.format(int(low), revision)
+            elif low is not None:
+                revision = '@{},@now'.format(int(low))
+            else:
+                revision = None
+
+            specs = [p + revision for p in paths] if revision else list(files)
+
+            # -- A page is read in full so the caller can run commands before the next one
+            records = [r for r in self.run(cmd + specs) if 'change' in r]
+            for record in records:
+                cursor = int(record['change'])
+                yield self._changelist(cursor, record, descriptions)
+
+            if not page or len(records) < page:
+                break
+
     def add(self, filename, change=None):
         """Adds a new file to a changelist
 
@@ -367,7 +1357,7 @@ and port')
             LOGGER.debug(err)
             raise errors.RevisionError('File is not under client path')
 
-        rev = Revision(data, self)
+        rev = self._revision(data)
 
         if isinstance(change, Changelist):
             change.append(rev)
@@ -386,12 +1376,486 @@ and port')
             LOGGER.debug(err)
             return False
 
-        if result.get('code') not in ('error', 'info'):
-            return True
+        if result.get('code') not in ('error', 'info'):
+            return True
+
+        LOGGER.warn('Unable to add {}: {}'.format(filename, result['data']))
+
+        return False
+
+    def edit(self, revs, changelist=0):
+        """Checks out files, files already open for add or edit are reopened
+
+        :param revs: Revisions or depot paths to check out
+        :type revs: list
+        :param changelist: Optional changelist to checkout the files into
+        :type changelist: :class:`.Changelist`
+        :returns: list<:class:`.Revision`>, the revisions refreshed in place
+        """
+        revs = self._revisions(revs)
+        opened = set(id(rev) for rev in revs if isinstance(rev, Revision) and rev.action in ('add', 'edit'))
+        flags = ['-c', str(int(changelist))] if int(changelist) else []
+
+        self._runFiles(_depotFiles(rev for rev in revs if id(rev) not in opened), ['edit'] + flags)
+        self._runFiles(_depotFiles(rev for rev in revs if id(rev) in opened), ['reopen'] + flags)
+
+        return self._refresh(revs)
+
+    def lock(self, revs, lock=True, changelist=0):
+        """Locks or unlocks files
+
+        :param revs: Revisions or depot paths to lock
+        :type revs: list
+        :param lock: Lock or unlock the files
+        :type lock: bool
+        :param changelist: Optional changelist the files are in
+        :type changelist: :class:`.Changelist`
+        :returns: list<:class:`.Revision`>, the revisions refreshed in place
+        """
+        revs = self._revisions(revs)
+        cmd = ['lock' if lock else 'unlock']
+        if int(changelist):
+            cmd += ['-c', str(int(changelist))]
+
+        self._runFiles(_depotFiles(revs), cmd)
+
+        return self._refresh(revs)
+
+    def sync(self, revs, force=False, safe=True, revision=0, changelist=0):
+        """Syncs files
+
+        :param revs: Revisions or depot paths to sync
+        :type revs: list
+        :param force: Force the files to sync
+        :type force: bool
+        :param safe: Don't sync files that were changed outside perforce
+        :type safe: bool
+        :param revision: Sync every file to a specific revision
+        :type revision: int
+        :param changelist: Changelist to sync to
+        :type changelist: int
+        :returns: list<:class:`.Revision`>, the revisions refreshed in place
+        """
+        revs = self._revisions(revs)
+        cmd = ['sync']
+        if force:
+            cmd.append('-f')
+
+        if safe:
+            cmd.append('-s')
+
+        files = _depotFiles(revs)
+        if revision:
+            files = ['{}#{}'.format(f, revision) for f in files]
+        elif changelist:
+            files = ['{}@{}'.format(f, int(changelist)) for f in files]
+
+        self._runFiles(files, cmd)
+
+        return self._refresh(revs)
+
+    def sync_parallel(self, paths, workers=4, force=False, progress=None, native=False):
+        """Syncs files on several p4 processes at once, each syncing about the same number of bytes
+
+        ``sync -n`` lists the revisions to sync and ``sizes`` their sizes, the revisions are then split into a shard per
+        worker by size, largest first, so one shard of large binaries does not finish long after the others.
+
+        :param paths: Perforce file specs to sync
+        :type paths: list
+        :param workers: Number of shards synced at once
+        :type workers: int
+        :param force: Force the files to sync
+        :type force: bool
+        :param progress: Called with a :class:`.SyncProgress` after every synced file, from the worker threads
+        :type progress: callable
+        :param native: Let the server sync with ``--parallel=threads=workers`` in a single command instead, it needs a
+            2014.1 or newer server with ``net.parallel.max`` set
+        :type native: bool
+        :returns: list, records of the synced files
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if isinstance(paths, six.string_types):
+            paths = [paths]
+
+        flags = ['-f'] if force else []
+
+        # -- Plan the sync and weigh every revision, removed files weigh nothing
+        planned = []
+        removed = set()
+        sizes = {}
+
+        def plan(record):
+            if record.get('code') == 'stat':
+                spec = '{}#{}'.format(record['depotFile'], record['rev'])
+                planned.append(spec)
+                if record.get('action') == 'deleted':
+                    removed.add(spec)
+
+        def weigh(record):
+            if record.get('code') == 'stat':
+                sizes['{}#{}'.format(record['depotFile'], record['rev'])] = int(record.get('fileSize') or 0)
+
+        self._runInto(list(paths), ['sync', '-n'] + flags, plan)
+        self._runInto([f for f in planned if f not in removed], ['sizes'], weigh)
+
+        totalBytes = sum(sizes.values())
+        state = {'files': 0, 'bytes': 0}
+        lock = threading.Lock()
+        start = _clock()
+        records = []
+
+        def synced(record):
+            if record.get('code') != 'stat':
+                return
+
+            with lock:
+                records.append(record)
+                state['files'] += 1
+                spec = '{}#{}'.format(record.get('depotFile'), record.get('rev'))
+                state['bytes'] += int(record.get('fileSize') or sizes.get(spec, 0))
+                elapsed = max(_clock() - start, 1e-6)
+                event = SyncProgress(state['files'], len(planned), state['bytes'], totalBytes, elapsed,
+                                     state['files'] / elapsed, state['bytes'] / elapsed, record)
+            if progress is not None:
+                progress(event)
+
+        if native:
+            self._runInto(list(paths), ['sync', '--parallel=threads={}'.format(int(workers))] + flags, synced)
+            return records
+
+        shards = _shards(planned, sizes, workers)
+        with ThreadPoolExecutor(max(len(shards), 1)) as pool:
+            futures = [pool.submit(self._runInto, shard, ['sync'] + flags, synced) for shard in shards if shard]
+            for future in futures:
+                future.result()
+
+        return records
+
+    def iter_print(self, paths):
+        """Streams the content of files as it is read from ``p4 print``
+
+        Content is never decoded, so binary files are kept intact, and only one chunk of a file is held in memory at a
+        time.  Like :func:`itertools.groupby`, the chunks of a file must be read before moving on to the next file.
+
+            >>> for record, chunks in c.iter_print('//depot/project/...'):
+            ...     size = sum(len(chunk) for chunk in chunks)
+
+        :param paths: Perforce file specs to print
+        :type paths: list
+        :returns: generator<tuple>, the ``print`` record of a file with its depotFile, rev and type and a generator of
+            its content as chunks of bytes
+        """
+        if isinstance(paths, six.string_types):
+            paths = [paths]
+
+        for chunk in chunk_files(paths, argument_limit()):
+            records = self.iter_run(['print'] + chunk)
+            for _, group in itertools.groupby(_printChunks(records), lambda item: item[0]):
+                record = next(group)[1]
+                yield record, (data for _, _, data in group if data)
+
+    def print_to(self, paths, dest_dir, workers=1, buffer=PRINT_BUFFER):
+        """Exports the content of files to a directory, a depot path such as ``//depot/dir/file.txt`` is written to
+        ``dest_dir/depot/dir/file.txt``
+
+        Files are streamed to disk with :meth:`iter_print`.  With several workers, ``sizes`` weighs every file first and
+        the files are split into a shard per worker by size, like :meth:`sync_parallel`.
+
+        :param paths: Perforce file specs to export
+        :type paths: list
+        :param dest_dir: Directory to write the files to
+        :type dest_dir: str
+        :param workers: Number of p4 processes printing at once
+        :type workers: int
+        :param buffer: Size of the write buffer of every file
+        :type buffer: int
+        :returns: list, paths of the written files
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if isinstance(paths, six.string_types):
+            paths = [paths]
+
+        def export(shard):
+            written = []
+            for record, chunks in self.iter_print(shard):
+                filename = os.path.join(dest_dir, *record['depotFile'].lstrip('/').split('/'))
+                dirname = os.path.dirname(filename)
+                if not os.path.isdir(dirname):
+                    try:
+                        os.makedirs(dirname)
+                    except OSError:
+                        # -- Another worker may have created it
+                        if not os.path.isdir(dirname):
+                            raise
+
+                with io.open(filename, 'wb', buffering=buffer) as fh:
+                    for data in chunks:
+                        fh.write(data)
+                written.append(filename)
+
+            return written
+
+        if workers <= 1:
+            return export(list(paths))
+
+        sizes = {}
+
+        def weigh(record):
+            # -- Deleted revisions have no size and print nothing
+            if record.get('code') == 'stat' and 'fileSize' in record:
+                sizes['{}#{}'.format(record['depotFile'], record['rev'])] = int(record['fileSize'])
+
+        self._runInto(list(paths), ['sizes'], weigh)
+
+        shards = _shards(list(sizes), sizes, workers)
+        with ThreadPoolExecutor(max(len(shards), 1)) as pool:
+            futures = [pool.submit(export, shard) for shard in shards if shard]
+
+            return [filename for future in futures for filename in future.result()]
+
+    def verify_local(self, revs, workers=SCAN_WORKERS):
+        """Compares synced files to the digest of their have revision, without the server reading them like
+        ``diff -se`` or ``verify`` do
+
+        The digests are read with ``fstat -Ol`` a chunk of files at a time while the local files are hashed on a pool
+        of threads, a window of each file at a time so any size is hashed in constant memory.  Keyword and unicode
+        files are converted when they are synced, so only they are compared by the server with ``diff -se``, the local
+        digest of a mismatch is still the md5 of the file.  Files that are open, not synced or symlinks are left out.
+
+        :param revs: Revisions or depot paths to verify, paths without a revision are compared to ``#have``
+        :type revs: list
+        :param workers: Number of threads hashing files
+        :type workers: int
+        :returns: generator<:class:`.Mismatch`>, in the order of the files, localDigest is None if the file is missing
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if isinstance(revs, (six.string_types, Revision)):
+            revs = [revs]
+
+        specs = []
+        for rev in revs:
+            path = six.text_type(rev.depotFile if isinstance(rev, Revision) else rev)
+            specs.append(path if '#' in path or '@' in path else path + '#have')
+
+        crlf = self.client._crlf() if self._client else False
+        pending = deque()
+        with ThreadPoolExecutor(workers) as pool:
+            for chunk in chunk_files(specs, argument_limit()):
+                cmd = ['fstat', '-Ol', '-T', 'depotFile,clientFile,headType,digest,action'] + chunk
+                records = [r for r in self.iter_run(cmd) if not (
+                    r.get('code') == 'error' or 'digest' not in r or 'clientFile' not in r or r.get('action') or
+                    'symlink' in r.get('headType', '')
+                )]
+                # -- Keyword and unicode files are converted when they are synced, the server compares them
+                converted = [r['depotFile'] for r in records if not _hashable(r.get('headType', 'text'))]
+                edited = _diffEdited(self, converted)
+
+                for record in records:
+                    text = crlf and 'text' in record.get('headType', 'text')
+                    if _hashable(record.get('headType', 'text')):
+                        future = pool.submit(_md5, record['clientFile'], text)
+                    else:
+                        future = pool.submit(_convertedDigest, record, edited, text)
+                    pending.append((record, future))
+
+                    # -- Keep a few files per thread in flight so any number of files is verified in constant memory
+                    while len(pending) > workers * 4:
+                        mismatch = _mismatch(*pending.popleft())
+                        if mismatch is not None:
+                            yield mismatch
+
+            while pending:
+                mismatch = _mismatch(*pending.popleft())
+                if mismatch is not None:
+                    yield mismatch
+
+    def revert(self, revs, unchanged=False):
+        """Reverts any file changes
+
+        Reverted files are removed from the :class:`.Changelist` objects they were appended to, files that were open
+        for add are not refreshed.
+
+        :param revs: Revisions or depot paths to revert
+        :type revs: list
+        :param unchanged: Only revert the files that are unchanged
+        :type unchanged: bool
+        :returns: list<:class:`.Revision`>, the revisions refreshed in place
+        """
+        revs = self._revisions(revs)
+        cmd = ['revert']
+        if unchanged:
+            cmd.append('-a')
+
+        added = set(id(rev) for rev in revs if isinstance(rev, Revision) and rev.action == 'add')
+
+        self._runFiles(_depotFiles(revs), cmd)
+
+        for rev in revs:
+            if isinstance(rev, Revision) and 'movedFile' in rev._p4dict:
+                rev._p4dict['depotFile'] = rev._p4dict['movedFile']
+
+        revs = self._refresh([rev for rev in revs if id(rev) not in added]) + \
+            [rev for rev in revs if id(rev) in added]
+
+        for rev in revs:
+            if rev._changelist:
+                rev._changelist.remove(rev, permanent=True)
+
+        return revs
+
+    def delete(self, revs, changelist=0):
+        """Marks files for delete
+
+        :param revs: Revisions or depot paths to delete
+        :type revs: list
+        :param changelist: Changelist to add the files to
+        :type changelist: :class:`.Changelist`
+        :returns: list<:class:`.Revision`>, the revisions refreshed in place
+        """
+        revs = self._revisions(revs)
+        cmd = ['delete']
+        if int(changelist):
+            cmd += ['-c', str(int(changelist))]
+
+        self._runFiles(_depotFiles(revs), cmd)
+
+        return self._refresh(revs)
+
+    def move(self, revs, dests, changelist=0, force=False):
+        """Renames/moves files, files that are not open for edit are checked out first
+
+        :param revs: Revisions or depot paths to move
+        :type revs: list
+        :param dests: Destination of each file
+        :type dests: list
+        :param changelist: Changelist to add the moves to
+        :type changelist: :class:`.Changelist`
+        :param force: Force the moves to existing files
+        :type force: bool
+        :returns: list<:class:`.Revision`>, the revisions refreshed in place
+        """
+        revs = self._revisions(revs)
+        dests = [six.text_type(dest) for dest in dests]
+        if len(dests) != len(revs):
+            raise ValueError('A destination is needed for every file')
+
+        flags = ['-c', str(int(changelist))] if int(changelist) else []
+        cmd = ['move'] + flags
+        if force:
+            cmd.append('-f')
+
+        self._runFiles(_depotFiles(r for r in revs if not (isinstance(r, Revision) and r.isEdit)), ['edit'] + flags)
+        self._runPairs([f for pair in zip(_depotFiles(revs), dests) for f in pair], cmd)
+
+        for index, rev in enumerate(revs):
+            if isinstance(rev, Revision):
+                rev._p4dict['depotFile'] = dests[index]
+            else:
+                revs[index] = dests[index]
+
+        return self._refresh(revs)
+
+    def _revisions(self, revs):
+        """Makes a list of revisions or file specs"""
+        if isinstance(revs, (Revision, six.string_types)):
+            return [revs]
+
+        return list(revs)
+
+    def _revision(self, data, cls=None, merge=False):
+        """The revision of an fstat record, the known one for its depot path updated in place when objects are shared
+
+        :param data: fstat record
+        :type data: dict
+        :param cls: :class:`.Revision` or :class:`.CompactRevision`
+        :type cls: type
+        :param merge: Whether data is an ``opened`` record, its fields are added to a known revision
+        :type merge: bool
+        :returns: :class:`.Revision`
+        """
+        cls = cls or Revision
+        if self._identity is None:
+            return cls(data, self)
+
+        return self._identity.revision(data, self, cls, merge)
+
+    def _changelist(self, change, record=None, descriptions=True):
+        """The changelist of a change number, the known one when objects are shared
+
+        :param change: Change number, 0 for the default changelist
+        :type change: int
+        :param record: ``changes`` record to create the changelist from without querying the server
+        :type record: dict
+        :param descriptions: Whether the record has the full description
+        :type descriptions: bool
+        :returns: :class:`.Changelist`
+        """
+        if record is not None:
+            factory = lambda: Changelist._fromRecord(record, self, descriptions)
+        elif int(change):
+            factory = lambda: Changelist(str(change), self)
+        else:
+            factory = lambda: Default(connection=self)
+
+        if self._identity is None:
+            return factory()
+
+        return self._identity.changelist(change, factory)
+
+    @split_files
+    def _runFiles(self, files, cmd):
+        """Runs a command on files in as few processes as possible"""
+        if not files:
+            return []
+
+        return self.run(cmd + files)
+
+    @split_files
+    def _runInto(self, files, cmd, callback):
+        """Runs a command on files in as few processes as possible and passes each record to callback"""
+        if not files:
+            return []
+
+        for record in self.iter_run(cmd + files):
+            callback(record)
+
+        return []
+
+    @split_files(batch=2)
+    def _runPairs(self, files, cmd):
+        """Runs a command taking two files, eg the source and target of move, for every pair of files"""
+        return self.run(cmd + files)
+
+    def _refresh(self, revs):
+        """Repopulates revisions with one fstat, depot paths are replaced by new :class:`.Revision` objects
+
+        :param revs: Revisions or depot paths to refresh
+        :type revs: list
+        :returns: list<:class:`.Revision`>, paths that do not exist are left out
+        """
+        records = {}
+        for record in self._runFiles(_depotFiles(revs), ['fstat']):
+            if record.get('code') != 'error':
+                records[record['depotFile']] = record
+                records.setdefault(record.get('clientFile'), record)
 
-        LOGGER.warn('Unable to add {}: {}'.format(filename, result['data']))
+        results = []
+        for rev in revs:
+            data = records.get(six.text_type(rev.depotFile if isinstance(rev, Revision) else rev))
+            if data is None:
+                LOGGER.debug('No fstat record for {}'.format(rev))
+                if isinstance(rev, Revision):
+                    results.append(rev)
+            elif isinstance(rev, Revision):
+                rev._update(data)
+                results.append(rev)
+            else:
+                results.append(self._revision(data))
 
-        return False
+        return results
 
 
 @six.python_2_unicode_compatible
@@ -400,6 +1864,8 @@ class PerforceObject(object):
 
     This is a simple descriptor for the incoming P4Dict
     """
+    __slots__ = ('_connection', '_p4dict')
+
     def __init__(self, connection=None):
         self._connection = connection or Connection()
         self._p4dict = {}
@@ -444,6 +1910,143 @@ class FormObject(PerforceObject):
         self._dirty = False
 
 
+class FileCollection(object):
+    """The revisions of a changelist, indexed by depot path and client path
+
+    Membership, lookups, appends and removes take the same time for any number of files.  A revision is the same file
+    as another with the same depot path, appending it again replaces the one in the collection.  Integers and slices
+    index the revisions in the order they were appended.
+
+    :param revs: Revisions to start with
+    :type revs: iterable
+    """
+    __slots__ = ('_revs', '_clients', '_sequence')
+
+    def __init__(self, revs=()):
+        self._revs = OrderedDict()
+        self._clients = {}
+        #: Tuple of the revisions in order for indexing and iterating, None until it is needed after a change
+        self._sequence = None
+        self.extend(revs)
+
+    def __repr__(self):
+        return '<FileCollection: {0} files>'.format(len(self))
+
+    def __len__(self):
+        return len(self._revs)
+
+    def __iter__(self):
+        return iter(self._ordered())
+
+    def __contains__(self, item):
+        if isinstance(item, Revision):
+            return _depotKey(item) in self._revs
+
+        return self.get(item) is not None
+
+    def __getitem__(self, key):
+        if isinstance(key, six.integer_types):
+            return self._ordered()[key]
+
+        if isinstance(key, slice):
+            return FileCollection(self._ordered()[key])
+
+        rev = self.get(key)
+        if rev is None:
+            raise KeyError(key)
+
+        return rev
+
+    def __iadd__(self, other):
+        self.extend(other)
+
+        return self
+
+    def get(self, path, default=None):
+        """The revision of a depot path or client path
+
+        :param path: Depot path or client path
+        :type path: str
+        :returns: :class:`.Revision`
+        """
+        path = six.text_type(path)
+        rev = self._revs.get(path)
+        if rev is None:
+            rev = self._clients.get(path)
+
+        return default if rev is None else rev
+
+    def append(self, rev):
+        """Adds a revision, replacing the revision of the same file
+
+        :param rev: Revision to add
+        :type rev: :class:`.Revision`
+        """
+        self._revs[_depotKey(rev)] = rev
+        self._sequence = None
+        if 'clientFile' in rev._p4dict:
+            self._clients[six.text_type(rev._p4dict['clientFile'])] = rev
+
+    def extend(self, revs):
+        """Adds revisions
+
+        :param revs: Revisions to add
+        :type revs: iterable
+        """
+        for rev in revs:
+            self.append(rev)
+
+    def remove(self, rev):
+        """Removes a revision
+
+        :param rev: Revision to remove
+        :type rev: :class:`.Revision`
+        :raises: ValueError if the file is not in the collection
+        """
+        try:
+            rev = self._revs.pop(_depotKey(rev))
+        except KeyError:
+            raise ValueError('{} not in collection'.format(rev))
+
+        self._sequence = None
+        if 'clientFile' in rev._p4dict:
+            self._clients.pop(six.text_type(rev._p4dict['clientFile']), None)
+
+    def copy(self):
+        """A shallow copy of the collection"""
+        return FileCollection(self._revs.values())
+
+    def byAction(self):
+        """Groups the revisions by their current action
+
+        :returns: OrderedDict, list<:class:`.Revision`> for each action, None for files that are not open
+        """
+        groups = OrderedDict()
+        for rev in six.itervalues(self._revs):
+            groups.setdefault(rev.action, []).append(rev)
+
+        return groups
+
+    def reindex(self):
+        """Updates the index after revisions were moved or renamed"""
+        revs = self._ordered()
+        self._revs.clear()
+        self._clients.clear()
+        self.extend(revs)
+
+    def _ordered(self):
+        """The revisions in the order they were appended, the tuple is shared until the collection changes"""
+        if self._sequence is None:
+            self._sequence = tuple(self._revs.values())
+
+        return self._sequence
+
+
+def _depotKey(rev):
+    """The depot path a revision is indexed by"""
+    return six.text_type(rev._p4dict['depotFile'])
+
+
 class Changelist(PerforceObject):
     """
     A Changelist is a collection of files that will be submitted as a single entry with a description and
@@ -455,6 +2058,8 @@ class Changelist(PerforceObject):
         super(Changelist, self).__init__(connection=connection)
 
         self._files = None
+        self._count = None
+        self._summary = False
         self._dirty = False
         self._reverted = False
         self._change = changelist
@@ -484,31 +2089,36 @@ class Changelist(PerforceObject):
         if not isinstance(other, Revision):
             raise TypeError('Value needs to be a Revision instance')
 
-        if self._files is None:
-            self.query()
-
-        names = [f.depotFile for f in self._files]
+        self._queryFiles()
 
-        return other.depotFile in names
+        return other in self._files
 
     def __getitem__(self, name):
-        if self._files is None:
-            self.query()
+        self._queryFiles()
 
         return self._files[name]
 
     def __len__(self):
-        if self._files is None:
-            self.query()
+        if self._files is None and self._isSubmitted():
+            # -- Count the files on the server rather than loading them
+            if self._count is None:
+                results = self._connection.run(['sizes', '-s', '//...@={}'.format(self.change)])
+                self._count = int(results[0].get('fileCount', 0)) if results else 0
+
+            return self._count
+
+        self._queryFiles()
 
         return len(self._files)
 
+    def __iter__(self):
+        return self.iter_files()
+
     def __iadd__(self, other):
-        if self._files is None:
-            self.query()
+        self._queryFiles()
 
         if isinstance(other, list):
-            currentfiles = self._files[:]
+            currentfiles = self._files.copy()
             try:
                 files = [str(f) for f in other]
                 cmd = ['edit', '-c', str(self.change)]
@@ -525,8 +2135,7 @@ class Changelist(PerforceObject):
         return int(self) == int(other)
 
     def __format__(self, *args, **kwargs):
-        if self._files is None:
-            self.query()
+        self._queryFiles()
 
         kwargs = {
             'change': self._p4dict['change'],
@@ -539,25 +2148,66 @@ class Changelist(PerforceObject):
 
         return FORMAT.format(**kwargs)
 
+    def _queryFiles(self):
+        """Queries the files in the changelist if they have not been yet"""
+        if self._files is None:
+            self.query()
+
     def query(self, files=True):
         """Queries the depot to get the current status of the changelist"""
         if self._change:
             cl = str(self._change)
             self._p4dict = {camel_case(k): v for k, v in six.iteritems(self._connection.run(['change', '-o', cl])[0])}
+            self._summary = False
 
         if files:
-            self._files = []
+            self._files = FileCollection()
             if self._p4dict.get('status') == 'pending' or self._change == 0:
                 change = self._change or 'default'
                 data = self._connection.run(['opened', '-c', str(change)])
-                self._files = [Revision(r, self._connection) for r in data]
+                self._files = FileCollection(self._connection._revision(r, merge=True) for r in data)
             else:
-                data = self._connection.run(['describe', str(self._change)])[0]
+                self._files = FileCollection(self._iterSubmitted())
+
+    def iter_files(self, page=PAGE_SIZE):
+        """Yields the revisions in this changelist
+
+        The files of a submitted changelist that has not been queried are read from the server one page at a time and
+        are not kept, so any number of files can be iterated over with bounded memory.
+
+        :param page: Number of files queried at a time
+        :type page: int
+        :returns: generator<:class:`.Revision`>
+        """
+        if self._files is None and self._isSubmitted():
+            for rev in self._iterSubmitted(page):
+                yield rev
+
+            return
+
+        self._queryFiles()
+        for rev in self._files:
+            yield rev
+
+    def _isSubmitted(self):
+        return self._p4dict.get('status') == 'submitted'
+
+    def _iterSubmitted(self, page=PAGE_SIZE):
+        """Streams the files of a submitted changelist with ``files //...@=change`` and queries them a page at a time"""
+        depotfiles = []
+        for record in self._connection.iter_run(['files', '//...@={}'.format(self.change)]):
+            if record.get('code') == 'error':
+                continue
+
+            depotfiles.append(record['depotFile'])
+            if len(depotfiles) >= page:
+                for rev in self._connection.ls(depotfiles):
+                    yield rev
                 depotfiles = []
-                for k, v in six.iteritems(data):
-                    if k.startswith('depotFile'):
-                        depotfiles.append(v)
-                self._files = self._connection.ls(depotfiles)
+
+        if depotfiles:
+            for rev in self._connection.ls(depotfiles):
+                yield rev
 
     def append(self, rev):
         """Adds a :py:class:Revision to this changelist and adds or checks it out if needed
@@ -624,7 +2274,7 @@ class Changelist(PerforceObject):
             cmd += files
             self._connection.run(cmd)
 
-        self._files = []
+        self._files = FileCollection()
         self._reverted = True
 
     def save(self):
@@ -665,11 +2315,15 @@ class Changelist(PerforceObject):
     @property
     def description(self):
         """Changelist description"""
+        if self._summary:
+            self.query(files=False)
+
         return self._p4dict['description'].strip()
 
     @description.setter
     def description(self, desc):
         self._p4dict['description'] = desc.strip()
+        self._summary = False
         self._dirty = True
 
     @property
@@ -690,6 +2344,37 @@ class Changelist(PerforceObject):
         """Creation time of this changelist"""
         return datetime.datetime.strptime(self._p4dict['date'], DATE_FORMAT)
 
+    @classmethod
+    def _fromRecord(cls, data, connection, descriptions=True):
+        """Creates a changelist from a ``changes`` record without querying the server
+
+        :param data: ``changes`` record
+        :type data: dict
+        :param connection: Connection to use
+        :type connection: :class:`.Connection`
+        :param descriptions: Whether the record has the full description, read with ``changes -l``
+        :type descriptions: bool
+        :returns: :class:`.Changelist`
+        """
+        cl = cls.__new__(cls)
+        PerforceObject.__init__(cl, connection)
+        cl._files = None
+        cl._count = None
+        cl._summary = not descriptions
+        cl._dirty = False
+        cl._reverted = False
+        cl._change = int(data['change'])
+        cl._p4dict = {
+            'change': data['change'],
+            'client': data.get('client'),
+            'user': data.get('user'),
+            'status': data.get('status'),
+            'description': data.get('desc', ''),
+            'date': datetime.datetime.fromtimestamp(int(data.get('time', 0))).strftime(DATE_FORMAT),
+        }
+
+        return cl
+
     @staticmethod
     def create(description='<Created by Python>', connection=None):
         """Creates a new changelist
@@ -716,8 +2401,8 @@ class Default(Changelist):
 
         for f in data:
             if self._files is None:
-                self._files = []
-            self._files.append(Revision(f, self._connection))
+                self._files = FileCollection()
+            self._files.append(self._connection._revision(f, merge=True))
 
         data = self._connection.run(['change', '-o'])[0]
         self._change = 0
@@ -737,6 +2422,8 @@ class Default(Changelist):
 
 class Revision(PerforceObject):
     """A Revision represents a file on perforce at a given point in it's history"""
+    __slots__ = ('_head', '_changelist', '__weakref__')
+
     def __init__(self, data, connection=None):
         connection = connection or Connection()
 
@@ -750,11 +2437,10 @@ class Revision(PerforceObject):
 
         self._head = HeadRevision(self._p4dict)
         self._changelist = None
-        self._filename = None
 
     def __len__(self):
         if 'fileSize' not in self._p4dict:
-            self._p4dict = self._connection.run(['fstat', '-m', '1', '-Ol', self.depotFile])[0]
+            self._update(self._connection.run(['fstat', '-m', '1', '-Ol', self.depotFile])[0])
 
         return int(self._p4dict['fileSize'])
 
@@ -767,13 +2453,35 @@ class Revision(PerforceObject):
     def __int__(self):
         return self.revision
 
+    def __eq__(self, other):
+        if not isinstance(other, Revision):
+            return NotImplemented
+
+        return _depotKey(self) == _depotKey(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(_depotKey(self))
+
     def query(self):
         """Runs an fstat for this file and repopulates the data"""
 
-        self._p4dict = self._connection.run(['fstat', '-m', '1', self._p4dict['depotFile']])[0]
+        self._update(self._connection.run(['fstat', '-m', '1', self._p4dict['depotFile']])[0])
+
+    def _update(self, data):
+        """Repopulates the data from an fstat record"""
+        self._p4dict = data
         self._head = HeadRevision(self._p4dict)
 
-        self._filename = self.depotFile
+    def _merge(self, data):
+        """Adds the fields of a record that is not a full fstat record, eg from ``opened``"""
+        merged = dict(self._p4dict)
+        merged.update(data)
+        self._update(merged)
 
     def edit(self, changelist=0):
         """Checks out the file
@@ -926,18 +2634,20 @@ class Revision(PerforceObject):
     def hash(self):
         """The hash value of the current revision"""
         if 'digest' not in self._p4dict:
-            self._p4dict = self._connection.run(['fstat', '-m', '1', '-Ol', self.depotFile])[0]
+            self._update(self._connection.run(['fstat', '-m', '1', '-Ol', self.depotFile])[0])
 
         return self._p4dict['digest']
 
     @property
     def clientFile(self):
         """The local path to the revision"""
+        import path
         return path.path(self._p4dict['clientFile'])
 
     @property
     def depotFile(self):
         """The depot path to the revision"""
+        import path
         return path.path(self._p4dict['depotFile'])
 
     @property
@@ -973,10 +2683,9 @@ class Revision(PerforceObject):
         if self._changelist:
             return self._changelist
 
-        if self._p4dict['change'] == 'default':
-            return Default(connection=self._connection)
-        else:
-            return Changelist(str(self._p4dict['change']), self._connection)
+        change = self._p4dict['change']
+
+        return self._connection._changelist(0 if change == 'default' else change)
 
     @changelist.setter
     def changelist(self, value):
@@ -1044,6 +2753,8 @@ class Revision(PerforceObject):
 
 class HeadRevision(object):
     """The HeadRevision represents the latest version on the Perforce server"""
+    __slots__ = ('_p4dict',)
+
     def __init__(self, filedict):
         self._p4dict = filedict
 
@@ -1072,6 +2783,412 @@ class HeadRevision(object):
         return datetime.datetime.fromtimestamp(int(self._p4dict['headModTime']))
 
 
+#: fstat fields whose values repeat between files, the values of these fields of a :class:`.CompactRevision` are shared
+#: with every other revision that has the same ones
+COMPACT_SHARED = ('code', 'isMapped', 'headAction', 'headType', 'headRev', 'haveRev', 'action', 'change', 'type',
+                  'actionOwner')
+_SCHEMAS = {}
+_SHARED_VALUES = {}
+
+
+class _CompactSchema(object):
+    """The keys of the records with the same fields in the same order, shared by the revisions made from them
+
+    ``index`` is where the value of each key is, 0 for the shared values and 1 for the others, and its position.
+    """
+    __slots__ = ('keys', 'index', 'shared', 'values')
+
+    def __init__(self, keys):
+        self.keys = tuple(_key(k) if isinstance(k, six.binary_type) else k for k in keys)
+        shared = [i for i, key in enumerate(self.keys) if key in COMPACT_SHARED]
+        values = [i for i, key in enumerate(self.keys) if key not in COMPACT_SHARED]
+        self.shared = _itemgetter(shared)
+        self.values = _itemgetter(values)
+        self.index = dict((self.keys[i], (0, n)) for n, i in enumerate(shared))
+        self.index.update((self.keys[i], (1, n)) for n, i in enumerate(values))
+
+
+def _itemgetter(positions):
+    """An :func:`operator.itemgetter` that always returns a tuple"""
+    if len(positions) > 1:
+        return operator.itemgetter(*positions)
+
+    return lambda values: tuple(values[i] for i in positions)
+
+
+def _compactSchema(keys):
+    """The shared schema of a tuple of record keys"""
+    try:
+        return _SCHEMAS[keys]
+    except KeyError:
+        schema = _CompactSchema(keys)
+        if len(_SCHEMAS) < MAX_KEYS:
+            _SCHEMAS[keys] = schema
+
+        return schema
+
+
+class CompactRevision(Revision):
+    """A :class:`.Revision` that stores its fields in tuples instead of a dict, for holding many revisions at once
+
+    The keys are shared by every revision with the same fields and the values of the :data:`COMPACT_SHARED` fields by
+    every revision with the same ones.  Values are kept as they were read from the process and only decoded when they
+    are read.  ``_p4dict`` is a view of the fields, so every property of :class:`.Revision` works the same way, except
+    :attr:`depotFile` and :attr:`clientFile` which are plain str rather than :class:`path.path`.
+    """
+    __slots__ = ('_schema', '_shared', '_values')
+
+    def __init__(self, data, connection=None):
+        self._connection = connection or Connection()
+        self._changelist = None
+
+        if isinstance(data, six.string_types):
+            self._p4dict = {'depotFile': data}
+            self.query()
+        else:
+            self._p4dict = data
+
+    @property
+    def _p4dict(self):
+        return _CompactRecord(self)
+
+    @_p4dict.setter
+    def _p4dict(self, data):
+        if isinstance(data, Record) and data._raw is not None:
+            # -- Keep the raw values rather than decoding them
+            data = data._raw
+
+        keys = tuple(data)
+        self._schema = _SCHEMAS.get(keys) or _compactSchema(keys)
+        values = tuple(data.values())
+        # -- The shared values of most revisions are one of a few combinations, so a tuple of them is shared
+        shared = self._schema.shared(values)
+        if len(_SHARED_VALUES) < MAX_KEYS:
+            self._shared = _SHARED_VALUES.setdefault(shared, shared)
+        else:
+            self._shared = _SHARED_VALUES.get(shared, shared)
+        self._values = self._schema.values(values)
+
+    def _update(self, data):
+        """Repopulates the data from an fstat record"""
+        self._p4dict = data
+
+    def _field(self, key):
+        """The decoded value of a field
+
+        :raises: KeyError if the revision does not have the field
+        """
+        part, index = self._schema.index[key]
+        value = (self._values if part else self._shared)[index]
+
+        return value if isinstance(value, six.text_type) else _decodeValue(value)
+
+    @property
+    def head(self):
+        """The :class:`.HeadRevision` of this file"""
+        return HeadRevision(self._p4dict)
+
+    @property
+    def action(self):
+        """The current action: add, edit, etc."""
+        return self._field('action') if 'action' in self._schema.index else None
+
+    @property
+    def depotFile(self):
+        """The depot path to the revision"""
+        return self._field('depotFile')
+
+    @property
+    def clientFile(self):
+        """The local path to the revision"""
+        return self._field('clientFile')
+
+
+class _CompactRecord(MutableMapping):
+    """The fields of a :class:`.CompactRevision` as a dict, setting or deleting a field rebuilds the revision's tuple"""
+    __slots__ = ('_rev',)
+
+    def __init__(self, rev):
+        self._rev = rev
+
+    def __getitem__(self, key):
+        return self._rev._field(key)
+
+    def __setitem__(self, key, value):
+        data = dict(self)
+        data[key] = value
+        self._rev._p4dict = data
+
+    def __delitem__(self, key):
+        data = dict(self)
+        del data[key]
+        self._rev._p4dict = data
+
+    def __contains__(self, key):
+        return key in self._rev._schema.index
+
+    def __iter__(self):
+        return iter(self._rev._schema.keys)
+
+    def __len__(self):
+        return len(self._rev._schema.keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _mtime(stat):
+    """The modification time of a stat result in nanoseconds"""
+    return getattr(stat, 'st_mtime_ns', None) or int(stat.st_mtime * 1e9)
+
+
+def _scanDir(path):
+    """The size and modification time of the files in a directory and its sub directories
+
+    :returns: tuple, dict of (size, mtime) by path and list of directories
+    """
+    files = {}
+    dirs = []
+    try:
+        if _scandir is not None:
+            for entry in _scandir(path):
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                else:
+                    stat = entry.stat(follow_symlinks=False)
+                    files[entry.path] = (stat.st_size, _mtime(stat))
+        else:
+            for name in os.listdir(path):
+                filename = os.path.join(path, name)
+                if os.path.isdir(filename) and not os.path.islink(filename):
+                    dirs.append(filename)
+                else:
+                    stat = os.lstat(filename)
+                    files[filename] = (stat.st_size, _mtime(stat))
+    except OSError as err:
+        LOGGER.debug('Unable to read {}: {}'.format(path, err))
+
+    return files, dirs
+
+
+def _scanTree(root, pool):
+    """Walks a directory tree with a task per directory
+
+    :param root: Directory to walk
+    :type root: str
+    :param pool: Executor the directories are read on
+    :type pool: :class:`concurrent.futures.Executor`
+    :returns: dict, (size, mtime) of every file by path
+    """
+    files = {}
+    pending = [pool.submit(_scanDir, root)]
+    while pending:
+        found, dirs = pending.pop().result()
+        files.update(found)
+        pending.extend(pool.submit(_scanDir, d) for d in dirs)
+
+    return files
+
+
+def _md5(filename, crlf=False):
+    """The upper case md5 digest of a file, the way ``fstat -Ol`` reports it
+
+    :param filename: File to hash
+    :type filename: str
+    :param crlf: Hash the file with CRLF line endings converted to LF, for text files on windows line ending clients
+    :type crlf: bool
+    :returns: str, None if the file can not be read
+    """
+    digest = hashlib.md5()
+    try:
+        with open(filename, 'rb') as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size:
+                data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    # -- Hash a window at a time so large files are read in constant memory
+                    carry = b''
+                    for start in range(0, size, HASH_WINDOW):
+                        chunk = data[start:start + HASH_WINDOW]
+                        if crlf:
+                            # -- A CR at the end of a window may be the start of a CRLF
+                            chunk = carry + chunk
+                            carry = b'\r' if chunk.endswith(b'\r') else b''
+                            chunk = chunk[:len(chunk) - len(carry)].replace(b'\r\n', b'\n')
+                        digest.update(chunk)
+                    digest.update(carry)
+                finally:
+                    data.close()
+    except (IOError, OSError, ValueError) as err:
+        LOGGER.debug('Unable to hash {}: {}'.format(filename, err))
+        return None
+
+    return digest.hexdigest().upper()
+
+
+def _hashable(fileType):
+    """Whether the ``fstat -Ol`` digest of a file type is the md5 of its workspace file
+
+    Keywords are expanded and unicode is converted when a file is synced, those files are compared by the server.
+    """
+    base, _, modifiers = fileType.partition('+')
+
+    return base not in CONVERTED_TYPES and 'k' not in modifiers
+
+
+def _diffEdited(connection, depotFiles):
+    """The depot paths of the files that are not open and differ from their workspace file, with ``diff -se``"""
+    if not depotFiles:
+        return set()
+
+    records = connection._runFiles(list(depotFiles), ['diff', '-se'])
+
+    return set(six.text_type(r['depotFile']) for r in records if r.get('code') == 'stat')
+
+
+def _convertedDigest(record, edited, crlf=False):
+    """The digest of a keyword or unicode file for :func:`_mismatch`, its ``fstat -Ol`` digest unless it was edited"""
+    if six.text_type(record['depotFile']) in edited:
+        return _md5(record['clientFile'], crlf)
+
+    return record['digest'] if os.path.exists(record['clientFile']) else None
+
+
+def _ignoreRules(root, files, names):
+    """The rules of the P4IGNORE files under root, the rules of deeper files come last so they take precedence
+
+    :param root: Directory the files were found in
+    :type root: str
+    :param files: Local paths of the files under root
+    :type files: iterable
+    :param names: File names of P4IGNORE, absolute paths apply to the whole root
+    :type names: list
+    :returns: list of tuples, directory, pattern, whether it is a ``!`` exception, whether it only matches directories
+        and whether it is relative to the directory rather than matching any name
+    """
+    relative = set(name for name in names if not os.path.isabs(name))
+    sources = [(root, name) for name in names if os.path.isabs(name)]
+    found = [(os.path.dirname(path), path) for path in files if os.path.basename(path) in relative]
+    sources += sorted(found, key=lambda source: (source[1].count(os.sep), source[1]))
+
+    rules = []
+    for directory, filename in sources:
+        try:
+            with io.open(filename, encoding='utf8', errors='replace') as fh:
+                lines = fh.read().splitlines()
+        except (IOError, OSError) as err:
+            LOGGER.debug('Unable to read {}: {}'.format(filename, err))
+            continue
+
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            line = line[1:] if negate else line
+            dirOnly = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            line = line.lstrip('/')
+            if line:
+                rules.append((directory, line, negate, dirOnly, anchored))
+
+    return rules
+
+
+def _ignored(path, rules):
+    """Whether a local path is ignored by the rules of :func:`_ignoreRules`, the last rule that matches wins"""
+    ignored = False
+    for directory, pattern, negate, dirOnly, anchored in rules:
+        if not path.startswith(os.path.join(directory, '')):
+            continue
+
+        parts = os.path.relpath(path, directory).replace(os.sep, '/').split('/')
+        names = ['/'.join(parts[:i + 1]) for i in range(len(parts))] if anchored else parts
+        if dirOnly:
+            names = names[:-1]
+        if any(fnmatch.fnmatch(name, pattern) for name in names):
+            ignored = not negate
+
+    return ignored
+
+
+def _mismatch(record, future):
+    """The :class:`.Mismatch` of an ``fstat -Ol`` record and the digest of its local file, None if they match"""
+    digest = future.result()
+    if digest == record['digest']:
+        return None
+
+    return Mismatch(record['depotFile'], record['clientFile'], record['digest'], digest)
+
+
+def _shards(files, sizes, count):
+    """Splits files into shards of about the same total size, the largest files are placed first
+
+    :param files: Files to split
+    :type files: list
+    :param sizes: Size of each file
+    :type sizes: dict
+    :param count: Number of shards
+    :type count: int
+    :returns: list<list>
+    """
+    count = max(1, min(int(count), len(files)))
+    shards = [[] for _ in range(count)]
+    totals = [0] * count
+    for f in sorted(files, key=lambda f: sizes.get(f, 0), reverse=True):
+        smallest = totals.index(min(totals))
+        shards[smallest].append(f)
+        totals[smallest] += sizes.get(f, 0)
+
+    return shards
+
+
+def _printChunks(records):
+    """Numbers the files of ``print`` records and pairs every chunk of content with the record of its file
+
+    Every file starts with an empty chunk, so files without content are seen too.
+
+    :param records: Records of ``p4 print``
+    :type records: generator
+    :returns: generator<tuple>, number of the file, its record and a chunk of bytes
+    """
+    number = 0
+    current = None
+    for record in records:
+        code = record.get('code')
+        if code == 'stat':
+            number += 1
+            current = record
+            yield number, current, b''
+        elif current is not None and code not in ('error', 'info') and 'data' in record:
+            # -- Values are decoded as utf8, the content is read from the undecoded record
+            yield number, current, record['data'] if six.PY2 else record.raw[b'data']
+
+
+def _viewMapping(obj):
+    """The :class:`.Mapping` of the view of a client or stream, compiled again only when the view changed
+
+    ``p4 info`` is only run for the case handling of the server once a path is translated.
+    """
+    keys = [k for k in obj._p4dict if k.startswith('view') and k[4:].isdigit()]
+    lines = tuple(obj._p4dict[k] for k in sorted(keys, key=lambda k: int(k[4:])))
+    cached = obj.__dict__.get('_mapping')
+    if cached is None or cached[0] != lines:
+        connection = obj._connection
+        cached = obj._mapping = (lines, Mapping(lines, lambda: _caseSensitive(connection)))
+
+    return cached[1]
+
+
+def _caseSensitive(connection):
+    """Whether the server of a connection compares paths case sensitively"""
+    # -- Paths of a case insensitive server match in any case
+    info = connection.run(['info'])[0]
+
+    return info.get('caseHandling', 'sensitive') != 'insensitive'
+
+
 class Client(FormObject):
     """Represents a client(workspace) for a given connection"""
     COMMAND = 'client'
@@ -1090,6 +3207,7 @@ class Client(FormObject):
     @property
     def root(self):
         """Root path fo the client"""
+        import path
         return path.Path(self._p4dict['root'])
 
     @property
@@ -1143,15 +3261,13 @@ class Client(FormObject):
 
     @property
     def view(self):
-        """A list of view specs"""
-        spec = []
-        for k, v in six.iteritems(self._p4dict):
-            if k.startswith('view'):
-                match = RE_FILESPEC.search(v)
-                if match:
-                    spec.append(FileSpec(v[:match.end() - 1], v[match.end():]))
+        """A list of view specs in the order of the view, exclusions and overlays keep their ``-`` or ``+``"""
+        return [FileSpec(line.flag + line.depot, line.client) for line in self.mapping]
 
-        return spec
+    @property
+    def mapping(self):
+        """The view compiled to a :class:`.Mapping` to translate paths without running ``p4 where``"""
+        return _viewMapping(self)
 
     @property
     def access(self):
@@ -1170,6 +3286,163 @@ class Client(FormObject):
         if stream:
             return Stream(stream, self._connection)
 
+    def scan_changes(self, workers=SCAN_WORKERS, snapshot=None):
+        """Finds the files under the root that were added, changed or deleted outside of perforce
+
+        This answers the same question as ``reconcile -n`` without the server reading every file: the root is walked
+        with a task per directory and compared to the have list, and only the files whose size or modification time
+        differ from the last scan are hashed and compared to their ``fstat -Ol`` digest.  Keyword and unicode files are
+        converted when they are synced, so they are compared by the server with ``diff -se`` instead.  Files that are
+        open are left out, and so are new files ignored by the P4IGNORE files.
+
+        Files to add are local paths as they are not in the depot yet, open them with :meth:`.Connection.add`.  Files
+        to edit or delete are depot paths, :meth:`.Connection.edit` and :meth:`.Connection.delete` open them at once.
+
+            >>> result = client.scan_changes()
+            >>> revs = [c.add(path, changelist) for path in sorted(result.add)]
+            >>> revs += c.edit(result.edit, changelist) + c.delete(result.delete, changelist)
+
+        :param workers: Number of threads walking the root and hashing files
+        :type workers: int
+        :param snapshot: Json file that keeps the size, modification time and digest of unchanged files between runs,
+            they are only kept on this client if None
+        :type snapshot: str
+        :returns: :class:`.ScanResult`, set of local paths to add, set of depot paths to edit and set of depot paths
+            to delete
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        root = os.path.normpath(self._p4dict['root'])
+        known = self._loadSnapshot(snapshot)
+        crlf = self._crlf()
+
+        with ThreadPoolExecutor(workers) as pool, ThreadPoolExecutor(1) as reader:
+            # -- The have list is read while the root is walked
+            query = reader.submit(self._haveList, root)
+            files = _scanTree(root, pool)
+            have, opened = query.result()
+
+            local = dict((os.path.normcase(path), (path, stat)) for path, stat in six.iteritems(files))
+            add, edit, delete = set(), set(), set()
+            candidates = []
+            converted = []
+            for key, record in six.iteritems(have):
+                depotFile = six.text_type(record['depotFile'])
+                path, stat = local.pop(key, (None, None))
+                if record.get('action') or depotFile in opened:
+                    continue
+                if stat is None:
+                    delete.add(depotFile)
+                    continue
+                if 'symlink' in record.get('headType', ''):
+                    continue
+
+                digest = record.get('digest')
+                if known.get(key) == [digest, stat[0], stat[1]]:
+                    continue
+
+                if not _hashable(record.get('headType', 'text')):
+                    converted.append((key, stat, depotFile, digest))
+                    continue
+
+                text = crlf and 'text' in record.get('headType', 'text')
+                if not text and 'fileSize' in record and int(record['fileSize']) != stat[0]:
+                    edit.add(depotFile)
+                    continue
+
+                candidates.append((key, path, stat, depotFile, digest, text))
+
+            # -- Keyword and unicode files are compared by the server while the other files are hashed
+            diffs = reader.submit(_diffEdited, self._connection, [c[2] for c in converted])
+            digests = pool.map(lambda c: _md5(c[1], c[5]), candidates)
+            for (key, path, stat, depotFile, digest, text), local_digest in zip(candidates, digests):
+                if local_digest == digest:
+                    known[key] = [digest, stat[0], stat[1]]
+                else:
+                    edit.add(depotFile)
+
+            edited = diffs.result()
+            for key, stat, depotFile, digest in converted:
+                if depotFile in edited:
+                    edit.add(depotFile)
+                else:
+                    known[key] = [digest, stat[0], stat[1]]
+
+        # -- Files that are not in the have list are new if the view maps them to a depot file that is not open and
+        # -- P4IGNORE does not ignore them
+        prefix = '//{}/'.format(self.client)
+        mapping = self.mapping
+        rules = _ignoreRules(root, files, self._ignoreNames())
+        for path, _ in six.itervalues(local):
+            if rules and _ignored(path, rules):
+                continue
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            depotFile = mapping.translate(prefix + relative, reverse=True)
+            if depotFile is not None and depotFile not in opened:
+                add.add(path)
+
+        for key in list(known):
+            if key not in have:
+                del known[key]
+        self._saveSnapshot(snapshot, known)
+
+        return ScanResult(add, edit, delete)
+
+    def _ignoreNames(self):
+        """The file names set in P4IGNORE"""
+        p4vars = environment(self._connection._executable) or {}
+        value = p4vars.get('P4IGNORE') or os.getenv('P4IGNORE')
+        if not value:
+            return []
+
+        return [name.strip() for name in re.split('[;{}]'.format(re.escape(os.pathsep)), value) if name.strip()]
+
+    def _crlf(self):
+        """Whether text files are written with CRLF line endings on this machine"""
+        lineEnd = self._p4dict.get('lineEnd', 'local')
+
+        return lineEnd == 'win' or (lineEnd in ('local', 'share') and os.name == 'nt')
+
+    def _haveList(self, root):
+        """The fstat records of the files synced under root by local path and the set of depot paths of open files"""
+        have = {}
+        cmd = ['fstat', '-Ol', '-T', 'depotFile,clientFile,headType,fileSize,digest,action',
+               os.path.join(root, '...#have')]
+        for record in self._connection.iter_run(cmd):
+            if record.get('code') != 'error' and 'clientFile' in record:
+                have[os.path.normcase(os.path.normpath(record['clientFile']))] = record
+
+        records = self._connection.run(['opened', os.path.join(root, '...')])
+        opened = set(six.text_type(r['depotFile']) for r in records if r.get('code') != 'error')
+
+        return have, opened
+
+    def _loadSnapshot(self, snapshot):
+        """The digest, size and modification time of the files found unchanged by the last scan, by local path"""
+        if snapshot is None:
+            return self.__dict__.setdefault('_snapshot', {})
+
+        try:
+            with open(snapshot) as fh:
+                data = json.load(fh)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        return data.get('files', {}) if data.get('client') == self.client else {}
+
+    def _saveSnapshot(self, snapshot, known):
+        if snapshot is None:
+            self._snapshot = known
+            return
+
+        # -- Replace the file in one step so a concurrent scan never reads half of it
+        tmp = '{}.{}'.format(snapshot, os.getpid())
+        with open(tmp, 'w') as fh:
+            json.dump({'client': self.client, 'files': known}, fh)
+        if os.name == 'nt' and os.path.exists(snapshot):
+            os.remove(snapshot)
+        os.rename(tmp, snapshot)
+
 
 class Stream(PerforceObject):
     """An object representing a perforce stream"""
@@ -1191,15 +3464,13 @@ class Stream(PerforceObject):
 
     @property
     def view(self):
-        """A list of view specs"""
-        spec = []
-        for k, v in six.iteritems(self._p4dict):
-            if k.startswith('view'):
-                match = RE_FILESPEC.search(v)
-                if match:
-                    spec.append(FileSpec(v[:match.end() - 1], v[match.end():]))
-
-        return spec
+        """A list of view specs in the order of the view, client paths are relative to the root of a client"""
+        return [FileSpec(line.flag + line.depot, line.client) for line in self.mapping]
+
+    @property
+    def mapping(self):
+        """The view compiled to a :class:`.Mapping`, client paths are relative to the root of a client"""
+        return _viewMapping(self)
 
     @property
     def access(self):
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.pool
+~~~~~~~~~~~~~
+
+This module implements a bounded pool to run several p4 commands at once
+
+    >>> pool = ConnectionPool(perforce.connect(), max_workers=8)
+    >>> revisions = pool.ls(files)
+    >>> pool.stats.maxQueued
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import time
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from perforce.models import Connection, Changelist, chunk_files
+
+
+#: Snapshot of the activity of a :class:`.ConnectionPool`, times are in seconds
+PoolStats = namedtuple(
+    'PoolStats',
+    'submitted, queued, running, completed, failed, maxQueued, meanWait, maxWait, meanLatency, maxLatency'
+)
+
+
+class ConnectionPool(object):
+    """Runs commands for a :class:`.Connection` on a bounded pool of threads
+
+    Each command spends its time waiting on a p4 process, so threads are enough to keep max_workers processes running at
+    once.
+
+    :param connection: Connection to run commands with, one is created if None
+    :type connection: :class:`.Connection`
+    :param max_workers: Maximum number of commands running at once
+    :type max_workers: int
+    """
+    def __init__(self, connection=None, max_workers=4):
+        self._connection = connection or Connection()
+        self._maxWorkers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._maxQueued = 0
+        self._wait = 0.0
+        self._maxWait = 0.0
+        self._latency = 0.0
+        self._maxLatency = 0.0
+
+    def __repr__(self):
+        return '<ConnectionPool: {0}, {1}>'.format(self._connection, self._maxWorkers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.shutdown()
+
+    @property
+    def connection(self):
+        """The :class:`.Connection` commands are run with"""
+        return self._connection
+
+    @property
+    def stats(self):
+        """The current :class:`PoolStats`"""
+        with self._lock:
+            done = self._completed + self._failed
+            return PoolStats(
+                submitted=self._submitted,
+                queued=self._submitted - done - self._running,
+                running=self._running,
+                completed=self._completed,
+                failed=self._failed,
+                maxQueued=self._maxQueued,
+                meanWait=self._wait / done if done else 0.0,
+                maxWait=self._maxWait,
+                meanLatency=self._latency / done if done else 0.0,
+                maxLatency=self._maxLatency,
+            )
+
+    def submit(self, func, *args, **kwargs):
+        """Schedules func(*args, **kwargs) to run on the pool
+
+        :param func: Function to call
+        :type func: callable
+        :returns: :class:`concurrent.futures.Future`
+        """
+        submitted = time.time()
+        with self._lock:
+            self._submitted += 1
+            queued = self._submitted - self._completed - self._failed - self._running
+            self._maxQueued = max(self._maxQueued, queued)
+
+        def timed():
+            start = time.time()
+            with self._lock:
+                self._running += 1
+                self._wait += start - submitted
+                self._maxWait = max(self._maxWait, start - submitted)
+
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                latency = time.time() - start
+                with self._lock:
+                    self._running -= 1
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    self._latency += latency
+                    self._maxLatency = max(self._maxLatency, latency)
+
+        return self._executor.submit(timed)
+
+    def map(self, func, iterable):
+        """Calls func for every item on the pool
+
+        :param func: Function to call
+        :type func: callable
+        :param iterable: Items to pass to func
+        :type iterable: iterable
+        :returns: iterator, the results in the order of iterable
+        """
+        futures = [self.submit(func, item) for item in iterable]
+
+        return (future.result() for future in futures)
+
+    def run(self, cmd, stdin=None, marshal_output=True):
+        """Schedules a command, see :meth:`.Connection.run`
+
+        :returns: :class:`concurrent.futures.Future`
+        """
+        return self.submit(self._connection.run, cmd, stdin, marshal_output)
+
+    def ls(self, files, silent=True, exclude_deleted=False):
+        """Lists files, every chunk of files is queried in parallel, see :meth:`.Connection.ls`
+
+        :param files: Perforce file spec
+        :type files: list
+        :returns: list<:class:`.Revision`>
+        """
+        if not isinstance(files, (tuple, list)):
+            files = [files]
+
+        def ls(chunk):
+            return self._connection.ls(chunk, silent, exclude_deleted)
+
+        return [rev for chunk in self.map(ls, chunk_files(files)) for rev in chunk]
+
+    def sync(self, files, force=False, safe=True):
+        """Syncs files, every chunk of files is synced in parallel
+
+        :param files: Perforce file spec
+        :type files: list
+        :param force: Force the files to sync
+        :type force: bool
+        :param safe: Don't sync files that were changed outside perforce
+        :type safe: bool
+        :returns: list, records of results
+        """
+        if not isinstance(files, (tuple, list)):
+            files = [files]
+
+        cmd = ['sync']
+        if force:
+            cmd.append('-f')
+
+        if safe:
+            cmd.append('-s')
+
+        def sync(chunk):
+            return self._connection.run(cmd + chunk)
+
+        return [record for chunk in self.map(sync, chunk_files(files)) for record in chunk]
+
+    def changelists(self, changes, files=False):
+        """Queries changelists in parallel
+
+        :param changes: Change numbers to query
+        :type changes: list
+        :param files: Also query the files of each changelist
+        :type files: bool
+        :returns: list<:class:`.Changelist`>
+        """
+        def query(change):
+            cl = Changelist(change, self._connection)
+            if files:
+                cl.query()
+            return cl
+
+        return list(self.map(query, changes))
+
+    def shutdown(self, wait=True):
+        """Stops the pool once the scheduled commands are done
+
+        :param wait: Block until the commands are done
+        :type wait: bool
+        """
+        self._executor.shutdown(wait)
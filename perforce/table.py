@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+
+"""
+perforce.table
+~~~~~~~~~~~~~~
+
+This module implements a columnar table of ``fstat`` results for reports over many files
+
+    >>> table = connection.fstat_table('//depot/...', ['depotFile', 'headType', 'fileSize'])
+    >>> binary = table.filter(table.mask('headType', '==', 'binary'))
+    >>> binary.groupby('headType', 'fileSize', 'sum')
+    OrderedDict([('binary', 8273622)])
+
+Numbers are stored in int64 arrays and strings are dictionary encoded, the arrays are NumPy arrays when it is
+installed and :class:`array.array` otherwise.  A missing number is masked in a NumPy masked array, or None in a list
+without NumPy, and is left out of comparisons and aggregates.
+
+:copyright: (c) 2015 by Brett Dixon
+:license: MIT, see LICENSE for more details
+"""
+
+import array
+import operator
+from collections import OrderedDict
+
+import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#: Fields stored as int64, a missing or non numeric value is masked
+INT_FIELDS = ('headRev', 'headChange', 'headTime', 'headModTime', 'haveRev', 'fileSize', 'workRev', 'otherOpen')
+#: Fields that are different for every file and are not dictionary encoded
+STR_FIELDS = ('depotFile', 'clientFile', 'movedFile', 'digest')
+#: Fields used when none are given
+DEFAULT_FIELDS = ('depotFile', 'headAction', 'headType', 'headRev', 'headChange', 'headTime', 'fileSize')
+#: Value stored under the mask of a missing number
+MISSING = -1
+
+
+def _int64Typecode():
+    """The typecode of a 64 bit :class:`array.array`, python 2 has no ``q`` and its ``l`` is 32 bits on Windows"""
+    for typecode in ('l', 'q'):
+        try:
+            if array.array(typecode).itemsize == 8:
+                return typecode
+        except ValueError:
+            pass
+
+    return None
+
+
+#: Typecode of the number columns, None to store them in lists
+INT64 = _int64Typecode()
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, values: value in values,
+}
+AGGREGATES = ('count', 'sum', 'min', 'max', 'mean')
+
+
+class DictionaryColumn(object):
+    """A column of strings stored as an index into a list of its distinct values
+
+    :param codes: Index of the value of each row in categories, -1 for a missing value
+    :type codes: array
+    :param categories: Distinct values of the column
+    :type categories: list
+    """
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __repr__(self):
+        return '<DictionaryColumn: {0} rows, {1} values>'.format(len(self), len(self.categories))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+
+        return None if code < 0 else self.categories[code]
+
+    def __iter__(self):
+        categories = self.categories
+        for code in self.codes:
+            yield None if code < 0 else categories[code]
+
+
+class FstatTable(object):
+    """Columns of ``fstat`` fields, see :meth:`.Connection.fstat_table`
+
+    Number columns are int64 masked arrays, or lists of int and None without NumPy, :data:`STR_FIELDS` columns are
+    lists and every other column is a :class:`DictionaryColumn`.  Indexing the table with a field name returns its
+    column, indexing it with a mask returns the rows where the mask is True.
+
+    :param columns: Column of each field
+    :type columns: OrderedDict
+    """
+    def __init__(self, columns):
+        self._columns = columns
+
+    def __repr__(self):
+        return '<FstatTable: {0} rows, {1}>'.format(len(self), ', '.join(self._columns))
+
+    def __len__(self):
+        for column in six.itervalues(self._columns):
+            return len(column)
+
+        return 0
+
+    def __getitem__(self, key):
+        if isinstance(key, six.string_types):
+            return self._columns[key]
+
+        return self.filter(key)
+
+    def __iter__(self):
+        names = list(self._columns)
+        columns = [_list(self._columns[name]) for name in names]
+        for row in zip(*columns):
+            yield dict((name, value) for name, value in zip(names, row) if value is not None)
+
+    @property
+    def columns(self):
+        """The names of the columns"""
+        return tuple(self._columns)
+
+    def mask(self, name, op, value):
+        """Compares every value of a column, a NumPy bool array when it is installed
+
+        :param name: Column to compare
+        :type name: str
+        :param op: One of ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=`` or ``in``
+        :type op: str
+        :param value: Value to compare to, a collection for ``in``
+        :returns: sequence<bool>, False for a missing value
+        """
+        func = OPERATORS[op]
+        column = self._columns[name]
+
+        if isinstance(column, DictionaryColumn):
+            # -- Compare each distinct value once, a missing value is never a match
+            matches = [func(category, value) for category in column.categories] + [False]
+            if numpy is not None:
+                return numpy.array(matches, dtype=bool)[column.codes]
+
+            return [matches[code] for code in column.codes]
+
+        if numpy is not None and name in INT_FIELDS:
+            data = numpy.ma.getdata(column)
+            if op == 'in':
+                matches = numpy.isin(data, list(value))
+            else:
+                matches = numpy.asarray(func(data, value), dtype=bool)
+
+            return matches & ~numpy.ma.getmaskarray(column)
+
+        return [v is not None and func(v, value) for v in column]
+
+    def filter(self, mask):
+        """The rows where mask is True
+
+        :param mask: A bool for every row
+        :type mask: sequence<bool>
+        :returns: :class:`FstatTable`
+        """
+        if numpy is not None:
+            indexes = numpy.flatnonzero(numpy.asarray(mask, dtype=bool))
+        else:
+            indexes = [i for i, keep in enumerate(mask) if keep]
+
+        columns = OrderedDict()
+        for name, column in six.iteritems(self._columns):
+            columns[name] = _take(column, indexes)
+
+        return FstatTable(columns)
+
+    def groupby(self, key, name=None, func='count'):
+        """Aggregates a number column for every value of another column
+
+        :param key: Column to group rows by
+        :type key: str
+        :param name: Number column to aggregate, not needed to count rows
+        :type name: str
+        :param func: One of ``count``, ``sum``, ``min``, ``max`` or ``mean``
+        :type func: str
+        :returns: OrderedDict, aggregate of each value of key, missing numbers are left out and a group without any
+            number is not returned
+        """
+        if func not in AGGREGATES:
+            raise ValueError('{} is not one of {}'.format(func, ', '.join(AGGREGATES)))
+
+        if func != 'count' and name not in INT_FIELDS:
+            raise ValueError('{} is not a number column'.format(name))
+
+        keys, groups = _groups(self._columns[key])
+        values = self._columns[name] if func != 'count' else None
+
+        if numpy is not None:
+            groups = numpy.asarray(groups, dtype=numpy.intp)
+            if values is not None:
+                valid = ~numpy.ma.getmaskarray(values)
+                groups = groups[valid]
+                values = numpy.ma.getdata(values)[valid]
+            counts = numpy.bincount(groups, minlength=len(keys))
+            if func == 'count':
+                results = counts
+            elif func in ('sum', 'mean'):
+                results = numpy.zeros(len(keys), dtype=numpy.int64)
+                numpy.add.at(results, groups, values)
+                if func == 'mean':
+                    results = results / numpy.maximum(counts, 1)
+            else:
+                ufunc = numpy.minimum if func == 'min' else numpy.maximum
+                limits = numpy.iinfo(numpy.int64)
+                results = numpy.full(len(keys), limits.max if func == 'min' else limits.min, dtype=numpy.int64)
+                ufunc.at(results, groups, values)
+
+            return OrderedDict((k, v.item()) for k, v, c in zip(keys, results, counts) if c)
+
+        counts, results = _aggregate(keys, groups, values, func)
+
+        return OrderedDict((k, v) for k, v, c in zip(keys, results, counts) if c)
+
+    def to_pandas(self):
+        """The table as a :class:`pandas.DataFrame`, dictionary encoded columns become categoricals
+
+        :raises: ImportError if pandas is not installed
+        :returns: :class:`pandas.DataFrame`
+        """
+        import pandas
+
+        data = OrderedDict()
+        for name, column in six.iteritems(self._columns):
+            if isinstance(column, DictionaryColumn):
+                data[name] = pandas.Categorical.from_codes(column.codes, column.categories)
+            elif name in INT_FIELDS:
+                data[name] = pandas.array(_list(column), dtype='Int64')
+            else:
+                data[name] = column
+
+        return pandas.DataFrame(data, columns=list(self._columns))
+
+    def to_arrow(self):
+        """The table as a :class:`pyarrow.Table`, dictionary encoded columns become dictionary arrays
+
+        :raises: ImportError if pyarrow or NumPy is not installed
+        :returns: :class:`pyarrow.Table`
+        """
+        if numpy is None:
+            raise ImportError('NumPy is needed to convert a table to arrow')
+
+        import pyarrow
+
+        arrays = []
+        for name, column in six.iteritems(self._columns):
+            if isinstance(column, DictionaryColumn):
+                codes = numpy.asarray(column.codes, dtype=numpy.int32)
+                arrays.append(pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(codes, mask=codes < 0), pyarrow.array(column.categories, type=pyarrow.string())
+                ))
+            elif name in INT_FIELDS:
+                arrays.append(pyarrow.array(numpy.ma.getdata(column), mask=numpy.ma.getmaskarray(column)))
+            else:
+                arrays.append(pyarrow.array(column, type=pyarrow.string()))
+
+        return pyarrow.Table.from_arrays(arrays, names=list(self._columns))
+
+
+class TableBuilder(object):
+    """Appends ``fstat`` records to the columns of a :class:`FstatTable`
+
+    Only the requested fields of each record are read, so the rest of a :class:`.Record` is never decoded.
+
+    :param fields: Fields to keep
+    :type fields: list
+    """
+    def __init__(self, fields=DEFAULT_FIELDS):
+        self._fields = tuple(fields)
+        self._columns = OrderedDict()
+        self._lookups = {}
+        #: 1 for every missing value of a number column
+        self._missing = {}
+        for name in self._fields:
+            if name in INT_FIELDS:
+                self._columns[name] = array.array(INT64) if INT64 else []
+                self._missing[name] = array.array('b')
+            elif name in STR_FIELDS:
+                self._columns[name] = []
+            else:
+                self._columns[name] = DictionaryColumn(array.array('i'), [])
+                self._lookups[name] = {}
+
+    def append(self, record):
+        """Adds a record, error records are skipped
+
+        :param record: fstat record
+        :type record: dict
+        """
+        if record.get('code') == 'error':
+            return
+
+        for name in self._fields:
+            value = record.get(name)
+            column = self._columns[name]
+            if name in INT_FIELDS:
+                try:
+                    column.append(int(value))
+                    self._missing[name].append(0)
+                except (TypeError, ValueError):
+                    column.append(MISSING)
+                    self._missing[name].append(1)
+            elif name in STR_FIELDS:
+                column.append(value)
+            elif value is None:
+                column.codes.append(-1)
+            else:
+                lookup = self._lookups[name]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(column.categories)
+                    column.categories.append(value)
+                column.codes.append(code)
+
+    def table(self):
+        """The :class:`FstatTable` of the records appended so far, the NumPy arrays are shared with it
+
+        :returns: :class:`FstatTable`
+        """
+        columns = OrderedDict()
+        for name, column in six.iteritems(self._columns):
+            if numpy is not None and name in INT_FIELDS:
+                missing = self._missing[name]
+                if isinstance(column, list):
+                    values = numpy.array(column, dtype=numpy.int64)
+                else:
+                    values = numpy.frombuffer(column, dtype=numpy.int64) if column else numpy.zeros(0, numpy.int64)
+                mask = numpy.frombuffer(missing, dtype=numpy.int8) if missing else numpy.zeros(0, numpy.int8)
+                column = numpy.ma.MaskedArray(values, mask=mask.view(bool), copy=False)
+            elif name in INT_FIELDS:
+                column = [None if m else v for v, m in zip(column, self._missing[name])]
+            elif numpy is not None and isinstance(column, DictionaryColumn):
+                codes = column.codes
+                codes = numpy.frombuffer(codes, dtype=numpy.intc) if codes else numpy.zeros(0, numpy.intc)
+                column = DictionaryColumn(codes, column.categories)
+            columns[name] = column
+
+        return FstatTable(columns)
+
+
+def _list(column):
+    """The values of a column as python objects"""
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        return column.tolist()
+
+    return column
+
+
+def _take(column, indexes):
+    """The rows of a column at indexes"""
+    if isinstance(column, DictionaryColumn):
+        return DictionaryColumn(_take(column.codes, indexes), column.categories)
+
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        return column[indexes]
+
+    if isinstance(column, array.array):
+        return array.array(column.typecode, (column[i] for i in indexes))
+
+    return [column[i] for i in indexes]
+
+
+def _groups(column):
+    """The distinct values of a column and the index of the value of each row
+
+    :returns: tuple, list of keys and sequence of the group of each row
+    """
+    if isinstance(column, DictionaryColumn):
+        # -- Shift the codes so missing values are the first group
+        keys = [None] + list(column.categories)
+        if numpy is not None:
+            return keys, numpy.asarray(column.codes, dtype=numpy.intp) + 1
+
+        return keys, [code + 1 for code in column.codes]
+
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        # -- Like the codes, shift the groups so missing numbers are the first group
+        missing = numpy.ma.getmaskarray(column)
+        keys, groups = numpy.unique(numpy.ma.getdata(column), return_inverse=True)
+        groups = numpy.where(missing, 0, groups.reshape(-1) + 1)
+        return [None] + [k.item() for k in keys], groups
+
+    lookup = OrderedDict()
+    groups = [lookup.setdefault(value, len(lookup)) for value in column]
+
+    return list(lookup), groups
+
+
+def _aggregate(keys, groups, values, func):
+    """Aggregates values by group without NumPy
+
+    :returns: tuple, list of the number of rows and list of the aggregate of each group
+    """
+    counts = [0] * len(keys)
+    results = [None] * len(keys)
+    for index, group in enumerate(groups):
+        if values is None:
+            counts[group] += 1
+            continue
+        value = values[index]
+        if value is None:
+            continue
+        counts[group] += 1
+        current = results[group]
+        if current is None:
+            results[group] = value
+        elif func in ('sum', 'mean'):
+            results[group] = current + value
+        elif func == 'min':
+            results[group] = min(current, value)
+        else:
+            results[group] = max(current, value)
+
+    if func == 'count':
+        results = counts
+    elif func == 'mean':
+        results = [float(r) / c if c else None for r, c in zip(results, counts)]
+
+    return counts, results
@@ -14,7 +14,8 @@ history = open('HISTORY.rst').read().replace('.. :changelog:', '')
 
 requirements = [
     'path.py==8.1.1',
-    'six==1.10.0'
+    'six==1.10.0',
+    'futures==3.1.1; python_version < "3.2"',
 ]
 
 test_requirements = [
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+conftest
+----------------------------------
+
+Fixtures that run :class:`perforce.Connection` against the fake ``p4`` executable in ``tests/p4.py``.
+"""
+
+import os
+import subprocess
+
+import pytest
+
+from perforce.models import Connection
+
+
+FAKE_P4 = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'p4.py')
+
+
+@pytest.fixture
+def fake_p4(tmpdir, monkeypatch):
+    """Path to the fake p4 executable with a fresh depot state"""
+    monkeypatch.setenv('FAKE_P4_STATE', str(tmpdir.join('state.json')))
+    monkeypatch.setenv('FAKE_P4_FILES', '100')
+    return FAKE_P4
+
+
+@pytest.fixture(params=[False, True], ids=['spawn', 'persistent'])
+def connection(request, fake_p4):
+    """A connection to the fake depot, in both spawn-per-command and persistent mode"""
+    conn = Connection(executable=fake_p4, persistent=request.param)
+    yield conn
+    conn.close()
+
+
+class Calls(list):
+    """Arguments of the processes started, the :class:`subprocess.Popen` objects are in ``processes``"""
+    def __init__(self):
+        super(Calls, self).__init__()
+        self.processes = []
+
+    def commands(self, *names):
+        """The arguments of the processes that run one of the p4 commands"""
+        return [args for args in self if any(name in args for name in names)]
+
+
+def command(args):
+    """The p4 command and its arguments, without the global options before it"""
+    return args[args.index('-G') + 1:] if '-G' in args else args
+
+
+@pytest.fixture
+def popen(monkeypatch):
+    """Records every process started, see :class:`Calls`"""
+    calls = Calls()
+    original = subprocess.Popen
+
+    def record(args, *a, **kwargs):
+        calls.append(list(args))
+        calls.processes.append(original(args, *a, **kwargs))
+        return calls.processes[-1]
+
+    monkeypatch.setattr(subprocess, 'Popen', record)
+
+    return calls
@@ -1 +1,673 @@
-"""Mock p4 executable for testing"""
\ No newline at end of file
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+p4
+----------------------------------
+
+A fake ``p4`` executable that serves a synthetic depot as ``-G`` marshal records.
+
+It understands enough of the command line client to drive :class:`perforce.Connection` without a server.
+The depot is described with environment variables:
+
+* ``FAKE_P4_FILES`` number of files in the depot (default 100)
+* ``FAKE_P4_LATENCY`` seconds spent "connecting" each time the process starts (default 0)
+* ``FAKE_P4_STATE`` json file used to keep opened files between invocations (optional)
+* ``FAKE_P4_ROOT`` root of the client workspace (default /fake/root)
+* ``FAKE_P4_CHANGE_SIZE`` number of files in each submitted change (default 1)
+* ``FAKE_P4_PRINT_CHUNK`` number of bytes in each chunk of ``print`` output (default 4096)
+* ``FAKE_P4_KEYWORDS`` comma separated indexes of ``text+k`` files, their ``$Id$`` is expanded in the workspace
+* ``P4IGNORE`` is reported by ``p4 set`` when it is set
+"""
+
+import os
+import sys
+import json
+import time
+import marshal
+import hashlib
+import fnmatch
+
+
+DEPOT_FILE = '//depot/dir{0:03d}/file{1:06d}.txt'
+CLIENT = 'fake_client'
+ROOT = os.getenv('FAKE_P4_ROOT', '/fake/root')
+USER = 'fake_user'
+PORT = 'fake:1666'
+DATE = '2017/07/03 21:04:32'
+#: Whether -G was passed
+MARSHAL = [False]
+
+
+def out(record):
+    """Writes a single record to stdout the same way ``p4 -G`` does"""
+    data = {}
+    for k, v in record.items():
+        if not isinstance(v, (int, bytes)):
+            v = v.encode('utf8')
+        data[k.encode('utf8')] = v
+    marshal.dump(data, sys.stdout.buffer, 0)
+
+
+def error(data, severity=3, generic=17):
+    out({'code': 'error', 'data': data, 'severity': severity, 'generic': generic})
+
+
+def message(data):
+    """Writes an info message, as a record with -G and as text without it"""
+    if MARSHAL[0]:
+        out({'code': 'info', 'data': data, 'level': 0})
+    else:
+        sys.stdout.write(data + '\n')
+
+
+def parse_form(text):
+    """Parses a spec form into a dict of field to value"""
+    form = {}
+    key = None
+    for line in text.splitlines():
+        if line.startswith('\t') and key:
+            form[key] = (form[key] + '\n' + line[1:]).lstrip('\n')
+        elif ':' in line and not line.startswith(' '):
+            key, value = line.split(':', 1)
+            form[key] = value.strip()
+    return form
+
+
+class Depot(object):
+    def __init__(self):
+        self.count = int(os.getenv('FAKE_P4_FILES', 100))
+        self.changeSize = int(os.getenv('FAKE_P4_CHANGE_SIZE', 1))
+        #: Number of submitted changes, change 1000 is the first
+        self.changeCount = (self.count + self.changeSize - 1) // self.changeSize
+        self.keywords = set(int(i) for i in os.getenv('FAKE_P4_KEYWORDS', '').split(',') if i)
+        self.statefile = os.getenv('FAKE_P4_STATE')
+        self.state = {'opened': {}, 'have': {}, 'changes': {}, 'next': 2000}
+        if self.statefile and os.path.exists(self.statefile):
+            with open(self.statefile) as fh:
+                self.state = json.load(fh)
+        self.loaded = json.dumps(self.state, sort_keys=True)
+
+    def save(self):
+        # -- Workers finish a batch after its output was read, an unchanged state must not overwrite newer ones
+        if self.statefile and json.dumps(self.state, sort_keys=True) != self.loaded:
+            # -- Replace the file in one step so other processes never read half of it
+            tmp = '{}.{}'.format(self.statefile, os.getpid())
+            with open(tmp, 'w') as fh:
+                json.dump(self.state, fh)
+            os.replace(tmp, self.statefile)
+
+    def depotFile(self, index):
+        return DEPOT_FILE.format(index % 100, index)
+
+    def index(self, depotFile):
+        try:
+            index = int(depotFile.rsplit('file', 1)[1].split('.')[0])
+        except (IndexError, ValueError):
+            return None
+        if 0 <= index < self.count and self.depotFile(index) == depotFile:
+            return index
+
+    def match(self, spec):
+        """Yields the indexes of every file matching a file spec"""
+        change = None
+        if '@=' in spec:
+            change = submitted(self, int(spec.split('@=')[1]))
+            if change is None:
+                return
+        spec = spec.split('#')[0].split('@')[0]
+        if spec.startswith(ROOT):
+            spec = '//depot' + spec[len(ROOT):]
+        if '...' in spec or '*' in spec:
+            pattern = spec.replace('...', '*')
+            for index in change if change is not None else range(self.count):
+                if fnmatch.fnmatchcase(self.depotFile(index), pattern):
+                    yield index
+        else:
+            index = self.index(spec)
+            if index is not None and (change is None or index in change):
+                yield index
+
+    def size(self, index):
+        return 100 + index * 37 % 10000
+
+    def content(self, index):
+        """The bytes of the head revision of a file, binary files are not valid utf8"""
+        if index % 7 == 0:
+            line = bytes(bytearray(range(128, 256)))
+        else:
+            line = (self.depotFile(index) + '\n').encode('utf8')
+        size = self.size(index)
+        data = (line * (size // len(line) + 1))[:size]
+        if index in self.keywords:
+            data = b'$Id$\n' + data[5:]
+        return data
+
+    def local(self, index):
+        """The bytes of the head revision of a file in the workspace, with its keywords expanded"""
+        data = self.content(index)
+        if index in self.keywords:
+            data = data.replace(b'$Id$', '$Id: {}#{} $'.format(self.depotFile(index), 1 + index % 5).encode('utf8'))
+        return data
+
+    def headType(self, index):
+        if index % 7 == 0:
+            return 'binary'
+        return 'text+k' if index in self.keywords else 'text'
+
+    def fstat(self, index, digest=False):
+        depotFile = self.depotFile(index)
+        head = 1 + index % 5
+        record = {
+            'code': 'stat',
+            'depotFile': depotFile,
+            'clientFile': ROOT + depotFile[len('//depot'):],
+            'isMapped': '',
+            'headAction': 'edit' if head > 1 else 'add',
+            'headType': self.headType(index),
+            'headTime': str(1500000000 + index),
+            'headRev': str(head),
+            'headChange': str(1000 + index // self.changeSize),
+            'headModTime': str(1499990000 + index),
+            'haveRev': str(self.state['have'].get(depotFile, head)),
+        }
+        opened = self.state['opened'].get(depotFile)
+        if opened:
+            record.update({
+                'action': opened['action'],
+                'change': opened['change'],
+                'type': record['headType'],
+                'actionOwner': USER,
+            })
+        if digest:
+            record['digest'] = hashlib.md5(self.content(index)).hexdigest().upper()
+            record['fileSize'] = str(self.size(index))
+
+        return record
+
+
+def fstat(depot, args):
+    digest = False
+    maximum = None
+    files = []
+    while args:
+        arg = args.pop(0)
+        if arg == '-Ol':
+            digest = True
+        elif arg == '-m':
+            maximum = int(args.pop(0))
+        elif arg in ('-F', '-T'):
+            args.pop(0)
+        else:
+            files.append(arg)
+
+    for spec in files:
+        found = False
+        for index in depot.match(spec):
+            found = True
+            out(depot.fstat(index, digest))
+            if maximum is not None:
+                maximum -= 1
+                if not maximum:
+                    return
+        if not found:
+            error('{} - no such file(s).\n'.format(spec), severity=2)
+
+
+def files(depot, args):
+    for spec in [a for a in args if not a.startswith('-')]:
+        found = False
+        for index in depot.match(spec):
+            found = True
+            record = depot.fstat(index)
+            out({'code': 'stat', 'depotFile': record['depotFile'], 'rev': record['headRev'],
+                 'change': record['headChange'], 'action': record['headAction'], 'type': record['headType'],
+                 'time': record['headTime']})
+        if not found:
+            error('{} - no such file(s).\n'.format(spec), severity=2)
+
+
+def sizes(depot, args):
+    summary = '-s' in args
+    for spec in [a for a in args if not a.startswith('-')]:
+        indexes = list(depot.match(spec))
+        if not indexes:
+            error('{} - no such file(s).\n'.format(spec), severity=2)
+            continue
+        records = [depot.fstat(index, digest=True) for index in indexes]
+        if summary:
+            out({'code': 'stat', 'path': spec, 'fileCount': str(len(records)),
+                 'fileSize': str(sum(int(r['fileSize']) for r in records))})
+            continue
+        for record in records:
+            out({'code': 'stat', 'depotFile': record['depotFile'], 'rev': record['headRev'],
+                 'fileSize': record['fileSize']})
+
+
+def opener(action):
+    def run(depot, args):
+        change = 'default'
+        if args[:1] == ['-c']:
+            change = args[1]
+            args = args[2:]
+        for spec in args:
+            found = False
+            for index in depot.match(spec):
+                found = True
+                depotFile = depot.depotFile(index)
+                depot.state['opened'][depotFile] = {'action': action, 'change': change}
+                out({
+                    'code': 'stat', 'depotFile': depotFile, 'clientFile': depot.fstat(index)['clientFile'],
+                    'workRev': str(1 + index % 5), 'action': action, 'type': 'text',
+                })
+            if not found:
+                error('{} - file(s) not on client.\n'.format(spec), severity=2)
+        depot.save()
+
+    return run
+
+
+def lock(depot, args):
+    if args[:1] == ['-c']:
+        args = args[2:]
+    for spec in args:
+        found = False
+        for index in depot.match(spec):
+            found = True
+            out({'code': 'stat', 'depotFile': depot.depotFile(index), 'clientFile': depot.fstat(index)['clientFile']})
+        if not found:
+            error('{} - file(s) not opened on this client.\n'.format(spec), severity=2)
+
+
+def move(depot, args):
+    change = 'default'
+    files = []
+    while args:
+        arg = args.pop(0)
+        if arg == '-c':
+            change = args.pop(0)
+        elif arg != '-f':
+            files.append(arg)
+
+    # -- Only existing depot files can be targets, so every move is forced
+    source, target = files
+    if depot.state['opened'].get(source, {}).get('action') != 'edit':
+        error('{} - file(s) not opened for edit.\n'.format(source), severity=2)
+        return
+    if depot.index(target) is None:
+        error('{} - no such file(s).\n'.format(target), severity=3)
+        return
+    depot.state['opened'][source] = {'action': 'move/delete', 'change': change}
+    depot.state['opened'][target] = {'action': 'move/add', 'change': change}
+    out({'code': 'stat', 'depotFile': target, 'fromFile': source, 'action': 'moved'})
+    depot.save()
+
+
+def revert(depot, args):
+    args = [a for a in args if a != '-a']
+    for spec in args:
+        found = False
+        for index in depot.match(spec):
+            depotFile = depot.depotFile(index)
+            opened = depot.state['opened'].pop(depotFile, None)
+            if opened:
+                found = True
+                # -- A reverted add or branch has no revision on the client
+                added = opened['action'] in ('add', 'move/add', 'branch')
+                out({'code': 'stat', 'depotFile': depotFile, 'haveRev': 'none' if added else str(1 + index % 5),
+                     'oldAction': opened['action'], 'action': 'reverted'})
+        if not found:
+            error('{} - file(s) not opened on this client.\n'.format(spec), severity=2)
+    depot.save()
+
+
+def have(depot, args):
+    for spec in args or ['//depot/...']:
+        found = False
+        for index in depot.match(spec):
+            depotFile = depot.depotFile(index)
+            rev = depot.state['have'].get(depotFile, 1 + index % 5)
+            if rev:
+                found = True
+                out({'code': 'stat', 'depotFile': depotFile, 'clientFile': '//{}/{}'.format(CLIENT, depotFile[8:]),
+                     'path': depot.fstat(index)['clientFile'], 'haveRev': str(rev)})
+        if not found:
+            error('{} - file(s) not on client.\n'.format(spec), severity=2)
+
+
+def sync(depot, args):
+    preview = '-n' in args
+    args = [a for a in args if a not in ('-f', '-s', '-n')]
+    for spec in args:
+        found = False
+        rev = None
+        if '#' in spec:
+            rev = spec.split('#')[1]
+        for index in depot.match(spec):
+            found = True
+            depotFile = depot.depotFile(index)
+            head = 1 + index % 5
+            depot.state['have'][depotFile] = int(rev) if rev else head
+            out({'code': 'stat', 'depotFile': depotFile, 'clientFile': depot.fstat(index)['clientFile'],
+                 'rev': str(depot.state['have'][depotFile]), 'action': 'deleted' if rev == '0' else 'updated',
+                 'fileSize': str(depot.size(index))})
+        if not found:
+            error('{} - no such file(s).\n'.format(spec), severity=2)
+    if not preview:
+        depot.save()
+
+
+def p4print(depot, args):
+    """Prints the content in chunks followed by an empty chunk, like p4 does"""
+    size = int(os.getenv('FAKE_P4_PRINT_CHUNK', 4096))
+    for spec in [a for a in args if not a.startswith('-')]:
+        found = False
+        for index in depot.match(spec):
+            found = True
+            record = depot.fstat(index)
+            out({'code': 'stat', 'depotFile': record['depotFile'], 'rev': record['headRev'],
+                 'change': record['headChange'], 'action': record['headAction'], 'type': record['headType'],
+                 'time': record['headTime'], 'fileSize': str(depot.size(index))})
+            content = depot.content(index)
+            code = 'binary' if record['headType'] == 'binary' else 'text'
+            for start in range(0, len(content), size):
+                out({'code': code, 'data': content[start:start + size]})
+            out({'code': code, 'data': b''})
+        if not found:
+            error('{} - no such file(s).\n'.format(spec), severity=2)
+
+
+def opened(depot, args):
+    change = None
+    if args[:1] == ['-c']:
+        change = args[1]
+        args = args[2:]
+    found = set()
+    for depotFile, data in sorted(depot.state['opened'].items()):
+        if change is not None and data['change'] != change:
+            continue
+        index = depot.index(depotFile)
+        specs = [spec for spec in args if index in depot.match(spec)]
+        if args and not specs:
+            continue
+        found.update(specs)
+        out({'code': 'stat', 'depotFile': depotFile, 'clientFile': depot.fstat(index)['clientFile'],
+             'rev': str(1 + index % 5), 'haveRev': str(1 + index % 5), 'action': data['action'],
+             'change': data['change'], 'type': 'text', 'user': USER, 'client': CLIENT})
+    for spec in args:
+        if spec not in found:
+            error('{} - file(s) not opened on this client.\n'.format(spec), severity=2)
+
+
+def submitted(depot, number):
+    """The indexes of the files a submitted change added the head revision of, or None"""
+    index = number - 1000
+    if 0 <= index < depot.changeCount:
+        return range(index * depot.changeSize, min(depot.count, (index + 1) * depot.changeSize))
+
+
+def change_record(depot, number):
+    number = str(number)
+    if number in depot.state['changes']:
+        data = depot.state['changes'][number]
+        return {'change': number, 'desc': data['desc'], 'status': data['status'], 'user': USER,
+                'client': CLIENT, 'time': '1499115872'}
+    indexes = submitted(depot, int(number))
+    if indexes is not None:
+        return {'change': number, 'desc': 'Submitted {}\n'.format(depot.depotFile(indexes[0])),
+                'status': 'submitted', 'user': USER, 'client': CLIENT, 'time': str(1500000000 + indexes[0])}
+
+
+def change(depot, args):
+    if args[:1] == ['-o']:
+        if len(args) == 1:
+            out({'code': 'stat', 'Change': 'new', 'Client': CLIENT, 'User': USER, 'Status': 'new',
+                 'Description': '<enter description here>\n'})
+            return
+        record = change_record(depot, args[1])
+        if record is None:
+            error('Change {} unknown.\n'.format(args[1]), severity=3)
+            return
+        form = {'code': 'stat', 'Change': record['change'], 'Date': DATE, 'Client': CLIENT, 'User': USER,
+                'Status': record['status'], 'Description': record['desc']}
+        files = [f for f, d in sorted(depot.state['opened'].items()) if d['change'] == record['change']]
+        for i, f in enumerate(files):
+            form['Files{}'.format(i)] = f
+        out(form)
+    elif args[:1] == ['-i']:
+        form = parse_form(sys.stdin.read())
+        if form.get('Change', 'new') == 'new':
+            number = str(depot.state['next'])
+            depot.state['next'] += 1
+            depot.state['changes'][number] = {'desc': form.get('Description', '') + '\n', 'status': 'pending'}
+            message('Change {} created.'.format(number))
+        else:
+            number = form['Change']
+            depot.state['changes'][number]['desc'] = form.get('Description', '') + '\n'
+            message('Change {} updated.'.format(number))
+        depot.save()
+    elif args[:1] == ['-d']:
+        depot.state['changes'].pop(args[1], None)
+        depot.save()
+        message('Change {} deleted.'.format(args[1]))
+
+
+def counter(depot, args):
+    if args[:1] != ['change']:
+        error('Counter {} unknown.\n'.format(args[:1]), severity=3)
+        return
+    # -- The change counter is the newest change number, submitted or pending
+    value = max(1000 + depot.changeCount - 1, depot.state['next'] - 1)
+    out({'code': 'stat', 'counter': 'change', 'value': str(value)})
+
+
+def changes(depot, args):
+    status = None
+    maximum = None
+    full = False
+    owners = {}
+    files = []
+    while args:
+        arg = args.pop(0)
+        if arg == '-s':
+            status = args.pop(0)
+        elif arg == '-m':
+            maximum = int(args.pop(0))
+        elif arg == '-l':
+            full = True
+        elif arg in ('-c', '-u'):
+            owners['client' if arg == '-c' else 'user'] = args.pop(0)
+        elif not arg.startswith('-'):
+            files.append(arg)
+
+    low, high = 0, None
+    for spec in files:
+        if '@' in spec:
+            revs = spec.split('@', 1)[1].replace('@', '').split(',')
+            low = int(revs[0]) if len(revs) > 1 else 0
+            high = int(revs[-1].lstrip('<=')) if revs[-1] != 'now' else None
+
+    numbers = list(range(1000, 1000 + depot.changeCount))
+    for number in depot.state['changes']:
+        # -- Like p4, a file spec only lists pending changes with files opened under it
+        opened = [f for f, d in depot.state['opened'].items() if d['change'] == number]
+        patterns = [spec.split('@')[0].replace('...', '*') for spec in files]
+        if not files or any(fnmatch.fnmatchcase(f, p) for f in opened for p in patterns):
+            numbers.append(int(number))
+    for number in sorted(numbers, reverse=True):
+        if number < low or (high is not None and number > high):
+            continue
+        record = change_record(depot, number)
+        if status and record['status'] != status:
+            continue
+        if any(record[k] != v for k, v in owners.items()):
+            continue
+        if not full:
+            # -- Like p4, descriptions are truncated without -l
+            record['desc'] = record['desc'][:31]
+        record['code'] = 'stat'
+        out(record)
+        if maximum is not None:
+            maximum -= 1
+            if not maximum:
+                return
+
+
+def describe(depot, args):
+    args = [a for a in args if not a.startswith('-')]
+    for number in args:
+        record = change_record(depot, number)
+        if record is None:
+            error('Change {} unknown.\n'.format(number), severity=3)
+            continue
+        record['code'] = 'stat'
+        indexes = submitted(depot, int(number))
+        if indexes is not None:
+            files = [(depot.depotFile(index), 1 + index % 5) for index in indexes]
+        else:
+            files = [(f, 1) for f, d in sorted(depot.state['opened'].items()) if d['change'] == number]
+        for i, (depotFile, rev) in enumerate(files):
+            record['depotFile{}'.format(i)] = depotFile
+            record['rev{}'.format(i)] = str(rev)
+            record['action{}'.format(i)] = 'edit'
+            record['type{}'.format(i)] = 'text'
+        out(record)
+
+
+def submit(depot, args):
+    number = args[1]
+    depot.state['changes'][number]['status'] = 'submitted'
+    for depotFile, data in list(depot.state['opened'].items()):
+        if data['change'] == number:
+            del depot.state['opened'][depotFile]
+    depot.save()
+    message('Change {} submitted.'.format(number))
+
+
+def client(depot, args):
+    if args[:1] == ['-i']:
+        message('Client {} saved.'.format(parse_form(sys.stdin.read()).get('Client', CLIENT)))
+        return
+    name = args[-1] if len(args) > 1 else CLIENT
+    out({'code': 'stat', 'Client': name, 'Update': DATE, 'Access': DATE, 'Owner': USER, 'Host': '',
+         'Description': 'Created by {}.\n'.format(USER), 'Root': ROOT, 'Options': 'noallwrite noclobber',
+         'SubmitOptions': 'submitunchanged', 'LineEnd': 'local',
+         'View0': '//depot/... //{}/...'.format(name),
+         'View1': '-//depot/dir099/... //{}/dir099/...'.format(name)})
+
+
+def stream(depot, args):
+    name = args[-1]
+    out({'code': 'stat', 'Stream': name, 'Update': DATE, 'Access': DATE, 'Owner': USER,
+         'Name': name.rsplit('/', 1)[-1], 'Parent': 'none', 'Type': 'mainline',
+         'Description': 'Created by {}.\n'.format(USER), 'Options': 'allsubmit unlocked toparent fromparent',
+         'Paths0': 'share ...', 'View0': '{}/... ...'.format(name)})
+
+
+def diff(depot, args):
+    """``diff -se``, the files that are not open and differ from their workspace file"""
+    for spec in [a for a in args if not a.startswith('-')]:
+        for index in depot.match(spec):
+            record = depot.fstat(index)
+            if record['depotFile'] in depot.state['opened'] or not os.path.exists(record['clientFile']):
+                continue
+            with open(record['clientFile'], 'rb') as fh:
+                if fh.read() != depot.local(index):
+                    out({'code': 'stat', 'depotFile': record['depotFile'], 'clientFile': record['clientFile'],
+                         'rev': record['haveRev'], 'type': record['headType']})
+
+
+def info(depot, args):
+    out({'code': 'stat', 'userName': USER, 'clientName': CLIENT, 'clientRoot': ROOT,
+         'serverAddress': PORT, 'serverVersion': 'P4D/FAKE/2017.1/0000000'})
+
+
+def p4set(depot, args):
+    sys.stdout.write('P4CLIENT={} (set)\nP4PORT={} (set)\nP4USER={} (set)\n'.format(CLIENT, PORT, USER))
+    if os.getenv('P4IGNORE'):
+        sys.stdout.write('P4IGNORE={}\n'.format(os.getenv('P4IGNORE')))
+
+
+COMMANDS = {
+    'info': info,
+    'fstat': fstat,
+    'diff': diff,
+    'files': files,
+    'have': have,
+    'sizes': sizes,
+    'edit': opener('edit'),
+    'add': opener('add'),
+    'delete': opener('delete'),
+    'lock': lock,
+    'unlock': lock,
+    'reopen': opener('edit'),
+    'revert': revert,
+    'sync': sync,
+    'opened': opened,
+    'print': p4print,
+    'change': change,
+    'changes': changes,
+    'counter': counter,
+    'move': move,
+    'describe': describe,
+    'submit': submit,
+    'client': client,
+    'stream': stream,
+}
+
+
+def main(argv):
+    argfile = None
+    batch = 128
+    while argv and argv[0].startswith('-'):
+        flag = argv.pop(0)
+        if flag in ('-u', '-p', '-c', '-z'):
+            argv.pop(0)
+        elif flag == '-x':
+            argfile = argv.pop(0)
+        elif flag == '-b':
+            batch = int(argv.pop(0))
+        elif flag == '-G':
+            MARSHAL[0] = True
+
+    latency = float(os.getenv('FAKE_P4_LATENCY', 0))
+    if latency:
+        time.sleep(latency)
+
+    if not argv:
+        sys.stderr.write('Usage: p4 [options] command [arg ...]\n')
+        return 1
+
+    command, args = argv[0], argv[1:]
+    if command == 'set':
+        p4set(None, args)
+        return 0
+
+    func = COMMANDS.get(command)
+    if func is None:
+        sys.stderr.write('Unknown command.  Try \'p4 help\' for info.\n')
+        return 1
+
+    if argfile is None:
+        func(Depot(), args)
+        return 0
+
+    fh = sys.stdin if argfile == '-' else open(argfile)
+    lines = []
+    while True:
+        line = fh.readline()
+        if line:
+            lines.append(line.rstrip('\r\n'))
+        if lines and (len(lines) >= batch or not line):
+            # -- Reload the state for every batch as other processes may have changed it
+            func(Depot(), args + lines)
+            sys.stdout.flush()
+            lines = []
+        if not line:
+            break
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_aio
+----------------------------------
+
+Tests for the asyncio `perforce.aio` module.
+"""
+
+import asyncio
+import marshal
+
+import pytest
+
+from perforce import aio
+from perforce import errors
+
+FILE = '//depot/dir003/file000003.txt'
+
+
+@pytest.fixture
+def conn(fake_p4):
+    return aio.AsyncConnection(executable=fake_p4, limit=4)
+
+
+def run(coro):
+    return asyncio.get_event_loop_policy().new_event_loop().run_until_complete(coro)
+
+
+def test_decoder():
+    data = b''.join(marshal.dumps({b'code': b'stat', b'n': i}, 0) for i in range(3))
+    decoder = aio.MarshalDecoder()
+    records = []
+    for i in range(0, len(data), 7):
+        records += decoder.feed(data[i:i + 7])
+
+    assert [r[b'n'] for r in records] == [0, 1, 2]
+    assert decoder.pending == 0
+
+
+def test_decoder_large_record():
+    data = marshal.dumps({b'code': b'stat', b'data': b'x' * 100000}, 0)
+    decoder = aio.MarshalDecoder()
+    records = []
+    for i in range(0, len(data), 100):
+        records += decoder.feed(data[i:i + 100])
+    records += decoder.flush()
+
+    assert len(records) == 1
+    assert len(records[0][b'data']) == 100000
+    assert decoder.pending == 0
+
+
+def test_run(conn):
+    assert run(aio.info(conn))['clientName'] == 'fake_client'
+    assert len(run(conn.run(['fstat', '//depot/dir00.../...']))) == 10
+
+    conn.level = 2
+    with pytest.raises(errors.CommandError):
+        run(conn.run(['fstat', '//depot/missing.txt']))
+
+
+def test_iter_run(conn, monkeypatch):
+    monkeypatch.setenv('FAKE_P4_FILES', '5000')
+
+    async def first():
+        async for record in conn.iter_run(['fstat', '//depot/...']):
+            return record['depotFile']
+
+    assert run(first()) == '//depot/dir000/file000000.txt'
+
+
+def test_ls(conn):
+    async def ls():
+        files = ['//depot/dir{0:03d}/file{0:06d}.txt'.format(i) for i in range(20)]
+        return await asyncio.gather(conn.ls(files), conn.ls('foo'), conn.ls(FILE))
+
+    revs, missing, single = run(ls())
+    assert len(revs) == 20
+    assert isinstance(revs[0], aio.AsyncRevision)
+    assert missing == []
+    assert single[0].depotFile == FILE
+
+
+def test_create_revision(conn):
+    rev = run(aio.AsyncRevision.create(FILE, conn))
+    assert rev.depotFile == FILE
+    assert rev.revision > 0
+
+    with pytest.raises(ValueError):
+        aio.AsyncRevision(FILE, conn)
+
+
+def test_revision(conn):
+    async def edit():
+        rev = (await conn.ls(FILE))[0]
+        await rev.edit()
+        action = rev.action
+        await rev.revert()
+        return action, rev.action
+
+    assert run(edit()) == ('edit', None)
+
+    run(aio.edit(FILE, conn))
+    assert conn.connection.ls(FILE)[0].action == 'edit'
+
+
+def test_changelist(conn):
+    async def changelist():
+        cl = await aio.changelist('testing', conn)
+        assert cl.description == 'testing'
+        await cl.append(FILE)
+        await cl.save()
+
+        found = await conn.findChangelist('testing')
+        assert found == cl
+        assert len(found) == 1
+        assert (await found[0].queryChangelist()) == cl
+
+        default = await conn.findChangelist()
+        assert len(default) == 0
+
+        await cl.delete()
+        assert len(cl) == 0
+
+    run(changelist())
+
+    with pytest.raises(errors.ChangelistError):
+        len(aio.AsyncChangelist(1, conn))
+
+    # -- Pending changelists are not looked up or created without a client
+    conn.connection._client = None
+    with pytest.raises(errors.ChangelistError):
+        run(conn.findChangelist('testing'))
+    with pytest.raises(errors.ChangelistError):
+        run(aio.AsyncChangelist.create('testing', conn))
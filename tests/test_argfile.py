@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_argfile
+----------------------------------
+
+Tests for running long file lists with a ``p4 -x`` argument file.
+"""
+
+import os
+
+import pytest
+
+from perforce import models
+
+FILE = '//depot/dir{0:03d}/file{1:06d}.txt'
+
+
+@pytest.fixture(autouse=True)
+def limit(monkeypatch):
+    monkeypatch.setattr(models, 'argument_limit', lambda: 1000)
+
+
+def test_ls(fake_p4, popen, monkeypatch):
+    monkeypatch.setenv('FAKE_P4_FILES', '3000')
+    c = models.Connection(executable=fake_p4)
+    files = [FILE.format(i % 100, i) for i in range(2500)] + ['//depot/missing.txt']
+
+    revs = c.ls(files)
+    assert [r.depotFile for r in revs] == files[:-1]
+
+    fstat = popen.commands('fstat')
+    assert len(fstat) == 1
+    argfile = fstat[0][fstat[0].index('-x') + 1]
+    assert not os.path.exists(argfile)
+
+    # -- Short lists stay on the command line
+    assert len(c.ls(files[:3])) == 3
+    assert '-x' not in popen[-1]
+
+
+def test_fallback(fake_p4, popen, monkeypatch):
+    def fail(files):
+        raise IOError('read only')
+
+    monkeypatch.setattr(models, '_writeArgfile', fail)
+    c = models.Connection(executable=fake_p4)
+    files = [FILE.format(i, i) for i in range(100)]
+
+    assert len(c.ls(files)) == 100
+    fstat = popen.commands('fstat')
+    assert len(fstat) > 1
+    assert all('-x' not in args for args in fstat)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_bulk
+----------------------------------
+
+Tests for the bulk file operations of `Connection`.
+"""
+
+import pytest
+
+from perforce import models
+from tests.conftest import command
+
+FILE = '//depot/dir{0:03d}/file{0:06d}.txt'
+
+
+@pytest.fixture
+def c(fake_p4, monkeypatch):
+    monkeypatch.setenv('FAKE_P4_FILES', '500')
+    return models.Connection(executable=fake_p4)
+
+
+def test_edit_revert(c, popen, monkeypatch):
+    monkeypatch.setattr(models, 'argument_limit', lambda: 1000)
+    revs = c.ls([FILE.format(i) for i in range(300)])
+    del popen[:]
+
+    assert c.edit(revs) == revs
+    assert all(rev.action == 'edit' for rev in revs)
+    assert [command(args)[-1] for args in popen] == ['edit', 'fstat']
+
+    cl = c.findChangelist('bulk')
+    c.edit(revs[:5], changelist=cl)
+    assert command(popen[-2])[0] == 'reopen'
+    assert revs[0].changelist.change == cl.change
+
+    del popen[:]
+    c.lock(revs)
+    assert c.revert(revs) == revs
+    assert all(rev.action is None for rev in revs)
+    assert len(popen) == 4
+
+
+def test_paths(c):
+    revs = c.sync([FILE.format(i) for i in range(3)] + ['//depot/missing.txt'], revision=1)
+    assert [rev.revision for rev in revs] == [1, 1, 1]
+
+    revs = c.delete(revs)
+    assert all(rev.action == 'delete' for rev in revs)
+
+
+def test_move(c, popen):
+    revs = c.ls([FILE.format(i) for i in range(3)])
+    revs[0].edit()
+    del popen[:]
+
+    dests = [FILE.format(i) for i in range(10, 13)]
+    assert c.move(revs, dests, force=True) == revs
+    assert [str(rev.depotFile) for rev in revs] == dests
+    assert all(rev.action == 'move/add' for rev in revs)
+    assert [command(args)[0] for args in popen] == ['edit', '-x', 'fstat']
+
+    with pytest.raises(ValueError):
+        c.move(revs, dests[:1])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_cache
+----------------------------------
+
+Tests for the fstat cache of `Connection`.
+"""
+
+import pytest
+
+from perforce.models import Connection
+from perforce.cache import FstatCache
+from perforce import errors
+
+FILE = '//depot/dir003/file000003.txt'
+MISSING = '//depot/missing.txt'
+
+
+def test_hits(fake_p4, popen):
+    c = Connection(executable=fake_p4, cache=FstatCache(interval=None))
+
+    rev = c.ls(FILE)[0]
+    for _ in range(10):
+        assert c.ls(FILE)[0].depotFile == FILE
+        assert len(rev) == len(c.ls(FILE)[0])
+        assert c.ls(MISSING) == []
+
+    assert len(popen.commands('fstat')) == 3
+    assert c.cache.hits == 39
+
+    # -- Callers get their own copy of a record
+    rev._p4dict['action'] = 'edit'
+    assert c.ls(FILE)[0].action is None
+
+    c.level = 2
+    with pytest.raises(errors.CommandError):
+        c.ls(MISSING, silent=False)
+
+
+def test_invalidate(fake_p4, popen):
+    c = Connection(executable=fake_p4, cache=FstatCache(interval=None))
+
+    rev = c.ls(FILE)[0]
+    rev.edit()
+    assert rev.action == 'edit'
+    assert c.ls(FILE)[0].action == 'edit'
+    rev.revert()
+    assert c.ls(FILE)[0].action is None
+    # -- Revision.query() and ls() use different flags and are cached separately
+    assert len(popen.commands('fstat')) == 5
+
+    c.run(['sync', '//depot/...'])
+    c.ls(FILE)
+    assert len(popen.commands('fstat')) == 6
+
+
+def test_expiry(fake_p4, popen):
+    c = Connection(executable=fake_p4, cache=FstatCache(ttl=0, interval=None))
+    c.ls(FILE)
+    c.ls(FILE)
+    assert len(popen.commands('fstat')) == 2
+
+    cache = FstatCache(size=2, interval=None)
+    c = Connection(executable=fake_p4, cache=cache)
+    files = ['//depot/dir{0:03d}/file{0:06d}.txt'.format(i) for i in range(3)]
+    for f in files:
+        c.ls(f)
+    assert files[0] not in cache
+    assert files[2] in cache
+
+
+def test_counter(fake_p4, popen):
+    c = Connection(executable=fake_p4, cache=FstatCache(interval=0))
+    c.ls(FILE)
+    c.ls(FILE)
+    assert len(popen.commands('fstat')) == 1
+
+    # -- Another client creates a change
+    Connection(executable=fake_p4).run(['change', '-i'], stdin='Change: new\n\nDescription:\n\ttest\n')
+    c.ls(FILE)
+    assert len(popen.commands('fstat')) == 2
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_changelist_pages
+----------------------------------
+
+Tests for paged loading of the files of submitted changelists.
+"""
+
+import pytest
+
+from perforce.models import Changelist, FileCollection, Revision
+
+
+@pytest.fixture
+def changes(monkeypatch):
+    monkeypatch.setenv('FAKE_P4_CHANGE_SIZE', '50')
+
+
+def test_len_without_files(changes, connection, popen):
+    cl = Changelist(1001, connection)
+    del popen[:]
+
+    assert len(cl) == 50
+    assert len(cl) == 50
+    assert cl._files is None
+    assert len(popen.commands('sizes')) <= 1
+    assert popen.commands('files', 'fstat', 'describe') == []
+
+
+def test_iter_files_pages(changes, fake_p4, popen):
+    from perforce.models import Connection
+
+    connection = Connection(executable=fake_p4)
+    cl = Changelist(1001, connection)
+    del popen[:]
+
+    revs = list(cl.iter_files(page=10))
+    assert len(revs) == 50
+    assert all(isinstance(r, Revision) for r in revs)
+    assert [r.depotFile for r in revs[:2]] == ['//depot/dir050/file000050.txt', '//depot/dir051/file000051.txt']
+    assert cl._files is None
+    assert len(popen.commands('fstat')) == 5
+    assert popen.commands('files', 'sizes', 'fstat', 'describe') == popen.commands('files') + popen.commands('fstat')
+
+    assert [r.depotFile for r in cl] == [r.depotFile for r in revs]
+
+
+def test_query_pages(changes, connection, popen):
+    cl = Changelist(1000, connection)
+    del popen[:]
+
+    cl.query()
+    assert isinstance(cl._files, FileCollection)
+    assert len(cl) == 50
+    assert connection.ls('//depot/dir010/file000010.txt')[0] in cl
+    assert popen.commands('describe') == []
+
+    # -- Loaded files are iterated without querying the server again
+    del popen[:]
+    assert len(list(cl.iter_files())) == 50
+    assert popen == []
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_changes
+----------------------------------
+
+Tests for the paged `Connection.changes` history iterator.
+"""
+
+import itertools
+
+from perforce.models import Changelist
+
+
+def test_changes_pages(connection, popen):
+    changes = list(connection.changes(page=10))
+
+    assert [cl.change for cl in changes] == list(range(1099, 999, -1))
+    assert all(isinstance(cl, Changelist) for cl in changes)
+    assert changes[0].status == 'submitted'
+    commands = popen.commands('changes', 'change')
+    assert len(commands) == 11
+    assert commands[0][-1] == '//...'
+    assert commands[1][-1] == '//...@1089'
+
+
+def test_changes_resume(connection):
+    expected = [cl.change for cl in connection.changes(page=7)]
+
+    first = list(itertools.islice(connection.changes(page=7), 25))
+    rest = list(connection.changes(page=7, cursor=first[-1].change))
+    assert [cl.change for cl in first + rest] == expected
+
+    assert [cl.change for cl in connection.changes(page=4, cursor=1010, low=1003)] == list(range(1009, 1002, -1))
+    assert len(list(connection.changes(low=1090))) == 10
+    assert list(connection.changes(cursor=1000)) == []
+
+
+def test_changes_filters(connection):
+    connection.findChangelist('history')
+
+    pending = list(connection.changes(None, status='pending'))
+    assert [cl.description for cl in pending] == ['history']
+    assert list(connection.changes(user='someone_else')) == []
+    assert len(list(connection.changes(client=connection.client))) == 100
+    assert len(list(connection.changes(None, client=connection.client))) == 101
+
+
+def test_changes_pending_pages(connection, popen):
+    empty = connection.findChangelist('empty')
+    opened = connection.findChangelist('opened')
+    connection.ls('//depot/dir000/file000000.txt')[0].edit(opened)
+    newest = connection.findChangelist('newest')
+    del popen[:]
+
+    # -- Later pages need a file spec, which only lists pending changes with files
+    pending = list(connection.changes(None, status='pending', page=1))
+    assert [cl.change for cl in pending] == [newest.change, opened.change]
+    commands = popen.commands('changes')
+    assert commands[0][-1] == 'pending'
+    assert commands[1][-1] == '//...@{}'.format(newest.change - 1)
+    assert commands[2][-1] == '//...@{}'.format(opened.change - 1)
+
+    pending = list(connection.changes(None, status='pending', page=0))
+    assert [cl.change for cl in pending] == [newest.change, opened.change, empty.change]
+    assert '-m' not in popen.commands('changes')[-1]
+
+    assert connection.findChangelist('empty') == empty
+
+
+def test_lazy_descriptions(connection, popen):
+    cl = next(connection.changes())
+    assert len(cl._p4dict['description']) == 31
+    del popen[:]
+
+    assert cl.description == 'Submitted //depot/dir099/file000099.txt'
+    assert cl.description == 'Submitted //depot/dir099/file000099.txt'
+    assert len(popen.commands('changes', 'change')) == 1 and 'change' in popen[-1]
+
+    cl = next(connection.changes(descriptions=True))
+    assert cl.description == 'Submitted //depot/dir099/file000099.txt'
+    assert '-l' in popen.commands('changes')[-1]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_collection
+----------------------------------
+
+Tests for `FileCollection` and `Changelist` membership.
+"""
+
+import pytest
+
+from perforce.models import FileCollection, Revision
+
+FILES = ['//depot/dir{0:03d}/file{0:06d}.txt'.format(i) for i in range(20)]
+
+
+def test_revision_identity(connection):
+    revs = connection.ls(FILES[:2])
+    again = connection.ls(FILES[:2])
+
+    assert revs[0] == again[0]
+    assert revs[0] != again[1]
+    assert len({revs[0], again[0], revs[1]}) == 2
+    assert revs[0] != FILES[0]
+
+
+def test_collection(connection):
+    revs = connection.ls(FILES)
+    files = FileCollection(revs)
+
+    assert len(files) == 20
+    assert list(files) == revs
+    assert revs[3] in files
+    assert FILES[3] in files
+    assert files['/fake/root/dir003/file000003.txt'] is revs[3]
+    assert files[FILES[4]] is revs[4]
+    assert files[-1] is revs[-1]
+    assert list(files[:2]) == revs[:2]
+
+    files.append(connection.ls(FILES[0])[0])
+    assert len(files) == 20
+
+    files.remove(revs[3])
+    assert revs[3] not in files
+    assert '/fake/root/dir003/file000003.txt' not in files
+    with pytest.raises(ValueError):
+        files.remove(revs[3])
+    with pytest.raises(KeyError):
+        files[FILES[3]]
+
+    revs[5].edit()
+    assert [len(v) for v in files.byAction().values()] == [18, 1]
+
+
+def test_sequence(connection):
+    revs = connection.ls(FILES)
+    files = FileCollection(revs)
+
+    assert files[0] is revs[0]
+    ordered = files._ordered()
+    assert files[1] is revs[1]
+    assert files._ordered() is ordered
+
+    files.remove(revs[0])
+    assert files[0] is revs[1]
+    assert files._ordered() is not ordered
+
+    files.append(revs[0])
+    assert files[-1] is revs[0]
+    assert list(files) == revs[1:] + revs[:1]
+
+    revs[2]._p4dict['clientFile'] = '/fake/root/moved.txt'
+    files.reindex()
+    assert files[1] is revs[2]
+    assert files['/fake/root/moved.txt'] is revs[2]
+
+
+def test_changelist(connection):
+    cl = connection.findChangelist('collection')
+    for rev in connection.ls(FILES):
+        cl.append(rev)
+
+    assert len(cl) == 20
+    assert isinstance(cl._files, FileCollection)
+    assert connection.ls(FILES[7])[0] in cl
+    assert isinstance(cl[0], Revision)
+
+    cl.remove(cl[FILES[7]], permanent=True)
+    assert len(cl) == 19
+    assert cl.query() is None
+    assert len(cl) == 20
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_compact
+----------------------------------
+
+Tests for `CompactRevision`.
+"""
+
+import pytest
+
+from perforce.models import CompactRevision
+
+FILES = ['//depot/dir{0:03d}/file{0:06d}.txt'.format(i) for i in range(10)]
+PROPERTIES = ('depotFile', 'clientFile', 'isMapped', 'isShelved', 'revision', 'action', 'type', 'isResolved',
+              'openedBy', 'lockedBy', 'isLocked', 'isSynced', 'isEdit')
+
+
+def test_properties(connection):
+    revs = connection.ls(FILES)
+    compact = connection.ls(FILES, compact=True)
+
+    for rev, other in zip(revs, compact):
+        assert isinstance(other, CompactRevision)
+        for name in PROPERTIES:
+            assert getattr(rev, name) == getattr(other, name)
+        assert dict(rev._p4dict) == dict(other._p4dict)
+        assert rev.head.revision == other.head.revision
+        assert rev.head.time == other.head.time
+        assert len(rev) == len(other)
+
+    assert not hasattr(compact[0], '__dict__')
+    assert compact[1]._schema is compact[2]._schema
+    assert compact[1]._shared is connection.ls(FILES[1], compact=True)[0]._shared
+    assert type(compact[0].depotFile) is str
+
+
+def test_operations(connection):
+    rev = next(connection.iter_ls(FILES[3], compact=True))
+    rev.edit()
+    assert rev.action == 'edit'
+    assert rev.type == 'text'
+    rev.revert()
+    assert rev.action is None
+
+    rev._p4dict['movedFile'] = FILES[4]
+    assert rev._p4dict['movedFile'] == FILES[4]
+    assert rev.depotFile == FILES[3]
+    del rev._p4dict['movedFile']
+    with pytest.raises(KeyError):
+        rev._p4dict['movedFile']
+
+    assert CompactRevision(FILES[5], connection).revision == 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_environment
+----------------------------------
+
+Tests for the cached `p4 set` environment.
+"""
+
+import os
+import time
+import subprocess
+
+import pytest
+
+from perforce import models
+from perforce.models import Connection
+
+
+@pytest.fixture
+def calls(fake_p4, monkeypatch):
+    models.clear_environment_cache()
+    calls = []
+    check_output = subprocess.check_output
+
+    def record(args, **kwargs):
+        calls.append(args)
+        return check_output(args, **kwargs)
+
+    monkeypatch.setattr(subprocess, 'check_output', record)
+    yield calls
+    models.clear_environment_cache()
+
+
+def test_cached(fake_p4, calls):
+    for _ in range(5):
+        c = Connection(executable=fake_p4)
+    assert str(c._client) == 'fake_client'
+    assert len(calls) == 1
+
+    models.clear_environment_cache()
+    Connection(executable=fake_p4)
+    assert len(calls) == 2
+
+
+def test_environment_variable(fake_p4, calls, monkeypatch):
+    Connection(executable=fake_p4)
+    monkeypatch.setenv('P4CHARSET', 'utf8')
+    Connection(executable=fake_p4)
+    Connection(executable=fake_p4)
+    assert len(calls) == 2
+
+
+def test_config_file(fake_p4, calls, monkeypatch, tmpdir):
+    monkeypatch.setenv('P4CONFIG', '.p4config')
+    monkeypatch.chdir(tmpdir)
+    Connection(executable=fake_p4)
+    Connection(executable=fake_p4)
+    assert len(calls) == 1
+
+    config = tmpdir.join('.p4config')
+    config.write('P4CLIENT=other\n')
+    Connection(executable=fake_p4)
+    assert len(calls) == 2
+
+    os.utime(str(config), (time.time() + 10, time.time() + 10))
+    Connection(executable=fake_p4)
+    assert len(calls) == 3
+
+    monkeypatch.chdir(tmpdir.mkdir('sub'))
+    Connection(executable=fake_p4)
+    Connection(executable=fake_p4)
+    assert len(calls) == 4
+
+
+def test_tickets(fake_p4, calls, monkeypatch, tmpdir):
+    tickets = tmpdir.join('tickets')
+    monkeypatch.setenv('P4TICKETS', str(tickets))
+    Connection(executable=fake_p4)
+    tickets.write('fake:1666=fake_user:ABC\n')
+    Connection(executable=fake_p4)
+    assert len(calls) == 2
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_identity
+----------------------------------
+
+Tests for the `IdentityMap` of `Connection`.
+"""
+
+import gc
+
+import pytest
+
+from perforce.identity import IdentityMap
+from perforce.models import CompactRevision, Default
+
+
+@pytest.fixture
+def shared(fake_p4):
+    from perforce.models import Connection
+
+    return Connection(executable=fake_p4, identity=True)
+
+
+def test_revisions(shared):
+    rev = shared.ls('//depot/dir001/file000001.txt')[0]
+    assert shared.ls('//depot/dir00...')[1] is rev
+    assert rev.action is None
+
+    shared.edit(shared.ls('//depot/dir001/file000001.txt'))
+    assert rev.action == 'edit'
+
+    # -- Another class replaces the known revision
+    compact = shared.ls('//depot/dir001/file000001.txt', compact=True)[0]
+    assert isinstance(compact, CompactRevision)
+    assert shared.ls('//depot/dir001/file000001.txt', compact=True)[0] is compact
+
+
+def test_changelists(shared, popen):
+    rev = shared.ls('//depot/dir001/file000001.txt')[0]
+    rev.edit()
+    default = rev.changelist
+    assert isinstance(default, Default)
+    assert rev.changelist is default
+
+    pending = shared.findChangelist('shared')
+    rev.edit(pending)
+    del popen[:]
+
+    cl = rev.changelist
+    assert cl is pending
+    assert popen.commands('change', 'opened', 'fstat', 'changes') == []
+    assert [c for c in shared.changes(None, status='pending')][0] is pending
+
+    other = shared.ls('//depot/dir001/file000001.txt')[0]
+    assert other is rev and other.changelist is pending
+
+
+def test_opened(shared):
+    rev = shared.ls('//depot/dir001/file000001.txt')[0]
+    pending = shared.findChangelist('opened')
+    rev.edit(pending)
+    shared.identity.discard(('change', pending.change))
+
+    # -- The opened records of the changelist only add to the fields of the known revision
+    cl = shared.findChangelist(pending.change)
+    assert cl is not pending
+    assert list(cl) == [rev] and list(cl)[0] is rev
+    assert rev.head.revision == 2
+    assert rev.revision == 2
+    assert rev.changelist.change == pending.change
+
+
+def test_unshared(fake_p4):
+    from perforce.models import Connection
+
+    connection = Connection(executable=fake_p4)
+    assert connection.identity is None
+    rev = connection.ls('//depot/dir001/file000001.txt')[0]
+    assert connection.ls('//depot/dir001/file000001.txt')[0] is not rev
+    rev.edit()
+    assert rev.changelist is not rev.changelist
+
+
+def test_retention():
+    class Obj(object):
+        pass
+
+    identity = IdentityMap(max_objects=2)
+    objs = [Obj() for _ in range(4)]
+    for index, obj in enumerate(objs):
+        identity.add(('depotFile', str(index)), obj)
+    assert identity.get(('depotFile', '0')) is objs[0]
+
+    # -- Only the two most recently used objects are kept alive once nothing else holds them
+    del objs[:], obj
+    gc.collect()
+    assert len(identity) == 2
+    assert ('depotFile', '0') in identity and ('depotFile', '3') in identity
+
+    identity.discard(('depotFile', '0'))
+    assert ('depotFile', '0') not in identity
+    identity.clear()
+    assert len(identity) == 0
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_import
+----------------------------------
+
+Tests that `import perforce` is lazy and has no side effects.
+"""
+
+import sys
+import subprocess
+
+import pytest
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='Lazy attributes need python 3.7')
+def test_lazy_import():
+    script = (
+        'import sys, logging, perforce\n'
+        'assert "perforce.models" not in sys.modules\n'
+        'assert "path" not in sys.modules\n'
+        'assert "logging.config" not in sys.modules\n'
+        'assert not logging.getLogger().handlers\n'
+        'perforce.Connection\n'
+        'assert "perforce.models" in sys.modules\n'
+        'assert perforce.edit is perforce.api.edit\n'
+    )
+    subprocess.check_call([sys.executable, '-c', script])
+
+
+def test_attributes():
+    import perforce
+
+    assert perforce.ErrorLevel.FAILED == 3
+    assert 'Connection' in dir(perforce)
+    with pytest.raises(AttributeError):
+        perforce.missing
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_index
+----------------------------------
+
+Tests for the SQLite `HaveIndex` of a connection.
+"""
+
+import pytest
+
+from perforce.models import Connection
+from perforce.index import HaveIndex
+
+FILE = '//depot/dir003/file000003.txt'
+
+
+@pytest.fixture(params=[False, True], ids=['spawn', 'persistent'])
+def indexed(request, fake_p4):
+    conn = Connection(executable=fake_p4, persistent=request.param, index=True)
+    yield conn
+    conn.close()
+
+
+def test_seed(indexed, popen):
+    assert isinstance(indexed.index, HaveIndex)
+    assert len(indexed.index) == 100
+    assert indexed.index.haveRev(FILE) == 4
+    assert FILE in indexed.index
+    assert '//depot/missing.txt' not in indexed.index
+    assert len(popen.commands('have')) == 1
+
+
+def test_updates(indexed, popen):
+    index = indexed.index
+    assert index.haveRev(FILE) == 4
+
+    indexed.run(['sync', FILE + '#2'])
+    assert index.haveRev(FILE) == 2
+    assert index.outdated({FILE: 4, '//depot/dir004/file000004.txt': 5}) == [FILE]
+
+    indexed.edit(FILE)
+    assert index.get(FILE)['action'] == 'edit'
+    indexed.revert(FILE)
+    assert index.get(FILE)['action'] is None
+
+    # -- A reverted add is no longer on the client
+    indexed.run(['add', '//depot/dir005/file000005.txt'])
+    assert index.get('//depot/dir005/file000005.txt')['action'] == 'add'
+    indexed.revert('//depot/dir005/file000005.txt')
+    assert '//depot/dir005/file000005.txt' not in index
+
+    indexed.run(['sync', FILE + '#0'])
+    assert index.haveRev(FILE) is None
+
+    # -- Previews do not change the index
+    indexed.run(['sync', '-n', '//depot/dir004/file000004.txt#1'])
+    assert index.haveRev('//depot/dir004/file000004.txt') == 5
+    assert len(popen.commands('have')) == 1
+
+    # -- Commands without records are followed by a new seed
+    change = indexed.findChangelist('index')
+    indexed.run(['submit', '-c', str(change.change)], marshal_output=False)
+    assert index.haveRev(FILE) is None
+    assert len(popen.commands('have')) == 2
+
+
+def test_prefix(indexed):
+    entries = indexed.index.prefix('//depot/dir001/')
+    assert [e['depotFile'] for e in entries] == ['//depot/dir001/file000001.txt']
+    assert entries[0]['clientFile'] == '/fake/root/dir001/file000001.txt'
+    assert len(indexed.index.prefix('/fake/root/dir00')) == 10
+    assert indexed.index.prefix('//other/') == []
+
+
+def test_persisted(fake_p4, tmpdir, popen):
+    filename = str(tmpdir.join('have.db'))
+    conn = Connection(executable=fake_p4, index=filename)
+    conn.run(['sync', FILE + '#1'])
+    assert conn.index.haveRev(FILE) == 1
+    conn.run(['sync', FILE + '#3'])
+    conn.index.close()
+
+    del popen[:]
+    conn = Connection(executable=fake_p4, index=filename)
+    assert conn.index.haveRev(FILE) == 3
+    assert popen.commands('have') == []
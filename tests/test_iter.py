@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_iter
+----------------------------------
+
+Tests for the streaming `Connection.iter_run` and `Connection.iter_ls`.
+"""
+
+import types
+
+import pytest
+
+from perforce.models import Revision, chunk_files
+from perforce import errors
+
+
+def test_iter_run(connection, monkeypatch):
+    monkeypatch.setenv('FAKE_P4_FILES', '5000')
+
+    records = connection.iter_run(['fstat', '//depot/...'])
+    assert isinstance(records, types.GeneratorType)
+    assert next(records)['depotFile'] == '//depot/dir000/file000000.txt'
+    records.close()
+
+    assert len(connection.run(['fstat', '//depot/dir001/...'])) == 50
+
+
+def test_early_stop_kills_process(fake_p4, popen, monkeypatch):
+    from perforce.models import Connection
+
+    monkeypatch.setenv('FAKE_P4_FILES', '5000')
+    c = Connection(executable=fake_p4)
+
+    for i, _ in enumerate(c.iter_run(['fstat', '//depot/...'])):
+        if i == 10:
+            break
+
+    assert popen.processes[0].returncode is not None
+
+
+def test_iter_errors(connection):
+    connection.level = 2
+    with pytest.raises(errors.CommandError):
+        list(connection.iter_run(['fstat', '//depot/missing.txt']))
+
+
+def test_iter_ls(connection):
+    files = ('//depot/dir{0:03d}/file{0:06d}.txt'.format(i) for i in range(20))
+    revs = connection.iter_ls(files)
+    assert isinstance(next(revs), Revision)
+    assert len(list(revs)) == 19
+
+    assert list(connection.iter_ls('foo')) == []
+    with pytest.raises(errors.CommandError):
+        connection.level = 2
+        list(connection.iter_ls('//depot/missing.txt', silent=False))
+
+
+def test_chunk_files():
+    files = ['0' * 1001] * 8
+    chunks = list(chunk_files(files))
+    assert [len(c) for c in chunks] == [7, 1]
+    assert list(chunk_files(['0' * 9000, 'a'])) == [['0' * 9000], ['a']]
+    assert list(chunk_files([])) == []
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_mapping
+----------------------------------
+
+Tests for `perforce.mapping.Mapping` against recorded `p4 where` output.
+"""
+
+import pytest
+
+from perforce.mapping import Mapping, MapLine, parse_line
+from perforce.models import Client, FileSpec, Stream
+
+VIEW = [
+    '//depot/... //ws/...',
+    '-//depot/build/... //ws/build/...',
+    '//depot/build/release/... //ws/build/release/...',
+    '//depot/docs/*.txt //ws/text/*.txt',
+    '//depot/%%1/%%2.c //ws/src/%%2/%%1.c',
+    '+//other/overlay/... //ws/docs/...',
+    '"//depot/with space/..." "//ws/with space/..."',
+]
+
+#: depotFile and clientFile of `p4 where` for the view, None when the file is not in the client view
+WHERE = [
+    ('//depot/main.c', '//ws/main.c'),
+    ('//depot/build/out.o', None),
+    ('//depot/build/release/app.exe', '//ws/build/release/app.exe'),
+    ('//depot/docs/readme.txt', '//ws/text/readme.txt'),
+    ('//depot/docs/sub/a.md', '//ws/docs/sub/a.md'),
+    ('//depot/lib/util.c', '//ws/src/util/lib.c'),
+    ('//depot/src/util/lib.c', None),
+    ('//other/overlay/guide.md', '//ws/docs/guide.md'),
+    ('//depot/with space/a b.txt', '//ws/with space/a b.txt'),
+    ('//other/elsewhere.txt', None),
+]
+
+#: clientFile and depotFile of `p4 where` for client paths
+WHERE_CLIENT = [
+    ('//ws/main.c', '//depot/main.c'),
+    ('//ws/build/out.o', None),
+    ('//ws/docs/guide.md', '//other/overlay/guide.md'),
+    ('//ws/src/util/lib.c', '//depot/lib/util.c'),
+    ('//ws/text/readme.txt', '//depot/docs/readme.txt'),
+    ('//elsewhere/main.c', None),
+]
+
+
+@pytest.mark.parametrize('depotFile, clientFile', WHERE)
+def test_depot_to_client(depotFile, clientFile):
+    mapping = Mapping(VIEW)
+
+    assert mapping.translate(depotFile) == clientFile
+    assert (depotFile in mapping) == (clientFile is not None)
+
+
+@pytest.mark.parametrize('clientFile, depotFile', WHERE_CLIENT)
+def test_client_to_depot(clientFile, depotFile):
+    mapping = Mapping(VIEW)
+
+    assert mapping.translate(clientFile, reverse=True) == depotFile
+    assert mapping.includes(clientFile, reverse=True) == (depotFile is not None)
+
+
+def test_translate_all():
+    mapping = Mapping(VIEW)
+    depotFiles = [d for d, _ in WHERE]
+
+    assert list(mapping.translate_all(depotFiles)) == [c for _, c in WHERE]
+
+
+def test_case_sensitivity():
+    assert Mapping(VIEW).translate('//DEPOT/Main.c') is None
+    assert Mapping(VIEW, case_sensitive=False).translate('//DEPOT/Main.c') == '//ws/Main.c'
+    assert Mapping(VIEW, case_sensitive=False).translate('//depot/BUILD/out.o') is None
+
+
+def test_lines():
+    assert parse_line('-//depot/build/... //ws/build/...') == MapLine('-', '//depot/build/...', '//ws/build/...')
+    assert parse_line('"+//depot/a b/..." "//ws/a b/..."') == MapLine('+', '//depot/a b/...', '//ws/a b/...')
+    assert Mapping([FileSpec('//depot/...', '//ws/...')]).translate('//depot/a') == '//ws/a'
+    assert Mapping([]).translate('//depot/a') is None
+
+    with pytest.raises(ValueError):
+        parse_line('//depot/...')
+    with pytest.raises(ValueError):
+        Mapping(['//depot/*/... //ws/...'])
+
+
+def test_client_mapping(connection):
+    client = Client('fake_client', connection)
+    assert client.view == [FileSpec('//depot/...', '//fake_client/...'),
+                           FileSpec('-//depot/dir099/...', '//fake_client/dir099/...')]
+    assert client.mapping is client.mapping
+    assert client.mapping.translate('//depot/dir001/file000001.txt') == '//fake_client/dir001/file000001.txt'
+    assert client.mapping.translate('//depot/dir099/file000099.txt') is None
+
+    # -- Lines are in the numeric order of their keys
+    for i in range(12):
+        client._p4dict['view{}'.format(i)] = '//depot/{0}/... //fake_client/{0}/...'.format(i)
+    assert [spec.depot for spec in client.view] == ['//depot/{}/...'.format(i) for i in range(12)]
+
+    stream = Stream('//stream/main', connection)
+    assert stream.mapping.translate('//stream/main/a/b.txt') == 'a/b.txt'
+
+
+def test_case_handling(fake_p4, popen):
+    from perforce.models import Connection
+
+    client = Client('fake_client', Connection(executable=fake_p4))
+    assert len(client.view) == 2
+    assert popen.commands('info') == []
+
+    # -- The server is only asked once a path is translated
+    assert '//depot/dir001/file000001.txt' in client.mapping
+    assert client.mapping.caseSensitive
+    assert len(popen.commands('info')) == 1
+
+
+def test_prefix_views(monkeypatch):
+    from perforce import mapping as mappingmodule
+
+    view = ['//depot/... //ws/...', '-//depot/build/... //ws/build/...', '//depot/build/release/... //ws/rel/...',
+            '+//other/... //ws/docs/...']
+    paths = ['//depot/a.c', '//depot/build/a.o', '//depot/build/release/a.exe', '//other/x.md', '//depot/docs/a',
+             '//depot/rel/a', '//DEPOT/A.c', '//nowhere/a']
+    prefix = Mapping(view, case_sensitive=False)
+    assert isinstance(prefix._direction(False), mappingmodule._PrefixDirection)
+
+    monkeypatch.setattr(mappingmodule, 'PREFIX_LINES', 0)
+    regex = Mapping(view, case_sensitive=False)
+    assert isinstance(regex._direction(False), mappingmodule._Direction)
+
+    for reverse in (False, True):
+        assert list(prefix.translate_all(paths, reverse)) == list(regex.translate_all(paths, reverse))
+    assert prefix.translate('//depot/rel/a') is None
+    assert prefix.translate('//DEPOT/A.c') == '//ws/A.c'
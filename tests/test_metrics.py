@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_metrics
+----------------------------------
+
+Tests for the command observers of `Connection` and `perforce.metrics`.
+"""
+
+import json
+
+import pytest
+
+from perforce import errors
+from perforce.metrics import Histogram, MetricsCollector
+from perforce.models import CommandEvent, ErrorLevel
+
+
+def test_histogram():
+    histogram = Histogram((1, 2))
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value)
+
+    assert histogram.buckets == [(1, 2), (2, 3), (float('inf'), 4)]
+    assert histogram.count == 4 and histogram.sum == 6 and histogram.max == 3
+    assert histogram.mean == 1.5
+
+
+def test_observer(connection):
+    events = []
+    connection.add_observer(events.append)
+
+    connection.ls('//depot/dir00...')
+    connection.run(['fstat', '//depot/missing.txt'])
+    connection.level = ErrorLevel.WARN
+    with pytest.raises(errors.CommandError):
+        connection.run(['fstat', '//depot/missing.txt'])
+    connection.run(['info'], marshal_output=False)
+
+    connection.remove_observer(events.append)
+    connection.run(['info'])
+
+    assert [e.name for e in events] == ['fstat', 'fstat', 'fstat', 'info']
+    event = events[0]
+    assert isinstance(event, CommandEvent)
+    assert event.records == 10 and event.bytes > 0
+    assert 0 <= event.spawn <= event.firstRecord <= event.wall
+    assert event.level == ErrorLevel.EMPTY
+    assert events[1].level == events[2].level == ErrorLevel.WARN
+    assert events[3].records == 0 and events[3].bytes > 0 and events[3].firstRecord is None
+
+
+def test_failing_observer(connection):
+    def fail(event):
+        raise RuntimeError('observer')
+
+    connection.add_observer(fail)
+    assert len(connection.ls('//depot/dir00...')) == 10
+
+
+def test_collector(connection):
+    metrics = MetricsCollector(buckets=(0.001, 10))
+    connection.add_observer(metrics)
+    connection.ls('//depot/dir00...')
+    connection.ls('//depot/dir01...')
+    connection.run(['fstat', '//depot/missing.txt'])
+
+    assert metrics.commands == ['fstat']
+    assert metrics.histogram('fstat', 'wall').count == 3
+    assert metrics.counter('fstat', 'records') == 21
+    assert metrics.histogram('info', 'wall') is None
+
+    data = json.loads(metrics.to_json())
+    assert data['fstat']['counters']['commands'] == 3
+    assert data['fstat']['errors'] == {'2': 1}
+    assert data['fstat']['timings']['wall']['buckets'][-1] == [None, 3]
+
+    text = metrics.to_prometheus()
+    assert '# TYPE p4_command_wall_seconds histogram' in text
+    assert 'p4_command_wall_seconds_bucket{command="fstat",le="+Inf"} 3' in text
+    assert 'p4_command_wall_seconds_count{command="fstat"} 3' in text
+    assert 'p4_command_records_total{command="fstat"} 21' in text
+    assert 'p4_command_errors_total{command="fstat",level="2"} 1' in text
+
+    metrics.reset()
+    assert metrics.commands == []
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_pool
+----------------------------------
+
+Tests for `ConnectionPool`.
+"""
+
+import time
+import threading
+
+import pytest
+
+from perforce.models import Connection, Revision
+from perforce.pool import ConnectionPool
+from perforce import errors
+
+
+@pytest.fixture
+def pool(fake_p4):
+    with ConnectionPool(Connection(executable=fake_p4), max_workers=3) as pool:
+        yield pool
+
+
+def test_ls(pool):
+    files = ['//depot/dir{0:03d}/file{0:06d}.txt'.format(i) for i in range(100)]
+    revs = pool.ls(files * 40)
+    assert len(revs) == 4000
+    assert isinstance(revs[0], Revision)
+    assert [r.depotFile for r in revs[:100]] == files
+    assert pool.stats.completed > 1
+
+
+def test_sync(pool):
+    records = pool.sync(['//depot/dir001/...', '//depot/dir002/...'])
+    assert len(records) == 2
+    assert records[0]['action'] == 'updated'
+
+
+def test_changelists(pool):
+    cls = pool.changelists([1000, 1001, 1002], files=True)
+    assert [int(cl) for cl in cls] == [1000, 1001, 1002]
+    assert cls[1][0].depotFile == '//depot/dir001/file000001.txt'
+
+
+def test_max_workers(pool):
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def work(i):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return i
+
+    assert list(pool.map(work, range(12))) == list(range(12))
+    assert running[1] == 3
+
+    stats = pool.stats
+    assert stats.submitted == stats.completed == 12
+    assert stats.queued == stats.running == 0
+    assert stats.maxQueued >= 9
+    assert stats.meanLatency >= 0.02
+    assert stats.maxWait > 0
+
+
+def test_failures(pool):
+    future = pool.run(['fstat', '-m', '1', '//depot/missing.txt'])
+    assert future.result()[0]['code'] == 'error'
+
+    pool.connection.level = 2
+    with pytest.raises(errors.CommandError):
+        pool.run(['fstat', '//depot/missing.txt']).result()
+    assert pool.stats.failed == 1
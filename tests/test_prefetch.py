@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_prefetch
+----------------------------------
+
+Tests for `Connection.prefetch`.
+"""
+
+import hashlib
+
+import pytest
+
+from tests.p4 import Depot
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_prefetch(connection, popen, compact):
+    depot = Depot()
+    revs = connection.ls('//depot/dir0...', compact=compact)
+    revs.append(revs[0])
+    del popen[:]
+
+    assert connection.prefetch(revs) == revs
+    fstats = popen.commands('fstat')
+    assert len(fstats) == 1
+    assert '-Ol' in fstats[0] and fstats[0][fstats[0].index('-T') + 1] == 'depotFile,digest,fileSize'
+
+    total = sum(len(rev) for rev in revs)
+    assert total == sum(depot.size(i) for i in range(100)) + depot.size(0)
+    assert revs[7].hash == hashlib.md5(depot.content(7)).hexdigest().upper()
+    assert len(popen.commands('fstat')) == 1
+
+    # -- Revisions that have every field are not queried again
+    connection.prefetch(revs)
+    assert len(popen.commands('fstat')) == 1
+
+
+def test_prefetch_fields(connection):
+    revs = connection.ls(['//depot/dir001/file000001.txt', '//depot/dir002/file000002.txt'])
+    del revs[0]._p4dict['headModTime']
+
+    connection.prefetch(revs, fields=['headModTime'])
+    assert revs[0]._p4dict['headModTime'] == '1499990001'
+    assert 'digest' not in revs[0]._p4dict
+    assert connection.prefetch([]) == []
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_print
+----------------------------------
+
+Tests for streaming file content with `Connection.iter_print` and `Connection.print_to`.
+"""
+
+import os
+
+import pytest
+
+from tests.p4 import Depot
+
+
+@pytest.fixture
+def chunks(monkeypatch):
+    monkeypatch.setenv('FAKE_P4_PRINT_CHUNK', '1000')
+
+
+def test_iter_print(chunks, connection):
+    depot = Depot()
+    seen = []
+    for record, data in connection.iter_print(['//depot/dir007/...', '//depot/dir010/file000010.txt']):
+        content = list(data)
+        index = depot.index(record['depotFile'])
+        assert b''.join(content) == depot.content(index)
+        assert all(len(chunk) <= 1000 for chunk in content)
+        seen.append(index)
+
+    # -- 7 is binary and not valid utf8
+    assert seen == [7, 10]
+
+
+def test_iter_print_skips_unread(chunks, connection):
+    records = [record['depotFile'] for record, _ in connection.iter_print('//depot/dir00...')]
+
+    assert records == [Depot().depotFile(i) for i in range(10)]
+
+
+def test_print_to(chunks, connection, tmpdir):
+    depot = Depot()
+    written = connection.print_to('//depot/dir0...', str(tmpdir))
+
+    assert len(written) == 100
+    for index in (0, 7, 42, 99):
+        filename = tmpdir.join('depot', 'dir{:03}'.format(index), 'file{:06}.txt'.format(index))
+        assert str(filename) in written
+        assert filename.read_binary() == depot.content(index)
+
+
+def test_print_to_workers(chunks, fake_p4, tmpdir, popen):
+    from perforce.models import Connection
+
+    depot = Depot()
+    connection = Connection(executable=fake_p4)
+    written = connection.print_to(['//depot/...'], str(tmpdir.join('out')), workers=3)
+    prints = popen.commands('print')
+
+    assert len(prints) == 3
+    assert sorted(written) == sorted(
+        os.path.join(str(tmpdir), 'out', *depot.depotFile(i)[2:].split('/')) for i in range(100)
+    )
+    for index in range(0, 100, 7):
+        assert tmpdir.join('out', *depot.depotFile(index)[2:].split('/')).read_binary() == depot.content(index)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_record
+----------------------------------
+
+Tests for the lazily decoded `Record`.
+"""
+
+import pickle
+
+import six
+import pytest
+
+from perforce.models import Record
+
+RAW = {b'code': b'stat', b'depotFile': b'//depot/a.txt', b'headRev': 3, b'headChange': b'12'}
+
+
+@pytest.mark.skipif(six.PY2, reason='records are not decoded on python 2')
+def test_record():
+    r = Record(dict(RAW))
+    assert not r._values
+    assert r['depotFile'] == '//depot/a.txt'
+    assert list(r._values) == ['depotFile']
+    assert r['headRev'] == '3'
+    assert r.get('missing') is None
+    assert r.get('missing', 1) == 1
+    assert 'code' in r
+    assert 'missing' not in r
+    assert len(r) == 4
+    assert sorted(r) == ['code', 'depotFile', 'headChange', 'headRev']
+    assert r == {'code': 'stat', 'depotFile': '//depot/a.txt', 'headRev': '3', 'headChange': '12'}
+    assert r.copy() == dict(r)
+    assert r.raw is not None
+
+    with pytest.raises(KeyError):
+        r['missing']
+
+
+@pytest.mark.skipif(six.PY2, reason='records are not decoded on python 2')
+def test_keys_are_shared():
+    a = list(Record(dict(RAW)))
+    b = list(Record(dict(RAW)))
+    assert all(x is y for x, y in zip(a, b))
+
+
+@pytest.mark.skipif(six.PY2, reason='records are not decoded on python 2')
+def test_mutation():
+    r = Record(dict(RAW))
+    r['depotFile'] = '//depot/b.txt'
+    assert r._raw is None
+    assert r['depotFile'] == '//depot/b.txt'
+    assert r['headRev'] == '3'
+    del r['headChange']
+    assert 'headChange' not in r
+    assert r.raw[b'headRev'] == b'3'
+
+    assert pickle.loads(pickle.dumps(r)) == r
+
+
+@pytest.mark.skipif(six.PY2, reason='records are not decoded on python 2')
+def test_revision(fake_p4):
+    from perforce.models import Connection
+
+    c = Connection(executable=fake_p4)
+    rev = c.ls('//depot/dir003/file000003.txt')[0]
+    assert isinstance(rev._p4dict, Record)
+    assert rev.head.revision == 4
+    assert rev.revision == 4
+    assert rev.action is None
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_scan
+----------------------------------
+
+Tests for `Client.scan_changes`.
+"""
+
+import os
+
+import pytest
+
+from perforce import models
+from perforce.models import Client, ScanResult
+
+from tests.p4 import Depot
+
+
+@pytest.fixture
+def workspace(tmpdir, fake_p4, monkeypatch):
+    """A synced workspace of 30 files"""
+    root = tmpdir.mkdir('root')
+    monkeypatch.setenv('FAKE_P4_ROOT', str(root))
+    monkeypatch.setenv('FAKE_P4_FILES', '30')
+
+    depot = Depot()
+    for index in range(30):
+        path = root.join(depot.depotFile(index)[len('//depot/'):])
+        path.dirpath().ensure(dir=True)
+        path.write_binary(depot.local(index))
+
+    return root
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    """Paths of the files hashed"""
+    paths = []
+    md5 = models._md5
+
+    def record(filename, crlf=False):
+        paths.append(filename)
+        return md5(filename, crlf)
+
+    monkeypatch.setattr(models, '_md5', record)
+    return paths
+
+
+def test_scan_changes(workspace, connection, hashed):
+    depot = Depot()
+    path = lambda index: workspace.join(depot.depotFile(index)[len('//depot/'):])
+
+    path(3).write_binary(b'x' * len(path(3).read_binary()))
+    path(4).write_binary(b'longer' + path(4).read_binary())
+    path(5).remove()
+    path(6).write_binary(b'edited')
+    connection.edit(depot.depotFile(6))
+    workspace.join('dir000', 'new.txt').write('new')
+    workspace.mkdir('dir099').join('excluded.txt').write('excluded')
+
+    client = Client('fake_client', connection)
+    result = client.scan_changes(workers=4)
+
+    assert isinstance(result, ScanResult)
+    assert result.add == {str(workspace.join('dir000', 'new.txt'))}
+    assert result.edit == {depot.depotFile(3), depot.depotFile(4)}
+    assert result.delete == {depot.depotFile(5)}
+    assert len(hashed) == 27
+
+    # -- Only the files that changed since the last scan are hashed again
+    del hashed[:]
+    assert client.scan_changes() == result
+    assert hashed == [str(path(3))]
+
+    connection.edit(sorted(result.edit))
+    assert client.scan_changes().edit == set()
+
+
+def test_scan_snapshot(workspace, connection, hashed, tmpdir):
+    snapshot = str(tmpdir.join('snapshot.json'))
+    Client('fake_client', connection).scan_changes(snapshot=snapshot)
+    assert len(hashed) == 30
+
+    del hashed[:]
+    workspace.join('dir001', 'file000001.txt').write('changed')
+    os.utime(str(workspace.join('dir002', 'file000002.txt')), (0, 0))
+    result = Client('fake_client', connection).scan_changes(snapshot=snapshot)
+
+    assert result == ScanResult(set(), {'//depot/dir001/file000001.txt'}, set())
+    assert hashed == [str(workspace.join('dir002', 'file000002.txt'))]
+
+
+@pytest.fixture
+def keywords(monkeypatch):
+    monkeypatch.setenv('FAKE_P4_KEYWORDS', '1,2')
+
+
+def test_scan_keywords(keywords, workspace, connection, hashed):
+    depot = Depot()
+    assert depot.local(1) != depot.content(1)
+    workspace.join('dir002', 'file000002.txt').write_binary(b'$Id$\nedited')
+
+    result = Client('fake_client', connection).scan_changes()
+
+    # -- The expanded keywords of an unchanged ktext file are not an edit, the server compares them
+    assert result.edit == {depot.depotFile(2)}
+    assert str(workspace.join('dir001', 'file000001.txt')) not in hashed
+    assert len(hashed) == 28
+
+
+def test_scan_ignored(workspace, connection, monkeypatch):
+    monkeypatch.setenv('P4IGNORE', '.p4ignore')
+    workspace.join('.p4ignore').write('# -- build output\n*.pyc\nbuild/\n!keep.pyc\n')
+    workspace.join('dir001', '.p4ignore').write('/new.txt\n')
+    for name in ('dir000/a.pyc', 'dir000/keep.pyc', 'build/out.txt', 'dir000/new.txt', 'dir001/new.txt',
+                 'dir001/sub/new.txt'):
+        workspace.join(*name.split('/')).write('new', ensure=True)
+
+    result = Client('fake_client', connection).scan_changes()
+
+    expected = ['.p4ignore', 'dir000/keep.pyc', 'dir000/new.txt', 'dir001/.p4ignore', 'dir001/sub/new.txt']
+    assert result.add == set(str(workspace.join(*name.split('/'))) for name in expected)
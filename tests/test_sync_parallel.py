@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sync_parallel
+----------------------------------
+
+Tests for the byte balanced `Connection.sync_parallel`.
+"""
+
+
+from perforce.models import SyncProgress, _shards
+
+
+def test_shards():
+    sizes = {'a': 100, 'b': 60, 'c': 50, 'd': 40, 'e': 5}
+    shards = _shards(list(sizes), sizes, 2)
+
+    assert sorted(sum(sizes[f] for f in shard) for shard in shards) == [115, 140]
+    assert sorted(f for shard in shards for f in shard) == sorted(sizes)
+    assert _shards(['a'], sizes, 4) == [['a']]
+    assert _shards([], sizes, 4) == [[]]
+
+
+def test_sync_parallel(connection, popen):
+    events = []
+    records = connection.sync_parallel(['//depot/dir00...', '//depot/dir01...#1'], workers=3,
+                                       progress=events.append)
+    syncs = [args for args in popen.commands('sync') if '-n' not in args]
+
+    assert len(records) == 20
+    assert len(events) == 20
+    assert all(isinstance(e, SyncProgress) for e in events)
+    last = max(events, key=lambda e: e.files)
+    assert last.files == last.totalFiles == 20
+    assert last.bytes == last.totalBytes > 0
+    assert last.filesPerSecond > 0 and last.bytesPerSecond > 0
+    assert set(r['rev'] for r in records if r['depotFile'].startswith('//depot/dir01')) == {'1'}
+    if not connection._persistent:
+        assert len(syncs) == 3
+
+    assert connection.sync_parallel('//depot/missing/...') == []
+
+
+def test_sync_native(connection, popen):
+    records = connection.sync_parallel('//depot/dir00...', workers=2, native=True)
+
+    assert len(records) == 10
+    assert any('--parallel=threads=2' in args for args in popen)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_table
+----------------------------------
+
+Tests for `Connection.fstat_table` and `FstatTable`, with and without NumPy.
+"""
+
+import pytest
+
+from perforce import table as tablemodule
+from perforce.table import DictionaryColumn, FstatTable, TableBuilder
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def table(request, connection, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(tablemodule, 'numpy', None)
+
+    return connection.fstat_table('//depot/...', ['depotFile', 'headType', 'headRev', 'fileSize', 'action'])
+
+
+def test_columns(table):
+    assert isinstance(table, FstatTable)
+    assert len(table) == 100
+    assert table.columns == ('depotFile', 'headType', 'headRev', 'fileSize', 'action')
+    assert list(table['headRev'][:3]) == [1, 2, 3]
+    assert isinstance(table['headType'], DictionaryColumn)
+    assert sorted(table['headType'].categories) == ['binary', 'text']
+    assert table['headType'][7] == 'binary'
+    assert table['action'][0] is None
+    assert next(iter(table)) == {'depotFile': '//depot/dir000/file000000.txt', 'headType': 'binary', 'headRev': 1,
+                                 'fileSize': 100}
+
+
+def test_filter(table):
+    binary = table.filter(table.mask('headType', '==', 'binary'))
+    assert len(binary) == 15
+    assert set(binary['headType']) == {'binary'}
+
+    big = binary[binary.mask('fileSize', '>', 2000)]
+    assert all(size > 2000 for size in big['fileSize'])
+    assert len(table[table.mask('headRev', 'in', (1, 2))]) == 40
+    assert len(table[table.mask('action', '==', 'edit')]) == 0
+
+
+def test_groupby(table):
+    assert table.groupby('headType') == {'binary': 15, 'text': 85}
+    assert sum(table.groupby('headRev', 'fileSize', 'sum').values()) == sum(table['fileSize'])
+    assert table.groupby('headType', 'headRev', 'max') == {'binary': 5, 'text': 5}
+    assert table.groupby('headType', 'headRev', 'min') == {'binary': 1, 'text': 1}
+    assert table.groupby('action') == {None: 100}
+
+    with pytest.raises(ValueError):
+        table.groupby('headType', 'depotFile', 'sum')
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'array'])
+def test_missing(backend, monkeypatch):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(tablemodule, 'numpy', None)
+
+    builder = TableBuilder(['depotFile', 'headAction', 'fileSize'])
+    builder.append({'depotFile': '//depot/a', 'headAction': 'add', 'fileSize': '3'})
+    builder.append({'depotFile': '//depot/b', 'headAction': 'add', 'fileSize': '10'})
+    # -- Deleted revisions have no size
+    builder.append({'depotFile': '//depot/c', 'headAction': 'delete'})
+    builder.append({'depotFile': '//depot/d', 'headAction': 'delete'})
+    builder.append({'depotFile': '//depot/e', 'headAction': 'edit', 'fileSize': '-1'})
+    table = builder.table()
+
+    assert list(table.mask('fileSize', '<', 5)) == [True, False, False, False, True]
+    assert list(table.mask('fileSize', '!=', 3)) == [False, True, False, False, True]
+    assert list(table.mask('fileSize', 'in', [-1, 10])) == [False, True, False, False, True]
+    assert tablemodule._list(table['fileSize']) == [3, 10, None, None, -1]
+    assert table.groupby('headAction', 'fileSize', 'sum') == {'add': 13, 'edit': -1}
+    assert table.groupby('headAction', 'fileSize', 'min') == {'add': 3, 'edit': -1}
+    assert table.groupby('headAction', 'fileSize', 'mean') == {'add': 6.5, 'edit': -1.0}
+    assert table.groupby('headAction') == {'add': 2, 'delete': 2, 'edit': 1}
+    assert table.groupby('fileSize') == {None: 2, -1: 1, 3: 1, 10: 1}
+    assert list(table)[2] == {'depotFile': '//depot/c', 'headAction': 'delete'}
+    assert list(table)[4]['fileSize'] == -1
+
+    if backend == 'numpy':
+        pytest.importorskip('pandas')
+        assert table.to_pandas()['fileSize'].isna().tolist() == [False, False, True, True, False]
+
+        pytest.importorskip('pyarrow')
+        assert table.to_arrow().column('fileSize').null_count == 2
+
+
+def test_export(table):
+    if tablemodule.numpy is None:
+        return
+
+    pytest.importorskip('pandas')
+    frame = table.to_pandas()
+    assert str(frame['headType'].dtype) == 'category'
+    assert frame['fileSize'].sum() == sum(table['fileSize'])
+
+    pyarrow = pytest.importorskip('pyarrow')
+    arrow = table.to_arrow()
+    assert arrow.num_rows == 100
+    assert pyarrow.types.is_dictionary(arrow.schema.field('headType').type)
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'array'])
+def test_typecodes(backend, connection, monkeypatch):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(tablemodule, 'numpy', None)
+    expected = list(connection.fstat_table('//depot/...')['fileSize'])
+
+    # -- Without a 64 bit array typecode, as on python 2 on Windows, numbers are appended to lists
+    monkeypatch.setattr(tablemodule, 'INT64', None)
+    table = connection.fstat_table('//depot/...')
+    assert list(table['fileSize']) == expected
+
+    monkeypatch.setattr(tablemodule, 'numpy', None)
+    with pytest.raises(ImportError):
+        table.to_arrow()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_verify
+----------------------------------
+
+Tests for `Connection.verify_local` and the hashing of local files.
+"""
+
+import hashlib
+
+import pytest
+
+from perforce import models
+from perforce.models import Mismatch
+
+from tests.p4 import Depot
+
+
+@pytest.fixture
+def workspace(tmpdir, fake_p4, monkeypatch):
+    """A synced workspace of 30 files"""
+    root = tmpdir.mkdir('root')
+    monkeypatch.setenv('FAKE_P4_ROOT', str(root))
+    monkeypatch.setenv('FAKE_P4_FILES', '30')
+
+    depot = Depot()
+    for index in range(30):
+        path = root.join(depot.depotFile(index)[len('//depot/'):])
+        path.dirpath().ensure(dir=True)
+        path.write_binary(depot.local(index))
+
+    return root
+
+
+def test_verify_local(workspace, connection):
+    depot = Depot()
+    path = lambda index: workspace.join(depot.depotFile(index)[len('//depot/'):])
+
+    assert list(connection.verify_local('//depot/...')) == []
+
+    path(3).write_binary(b'x' * len(path(3).read_binary()))
+    path(14).remove()
+    path(6).write_binary(b'edited')
+    connection.edit(depot.depotFile(6))
+
+    mismatches = list(connection.verify_local(connection.ls('//depot/...') + ['//depot/dir014/file000014.txt'],
+                                              workers=2))
+    assert [m.depotFile for m in mismatches] == [depot.depotFile(3), depot.depotFile(14), depot.depotFile(14)]
+    digest = hashlib.md5(depot.content(3)).hexdigest().upper()
+    local = hashlib.md5(b'x' * depot.size(3)).hexdigest().upper()
+    assert mismatches[0] == Mismatch(depot.depotFile(3), str(path(3)), digest, local)
+    assert mismatches[1].localDigest is None
+
+
+@pytest.fixture
+def keywords(monkeypatch):
+    monkeypatch.setenv('FAKE_P4_KEYWORDS', '1,2')
+
+
+def test_verify_keywords(keywords, workspace, connection):
+    depot = Depot()
+    edited = workspace.join('dir002', 'file000002.txt')
+    edited.write_binary(b'$Id$\nedited')
+
+    # -- The expanded keywords of an unchanged ktext file are not a mismatch
+    mismatches = list(connection.verify_local('//depot/...'))
+    digest = hashlib.md5(depot.content(2)).hexdigest().upper()
+    local = hashlib.md5(b'$Id$\nedited').hexdigest().upper()
+    assert mismatches == [Mismatch(depot.depotFile(2), str(edited), digest, local)]
+
+
+def test_md5_windows(tmpdir, monkeypatch):
+    monkeypatch.setattr(models, 'HASH_WINDOW', 4)
+    data = b'line\r\nsplit\r\n\r\rend\r'
+    filename = tmpdir.join('file')
+    filename.write_binary(data)
+
+    assert models._md5(str(filename)) == hashlib.md5(data).hexdigest().upper()
+    assert models._md5(str(filename), crlf=True) == \
+        hashlib.md5(data.replace(b'\r\n', b'\n')).hexdigest().upper()
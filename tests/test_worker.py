@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_worker
+----------------------------------
+
+Tests for the persistent worker mode of `Connection`.
+"""
+
+import pytest
+
+from perforce.models import Connection, MAX_WORKERS
+from perforce import errors
+
+FILE = '//depot/dir003/file000003.txt'
+
+
+def test_run(connection):
+    assert connection.run(['info'])[0]['clientName'] == 'fake_client'
+    assert connection.run(['fstat', FILE])[0]['depotFile'] == FILE
+    assert len(connection.run(['fstat', '//depot/dir00.../...'])) == 10
+    assert connection.run(['fstat', '//depot/missing.txt'])[0]['code'] == 'error'
+
+
+def test_whole_flags(connection):
+    # -- The maximum is for the whole command, not for each file
+    assert len(connection.run(['fstat', '-m', '1', '//depot/dir001/...', '//depot/dir002/...'])) == 1
+    assert len(connection.run(['fstat', '-m', '3', '//depot/dir00...', '//depot/dir01...'])) == 3
+
+    # -- files -e takes no value
+    records = connection.run(['files', '-e', '//depot/dir001/...', '//depot/dir002/...'])
+    assert [r['depotFile'] for r in records] == ['//depot/dir001/file000001.txt', '//depot/dir002/file000002.txt']
+
+
+def test_errors(connection):
+    connection.level = 2
+    with pytest.raises(errors.CommandError):
+        connection.run(['fstat', '//depot/missing.txt'])
+
+    # -- The worker is still in sync after an error
+    assert connection.run(['fstat', FILE])[0]['depotFile'] == FILE
+
+
+def test_revision(connection):
+    rev = connection.ls(FILE)[0]
+    assert rev.action is None
+    rev.edit()
+    assert rev.action == 'edit'
+    rev.revert()
+    assert rev.action is None
+
+
+def test_workers(fake_p4):
+    c = Connection(executable=fake_p4, persistent=True)
+    c.run(['info'])
+    assert not c._workers
+
+    for i in range(10):
+        c.run(['fstat', '-T', 'depotFile,headRev{}'.format(i), FILE])
+    assert len(c._workers) == MAX_WORKERS
+
+    c.close()
+    assert not c._workers
+    assert c.run(['fstat', FILE])[0]['depotFile'] == FILE
+    c.close()
+
+
+def test_nested(connection):
+    depotFiles = []
+    for record in connection.iter_run(['fstat', '//depot/dir00...']):
+        # -- A command with the same flags while the first one is still being read
+        depotFiles.append(connection.run(['fstat', record['depotFile']])[0]['depotFile'])
+
+    assert depotFiles == ['//depot/dir{0:03}/file{0:06}.txt'.format(i) for i in range(10)]
+    assert len(connection._workers) <= 1
+    assert connection.run(['fstat', FILE])[0]['depotFile'] == FILE